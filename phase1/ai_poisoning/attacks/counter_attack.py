@@ -1,4 +1,5 @@
 ﻿import numpy as np
+import itertools
 import time
 from datetime import datetime
 import os
@@ -9,21 +10,43 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, os.path.join(parent_dir, 'detectors'))
 sys.path.insert(0, os.path.join(parent_dir, 'generators'))
 
-from recon_detector import AIReconDetector
+from recon_detector import AIReconDetector, BoundedLog
+from concurrent_detector import ConcurrentReconDetector, SynchronizedLog, ThreadCounter
 from adversarial_generator import AdversarialGenerator
 
+# Poison techniques deploy_poison chooses between
+TECHNIQUES = ('label_flip', 'gradient_noise', 'fgsm')
+
 class ActiveCounterAttack:
     '''
     Active defense system that counter-attacks AI reconnaissance
     Deploys poisoned data when attacks are detected
+    
+    With concurrent=True monitor_request may be called from many threads:
+    the detector is lock-striped by source IP (ConcurrentReconDetector)
+    and the counters are per-thread, merged on read.
     '''
     
-    def __init__(self):
-        self.detector = AIReconDetector(threshold=8, time_window=30)
+    def __init__(self, max_log_entries=1000, spill_path=None, concurrent=False, stripes=16):
+        if concurrent:
+            self.detector = ConcurrentReconDetector(threshold=8, time_window=30, stripes=stripes)
+            self.attack_log = SynchronizedLog(max_log_entries, spill_path)
+        else:
+            self.detector = AIReconDetector(threshold=8, time_window=30)
+            self.attack_log = BoundedLog(max_log_entries, spill_path)  # Newest attacks; older spilled or dropped
         self.generator = AdversarialGenerator()
-        self.attacks_countered = 0
-        self.poison_deployed = 0
-        self.attack_log = []
+        self.attacks_counter = ThreadCounter()
+        self.poison_counter = ThreadCounter()
+        self.attack_ids = itertools.count()
+        self.technique_counts = {technique: ThreadCounter() for technique in TECHNIQUES}
+    
+    @property
+    def attacks_countered(self):
+        return self.attacks_counter.value
+    
+    @property
+    def poison_deployed(self):
+        return self.poison_counter.value
     
     def monitor_request(self, source_ip, request_type, features):
         '''
@@ -33,7 +56,7 @@ class ActiveCounterAttack:
             source_ip: Source IP address
             request_type: Type of request
             features: Request features
-            
+        
         Returns:
             response: Normal or poisoned response
         '''
@@ -86,7 +109,7 @@ class ActiveCounterAttack:
         if 'response_time' in poisoned:
             poisoned['response_time'] += np.random.normal(0, 0.2)
         
-        self.poison_deployed += 1
+        self.poison_counter.add()
         return poisoned
     
     def poison_data_response(self, clean_response):
@@ -99,7 +122,7 @@ class ActiveCounterAttack:
                 noise = np.random.normal(0, abs(value) * 0.15)
                 poisoned[key] = value + noise
         
-        self.poison_deployed += 1
+        self.poison_counter.add()
         return poisoned
     
     def poison_general_response(self, clean_response):
@@ -112,7 +135,7 @@ class ActiveCounterAttack:
                 sign = 1 if np.random.random() > 0.5 else -1
                 poisoned[key] = value + (sign * abs(value) * 0.1)
         
-        self.poison_deployed += 1
+        self.poison_counter.add()
         return poisoned
     
     def generate_normal_response(self, features):
@@ -138,32 +161,40 @@ class ActiveCounterAttack:
             'source_ip': source_ip,
             'request_type': request_type,
             'technique': technique,
-            'attack_id': self.attacks_countered
+            'attack_id': next(self.attack_ids)
         }
         
         self.attack_log.append(attack)
-        self.attacks_countered += 1
+        self.technique_counts[technique].add()
+        self.attacks_counter.add()
         
         print(f'\n💀 COUNTER-ATTACK DEPLOYED!')
         print(f'   Target: {source_ip}')
         print(f'   Technique: {technique}')
-        print(f'   Attack #{self.attacks_countered}')
+        print(f'   Attack #{attack["attack_id"] + 1}')
+    
+    def technique_snapshot(self):
+        '''Counts of the techniques used so far'''
+        counts = {technique: counter.value for technique, counter in self.technique_counts.items()}
+        return {technique: count for technique, count in counts.items() if count}
+    
+    def close(self):
+        '''Write out spilled attack log entries and detections'''
+        self.attack_log.close()
+        self.detector.close()
     
     def get_statistics(self):
         '''Get counter-attack statistics'''
         detector_stats = self.detector.get_statistics()
         
-        technique_counts = {}
-        for attack in self.attack_log:
-            tech = attack['technique']
-            technique_counts[tech] = technique_counts.get(tech, 0) + 1
-        
         return {
             'reconnaissance_detected': detector_stats['detections'],
             'counter_attacks_deployed': self.attacks_countered,
             'poison_responses_sent': self.poison_deployed,
-            'techniques_used': technique_counts,
-            'total_requests': detector_stats['total_requests']
+            'techniques_used': self.technique_snapshot(),
+            'total_requests': detector_stats['total_requests'],
+            'attack_log_spilled': self.attack_log.spilled,
+            'attack_log_dropped': self.attack_log.dropped
         }
     
     def print_summary(self):
@@ -183,9 +214,10 @@ class ActiveCounterAttack:
             for tech, count in stats['techniques_used'].items():
                 print(f'  {tech}: {count}')
         
-        if self.attack_log:
+        recent = self.attack_log.recent(5)
+        if recent:
             print(f'\nRecent counter-attacks:')
-            for attack in self.attack_log[-5:]:
+            for attack in recent:
                 print(f'  {attack["timestamp"]} - {attack["source_ip"]}')
                 print(f'    Technique: {attack["technique"]}')
         
@@ -242,6 +274,7 @@ if __name__ == '__main__':
     
     # Show results
     defender.print_summary()
+    defender.close()
     
     print('\n✅ Counter-attack system operational!')
     print('🛡️  Your system is now FIGHTING BACK against AI attacks!')
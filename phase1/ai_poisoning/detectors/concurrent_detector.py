@@ -0,0 +1,175 @@
+﻿import threading
+import time
+import weakref
+import zlib
+from collections import defaultdict
+from recon_detector import AIReconDetector, BoundedLog
+
+class ThreadCounter:
+    '''
+    Counter with one cell per live thread, summed on read
+    
+    Each thread only ever increments its own cell, so hot-path increments
+    take no lock and never lose updates; the lock is taken when a thread
+    registers its cell and when a finished thread's count is folded into
+    `retired` (a finalizer on the Thread object), so thread-per-connection
+    servers don't accumulate a cell per connection. Reads may miss
+    increments still in flight.
+    '''
+    
+    def __init__(self):
+        self.local = threading.local()
+        self.cells = {}  # id(cell) -> cell, one per live thread
+        self.retired = 0
+        self.cells_lock = threading.Lock()
+    
+    def add(self, amount=1):
+        cell = getattr(self.local, 'cell', None)
+        if cell is None:
+            cell = self.local.cell = [0]
+            with self.cells_lock:
+                self.cells[id(cell)] = cell
+            weakref.finalize(threading.current_thread(), self.retire, cell)
+        cell[0] += amount
+    
+    def retire(self, cell):
+        '''Fold a finished thread's cell into the retired total'''
+        with self.cells_lock:
+            if self.cells.pop(id(cell), None) is not None:
+                self.retired += cell[0]
+    
+    @property
+    def value(self):
+        with self.cells_lock:
+            return self.retired + sum(cell[0] for cell in self.cells.values())
+
+class SynchronizedLog(BoundedLog):
+    '''BoundedLog safe to share between threads'''
+    
+    def __init__(self, maxlen=1000, spill_path=None):
+        super().__init__(maxlen, spill_path)
+        # Reentrant: append spills and close flushes through the locked flush
+        self.lock = threading.RLock()
+    
+    def append(self, entry):
+        with self.lock:
+            super().append(entry)
+    
+    def recent(self, count):
+        with self.lock:
+            return super().recent(count)
+    
+    def flush(self):
+        with self.lock:
+            super().flush()
+    
+    def close(self):
+        with self.lock:
+            super().close()
+
+def stripe_for(source_ip, stripes):
+    '''Stripe index of a source; crc32 rather than hash() so it is stable across processes'''
+    return zlib.crc32(source_ip.encode()) % stripes
+
+class ConcurrentReconDetector:
+    '''
+    AIReconDetector for multi-threaded servers
+    
+    Sources are striped across `stripes` independent detectors by IP hash,
+    each behind its own lock, so threads serving different sources rarely
+    wait on each other and a source's requests are always analysed in the
+    order they take the lock. Each stripe tracks up to max_sources / stripes
+    sources (LRU within the stripe); detections from every stripe go to one
+    shared log. Counters are per stripe and merged on read.
+    '''
+    
+    def __init__(self, threshold=10, time_window=60, stripes=16, max_sources=100000, source_ttl=None,
+                 max_detections=1000, spill_path=None):
+        if stripes < 1:
+            raise ValueError('stripes must be at least 1')
+        
+        self.threshold = threshold
+        self.time_window = time_window
+        self.stripes = stripes
+        self.suspicious_patterns = SynchronizedLog(max_detections, spill_path)
+        self.shards = []
+        for _ in range(stripes):
+            shard = AIReconDetector(threshold, time_window, max(1, max_sources // stripes), source_ttl)
+            shard.suspicious_patterns = self.suspicious_patterns
+            self.shards.append(shard)
+        self.locks = [threading.Lock() for _ in range(stripes)]
+    
+    def log_request(self, source_ip, request_type, features, timestamp=None):
+        '''Thread-safe AIReconDetector.log_request'''
+        index = stripe_for(source_ip, self.stripes)
+        with self.locks[index]:
+            # Stamped under the lock so a source's timestamps never go backwards
+            if timestamp is None:
+                timestamp = time.time()
+            return self.shards[index].log_request(source_ip, request_type, features, timestamp)
+    
+    def detect_reconnaissance(self, source_ip):
+        index = stripe_for(source_ip, self.stripes)
+        with self.locks[index]:
+            return self.shards[index].detect_reconnaissance(source_ip)
+    
+    @property
+    def detection_count(self):
+        return sum(shard.detection_count for shard in self.shards)
+    
+    def recent_detections(self, count):
+        return self.suspicious_patterns.recent(count)
+    
+    def get_statistics(self):
+        '''AIReconDetector.get_statistics over all stripes (each locked while read)'''
+        
+        merged = defaultdict(int)
+        patterns = defaultdict(int)
+        for shard, lock in zip(self.shards, self.locks):
+            with lock:
+                stats = shard.get_statistics()
+            for key in ('source_admissions', 'active_sources', 'total_requests', 'detections', 'sources_evicted',
+                        'sources_expired'):
+                merged[key] += stats[key]
+            for pattern, count in stats['patterns'].items():
+                patterns[pattern] += count
+        
+        admissions = merged['source_admissions']
+        return {
+            **merged,
+            'patterns': dict(patterns),
+            'detection_rate': merged['detections'] / admissions if admissions > 0 else 0,
+            'detections_spilled': self.suspicious_patterns.spilled,
+            'detections_dropped': self.suspicious_patterns.dropped,
+            'stripes': self.stripes
+        }
+    
+    print_summary = AIReconDetector.print_summary
+    
+    def close(self):
+        self.suspicious_patterns.close()
+
+if __name__ == '__main__':
+    from concurrent.futures import ThreadPoolExecutor
+    
+    print('='*60)
+    print('CONCURRENT RECONNAISSANCE DETECTOR TEST')
+    print('='*60)
+    
+    detector = ConcurrentReconDetector(threshold=10, time_window=30, stripes=4)
+    
+    def probe(attacker):
+        ip = f'10.0.0.{attacker}'
+        for i in range(15):
+            detector.log_request(ip, f'endpoint_{i % 6}', {'param': i * 10, 'value': i * 100})
+            time.sleep(0.01)
+    
+    print('\n[TEST] 8 attackers probing from 8 threads...\n')
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(probe, range(50, 58)))
+    
+    detector.print_summary()
+    detector.close()
+    
+    print('\n✅ Concurrent detection test complete!')
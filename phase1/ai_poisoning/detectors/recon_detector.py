@@ -1,22 +1,293 @@
-﻿import numpy as np
+﻿import json
+import math
 import time
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
 from datetime import datetime
+from pathlib import Path
+
+RECENT_REQUESTS = 10  # Requests checked for endpoint scanning and boundary probing
+TIMING_REQUESTS = 6  # Oldest requests of the window whose intervals are checked for bot timing
+
+class RunningVariance:
+    '''
+    Variance of a window of values with add/remove
+    
+    Shifted running sums (as stream_extractor.WindowedStats): values are
+    taken relative to the first one added, so near-identical bot intervals
+    don't lose precision to cancellation as values come and go.
+    '''
+    
+    def __init__(self):
+        self.count = 0
+        self.shift = 0.0
+        self.total = 0.0
+        self.total_sq = 0.0
+    
+    def add(self, value):
+        if not self.count:
+            self.shift = value
+            self.total = 0.0
+            self.total_sq = 0.0
+        self.count += 1
+        delta = value - self.shift
+        self.total += delta
+        self.total_sq += delta * delta
+    
+    def remove(self, value):
+        self.count -= 1
+        delta = value - self.shift
+        self.total -= delta
+        self.total_sq -= delta * delta
+    
+    def std(self):
+        if not self.count:
+            return 0.0
+        mean_delta = self.total / self.count
+        return math.sqrt(max(0.0, self.total_sq / self.count - mean_delta * mean_delta))
+
+class FeatureRange:
+    '''
+    Min/max (monotonic deques) and running mean of one feature over a FIFO of requests
+    
+    The running total is compensated (Neumaier), so the rounding residue a
+    plain total keeps after a huge value leaves doesn't turn a mean that
+    should be 0 into a tiny non-zero one. Means can still differ from
+    np.mean over the same values in the last bits.
+    '''
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.compensation = 0.0
+        self.maxima = deque()  # (seq, value), values decreasing
+        self.minima = deque()  # (seq, value), values increasing
+    
+    def accumulate(self, value):
+        total = self.total + value
+        if abs(self.total) >= abs(value):
+            self.compensation += (self.total - total) + value
+        else:
+            self.compensation += (value - total) + self.total
+        self.total = total
+    
+    def add(self, seq, value):
+        self.count += 1
+        self.accumulate(value)
+        
+        while self.maxima and self.maxima[-1][1] <= value:
+            self.maxima.pop()
+        self.maxima.append((seq, value))
+        
+        while self.minima and self.minima[-1][1] >= value:
+            self.minima.pop()
+        self.minima.append((seq, value))
+    
+    def remove(self, seq, value):
+        '''Drop the oldest value (seq is the request it came from)'''
+        self.count -= 1
+        if self.count:
+            self.accumulate(-value)
+        else:
+            self.total = self.compensation = 0.0
+        if self.maxima[0][0] == seq:
+            self.maxima.popleft()
+        if self.minima[0][0] == seq:
+            self.minima.popleft()
+    
+    def is_probing(self):
+        '''Span over 5x the mean magnitude across at least 3 values'''
+        if self.count < 3:
+            return False
+        mean_val = (self.total + self.compensation) / self.count
+        range_span = self.maxima[0][1] - self.minima[0][1]
+        return mean_val != 0 and range_span / abs(mean_val) > 5
+
+def numeric_features(features):
+    return [(key, value) for key, value in features.items() if isinstance(value, (int, float))]
+
+class SourceWindow:
+    '''
+    One source's requests inside the time window, with its pattern signals
+    
+    Every signal is updated as requests enter and leave, so a check costs
+    O(1) instead of rescanning the window:
+        - request-type counts over the newest RECENT_REQUESTS requests
+        - interval variance over the oldest TIMING_REQUESTS requests
+        - per-feature min/max/mean over the newest RECENT_REQUESTS requests
+    '''
+    
+    def __init__(self):
+        self.requests = deque()  # Oldest first
+        self.type_counts = defaultdict(int)
+        self.intervals = RunningVariance()
+        self.feature_ranges = {}
+        self.probing_features = set()
+        self.recent_seq = 0  # Sequence number of the oldest recent request
+        self.next_seq = 0
+        self.last_seen = 0.0
+    
+    def __len__(self):
+        return len(self.requests)
+    
+    def __iter__(self):
+        return iter(self.requests)
+    
+    def __getitem__(self, index):
+        return self.requests[index]
+    
+    def append(self, request):
+        requests = self.requests
+        requests.append(request)
+        
+        if 2 <= len(requests) <= TIMING_REQUESTS:
+            self.intervals.add(request['timestamp'] - requests[-2]['timestamp'])
+        
+        self.type_counts[request['type']] += 1
+        self.update_features(request['features'], self.next_seq, add=True)
+        self.next_seq += 1
+        
+        if len(requests) > RECENT_REQUESTS:
+            self.leave_recent(requests[-RECENT_REQUESTS - 1])
+    
+    def evict_before(self, cutoff_time):
+        '''Drop requests at or before cutoff_time (oldest are on the left)'''
+        requests = self.requests
+        while requests and requests[0]['timestamp'] <= cutoff_time:
+            if len(requests) >= 2:
+                self.intervals.remove(requests[1]['timestamp'] - requests[0]['timestamp'])
+            if len(requests) > TIMING_REQUESTS:
+                self.intervals.add(requests[TIMING_REQUESTS]['timestamp'] - requests[TIMING_REQUESTS - 1]['timestamp'])
+            if len(requests) <= RECENT_REQUESTS:
+                self.leave_recent(requests[0])
+            requests.popleft()
+    
+    def leave_recent(self, request):
+        '''request (the oldest recent one) drops out of the newest RECENT_REQUESTS'''
+        request_type = request['type']
+        self.type_counts[request_type] -= 1
+        if not self.type_counts[request_type]:
+            del self.type_counts[request_type]
+        
+        self.update_features(request['features'], self.recent_seq, add=False)
+        self.recent_seq += 1
+    
+    def update_features(self, features, seq, add):
+        for key, value in numeric_features(features):
+            feature = self.feature_ranges.get(key)
+            if add:
+                if feature is None:
+                    feature = self.feature_ranges[key] = FeatureRange()
+                feature.add(seq, value)
+            else:
+                feature.remove(seq, value)
+                if not feature.count:
+                    del self.feature_ranges[key]
+                    self.probing_features.discard(key)
+                    continue
+            
+            if feature.is_probing():
+                self.probing_features.add(key)
+            else:
+                self.probing_features.discard(key)
+    
+    def unique_types(self):
+        return len(self.type_counts)
+    
+    def interval_std(self):
+        return self.intervals.std()
+    
+    def is_probing(self):
+        return bool(self.probing_features)
+
+class BoundedLog:
+    '''
+    Ring buffer keeping the newest maxlen log entries
+    
+    Entries pushed out are appended to spill_path as JSONL when one is
+    given, otherwise dropped; both are counted. Spilled entries are written
+    and flushed in batches of spill_batch; close() writes the rest.
+    '''
+    
+    def __init__(self, maxlen=1000, spill_path=None, spill_batch=64):
+        self.entries = deque(maxlen=maxlen)
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.spill_batch = spill_batch
+        self.spill_file = None
+        self.pending = []  # Spilled entries not yet written
+        self.dropped = 0
+        self.spilled = 0
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def __iter__(self):
+        return iter(self.entries)
+    
+    def append(self, entry):
+        if len(self.entries) == self.entries.maxlen:
+            self.spill(self.entries[0])
+        self.entries.append(entry)
+    
+    def spill(self, entry):
+        if self.spill_path is None:
+            self.dropped += 1
+            return
+        
+        self.pending.append(json.dumps(entry, default=str) + '\n')
+        self.spilled += 1
+        if len(self.pending) >= self.spill_batch:
+            self.flush()
+    
+    def recent(self, count):
+        '''Newest `count` entries, oldest first'''
+        return [self.entries[i] for i in range(-min(count, len(self.entries)), 0)]
+    
+    def flush(self):
+        '''Write and flush pending spilled entries'''
+        if not self.pending:
+            return
+        
+        if self.spill_file is None:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            self.spill_file = open(self.spill_path, 'a')
+        self.spill_file.writelines(self.pending)
+        self.spill_file.flush()
+        self.pending = []
+    
+    def close(self):
+        self.flush()
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
 
 class AIReconDetector:
     '''
     Detects AI reconnaissance attempts
     Identifies when ML models are probing the system
+    
+    State is bounded: at most max_sources sources are tracked (least
+    recently active evicted first), sources idle for source_ttl expire
+    (the LRU order puts the idlest first, so expiry is a scan from the
+    front), and only the newest max_detections detections are kept, the
+    rest spilled to spill_path or dropped.
     '''
     
-    def __init__(self, threshold=10, time_window=60):
+    def __init__(self, threshold=10, time_window=60, max_sources=100000, source_ttl=None, max_detections=1000,
+                 spill_path=None):
         self.threshold = threshold  # Suspicious requests per time window
         self.time_window = time_window  # Seconds
-        self.request_log = defaultdict(list)
-        self.suspicious_patterns = []
+        self.max_sources = max_sources
+        # An idle source's window is empty after time_window anyway
+        self.source_ttl = time_window if source_ttl is None else source_ttl
+        self.request_log = OrderedDict()  # source_ip -> SourceWindow, least recently active first
+        self.suspicious_patterns = BoundedLog(max_detections, spill_path)
+        self.pattern_counts = defaultdict(int)
         self.detection_count = 0
+        self.source_admissions = 0  # Sources starting to be tracked, again after expiry/eviction
+        self.sources_evicted = 0
+        self.sources_expired = 0
     
-    def log_request(self, source_ip, request_type, features):
+    def log_request(self, source_ip, request_type, features, timestamp=None):
         '''
         Log incoming request for analysis
         
@@ -24,8 +295,10 @@ class AIReconDetector:
             source_ip: Source IP address
             request_type: Type of request (login, api, file_access)
             features: Request features for analysis
+            timestamp: Request time (defaults to now); must not go backwards per source
         '''
-        timestamp = time.time()
+        if timestamp is None:
+            timestamp = time.time()
         
         request = {
             'timestamp': timestamp,
@@ -34,86 +307,87 @@ class AIReconDetector:
             'ip': source_ip
         }
         
-        self.request_log[source_ip].append(request)
+        window = self.get_window(source_ip, timestamp)
+        window.append(request)
         
         # Clean old requests outside time window
-        cutoff_time = timestamp - self.time_window
-        self.request_log[source_ip] = [
-            r for r in self.request_log[source_ip] 
-            if r['timestamp'] > cutoff_time
-        ]
+        window.evict_before(timestamp - self.time_window)
         
         # Check for reconnaissance
         is_recon = self.detect_reconnaissance(source_ip)
         
         return is_recon
     
+    def get_window(self, source_ip, timestamp):
+        '''Window for source_ip, tracking it if new (may evict the least recently active source)'''
+        self.expire_idle(timestamp)
+        
+        window = self.request_log.get(source_ip)
+        if window is None:
+            window = SourceWindow()
+            self.request_log[source_ip] = window
+            self.source_admissions += 1
+            if len(self.request_log) > self.max_sources:
+                self.request_log.popitem(last=False)
+                self.sources_evicted += 1
+        else:
+            self.request_log.move_to_end(source_ip)
+        
+        window.last_seen = timestamp
+        return window
+    
+    def expire_idle(self, now):
+        '''Drop sources idle longer than source_ttl (idlest are at the front)'''
+        while self.request_log:
+            window = next(iter(self.request_log.values()))
+            if now - window.last_seen <= self.source_ttl:
+                break
+            self.request_log.popitem(last=False)
+            self.sources_expired += 1
+    
     def detect_reconnaissance(self, source_ip):
         '''Detect if source is performing AI reconnaissance'''
         
-        recent_requests = self.request_log[source_ip]
+        window = self.request_log.get(source_ip)
         
-        if len(recent_requests) < 5:
+        if window is None or len(window) < 5:
             return False
         
         # Pattern 1: High frequency requests
-        if len(recent_requests) > self.threshold:
-            self.record_detection(source_ip, 'high_frequency', len(recent_requests))
+        if len(window) > self.threshold:
+            self.record_detection(source_ip, 'high_frequency', len(window))
             return True
         
         # Pattern 2: Sequential feature probing
-        request_types = [r['type'] for r in recent_requests[-10:]]
-        unique_types = len(set(request_types))
+        unique_types = window.unique_types()
         
         if unique_types >= 5:  # Probing multiple endpoints
             self.record_detection(source_ip, 'endpoint_scanning', unique_types)
             return True
         
         # Pattern 3: Automated timing patterns
-        if len(recent_requests) >= 5:
-            intervals = []
-            for i in range(1, min(6, len(recent_requests))):
-                interval = recent_requests[i]['timestamp'] - recent_requests[i-1]['timestamp']
-                intervals.append(interval)
-            
-            # If intervals are too consistent (automated)
-            if len(intervals) > 2:
-                std_dev = np.std(intervals)
-                if std_dev < 0.1:  # Very consistent timing = bot
-                    self.record_detection(source_ip, 'automated_timing', std_dev)
-                    return True
+        # If intervals are too consistent (automated)
+        if window.intervals.count > 2:
+            std_dev = window.interval_std()
+            if std_dev < 0.1:  # Very consistent timing = bot
+                self.record_detection(source_ip, 'automated_timing', std_dev)
+                return True
         
         # Pattern 4: Feature boundary probing
-        if self.detect_boundary_probing(recent_requests):
-            self.record_detection(source_ip, 'boundary_probing', len(recent_requests))
+        if self.detect_boundary_probing(window):
+            self.record_detection(source_ip, 'boundary_probing', len(window))
             return True
         
         return False
     
-    def detect_boundary_probing(self, requests):
+    def detect_boundary_probing(self, window):
         '''Detect if attacker is probing model boundaries'''
         
-        if len(requests) < 5:
+        if len(window) < 5:
             return False
         
-        # Check if features span wide ranges (probing)
-        feature_ranges = defaultdict(list)
-        
-        for request in requests[-10:]:
-            for key, value in request['features'].items():
-                if isinstance(value, (int, float)):
-                    feature_ranges[key].append(value)
-        
-        # If any feature has very wide range, it's probing
-        for feature, values in feature_ranges.items():
-            if len(values) >= 3:
-                range_span = max(values) - min(values)
-                mean_val = np.mean(values)
-                
-                if mean_val != 0 and range_span / abs(mean_val) > 5:
-                    return True
-        
-        return False
+        # Any feature spanning a very wide range over the recent requests
+        return window.is_probing()
     
     def record_detection(self, source_ip, pattern_type, confidence):
         '''Record a reconnaissance detection'''
@@ -127,6 +401,7 @@ class AIReconDetector:
         }
         
         self.suspicious_patterns.append(detection)
+        self.pattern_counts[pattern_type] += 1
         self.detection_count += 1
         
         print(f'\n🚨 AI RECONNAISSANCE DETECTED!')
@@ -135,22 +410,37 @@ class AIReconDetector:
         print(f'   Confidence: {confidence}')
         print(f'   Requests: {detection["request_count"]} in last {self.time_window}s')
     
+    def recent_detections(self, count):
+        return self.suspicious_patterns.recent(count)
+    
+    def close(self):
+        '''Write out spilled detections and close the spill file'''
+        self.suspicious_patterns.close()
+    
     def get_statistics(self):
-        '''Get detection statistics'''
+        '''
+        Get detection statistics
         
-        total_sources = len(self.request_log)
-        total_requests = sum(len(reqs) for reqs in self.request_log.values())
+        Distinct IPs aren't remembered once expired or evicted (that would be
+        unbounded), so sources are counted as admissions: an IP returning
+        after expiry or eviction is admitted again. detection_rate is
+        detections per admission.
+        '''
         
-        pattern_counts = defaultdict(int)
-        for detection in self.suspicious_patterns:
-            pattern_counts[detection['pattern']] += 1
+        admissions = self.source_admissions
+        total_requests = sum(len(reqs) for reqs in self.request_log.values())
         
         return {
-            'total_sources': total_sources,
+            'source_admissions': admissions,
+            'active_sources': len(self.request_log),
             'total_requests': total_requests,
             'detections': self.detection_count,
-            'patterns': dict(pattern_counts),
-            'detection_rate': self.detection_count / total_sources if total_sources > 0 else 0
+            'patterns': dict(self.pattern_counts),
+            'detection_rate': self.detection_count / admissions if admissions > 0 else 0,
+            'sources_evicted': self.sources_evicted,
+            'sources_expired': self.sources_expired,
+            'detections_spilled': self.suspicious_patterns.spilled,
+            'detections_dropped': self.suspicious_patterns.dropped
         }
     
     def print_summary(self):
@@ -161,19 +451,22 @@ class AIReconDetector:
         print('\n' + '='*60)
         print('AI RECONNAISSANCE DETECTION SUMMARY')
         print('='*60)
-        print(f'Total sources monitored: {stats["total_sources"]}')
+        print(f'Active sources: {stats["active_sources"]}')
+        print(f'Source admissions: {stats["source_admissions"]} (returning after expiry/eviction counts again)')
+        print(f'Sources evicted/expired: {stats["sources_evicted"]}/{stats["sources_expired"]}')
         print(f'Total requests: {stats["total_requests"]}')
         print(f'Reconnaissance detected: {stats["detections"]}')
-        print(f'Detection rate: {stats["detection_rate"]*100:.1f}%')
+        print(f'Detections per admission: {stats["detection_rate"]*100:.1f}%')
         
         if stats['patterns']:
             print('\nDetection patterns:')
             for pattern, count in stats['patterns'].items():
                 print(f'  {pattern}: {count}')
         
-        if self.suspicious_patterns:
+        recent = self.recent_detections(5)
+        if recent:
             print(f'\nRecent detections:')
-            for detection in self.suspicious_patterns[-5:]:
+            for detection in recent:
                 print(f'  {detection["timestamp"]} - {detection["source_ip"]}')
                 print(f'    Pattern: {detection["pattern"]}')
         
@@ -229,5 +522,6 @@ if __name__ == '__main__':
     
     # Show results
     detector.print_summary()
+    detector.close()
     
     print('\n✅ Reconnaissance detection test complete!')
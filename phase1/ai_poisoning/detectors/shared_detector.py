@@ -0,0 +1,367 @@
+﻿import math
+import multiprocessing
+import time
+import zlib
+from datetime import datetime
+from multiprocessing import shared_memory
+import numpy as np
+from recon_detector import RECENT_REQUESTS, TIMING_REQUESTS, AIReconDetector, BoundedLog, numeric_features
+
+RING_REQUESTS = 16  # Newest requests kept per source; threshold must stay below this
+MAX_FEATURES = 8  # Numeric features kept per request (the rest are ignored and counted)
+MAX_KEY_BYTES = 46  # Longest textual IPv6 address (with embedded IPv4)
+MAX_PROBE = 16  # Slots searched from a source's home slot before evicting
+
+EMPTY = 0
+USED = 1
+
+PATTERNS = ('high_frequency', 'endpoint_scanning', 'automated_timing', 'boundary_probing')
+STAT_COLUMNS = ('requests', 'requests_truncated', 'source_admissions', 'sources_evicted', 'sources_expired',
+                'detections') + PATTERNS
+
+def slot_dtype(ring_requests=RING_REQUESTS, max_features=MAX_FEATURES):
+    '''
+    One source's slot: its key and a ring of its newest requests
+    
+    Request types and feature names are stored as crc32 hashes.
+    '''
+    return np.dtype([
+        ('state', np.uint8),
+        ('key', f'S{MAX_KEY_BYTES}'),
+        ('last_seen', np.float64),
+        ('head', np.int32),  # Ring index the next request is written to
+        ('size', np.int32),  # Requests in the ring
+        ('timestamps', np.float64, (ring_requests,)),
+        ('types', np.uint32, (ring_requests,)),
+        ('feature_counts', np.uint8, (ring_requests,)),
+        ('feature_keys', np.uint32, (ring_requests, max_features)),
+        ('feature_values', np.float64, (ring_requests, max_features))
+    ], align=True)
+
+def name_hash(name):
+    return zlib.crc32(str(name).encode())
+
+def interval_std(timestamps):
+    '''Population std of the gaps between consecutive timestamps'''
+    intervals = np.diff(timestamps)
+    return float(np.sqrt(max(0.0, np.mean(intervals * intervals) - np.mean(intervals) ** 2)))
+
+def is_probing(values):
+    '''FeatureRange.is_probing over a list of values'''
+    if len(values) < 3:
+        return False
+    mean_val = math.fsum(values) / len(values)
+    return mean_val != 0 and (max(values) - min(values)) / abs(mean_val) > 5
+
+class SharedReconDetector:
+    '''
+    AIReconDetector whose per-source state lives in shared memory
+    
+    Every worker process attaches to the same multiprocessing.shared_memory
+    hash table, so a source spraying requests across workers is judged on
+    all of them. The table is split into `stripes` regions, each behind its
+    own multiprocessing.Lock; a source hashes (crc32) to a home slot in one
+    region and is found by linear probing within it. Workers read and write
+    the table directly, with no broker process in between.
+    
+    Slots are fixed-size: a source keeps its newest RING_REQUESTS requests
+    (timestamp, type hash, up to MAX_FEATURES numeric features), which is
+    everything the four checks look at while the window holds no more than
+    `threshold` requests; beyond that only high_frequency can fire and its
+    confidence is capped at RING_REQUESTS. A request with more numeric
+    features keeps its first MAX_FEATURES (in dict order); the rest are
+    never checked for boundary_probing, and such requests are counted in
+    requests_truncated. A slot idle for source_ttl is reused; if MAX_PROBE
+    slots from home are all live, the idlest is evicted.
+    
+    Counters are kept per region in shared memory and summed on read; the
+    detection log is per process.
+    
+    The creating process owns the segment: close() in every process, then
+    unlink() in the creator. Pickling the detector (e.g. as a pool
+    initializer argument) attaches the receiving process to the same table.
+    The stripe locks belong to mp_context (default: the default start
+    method), which must match the pool's.
+    '''
+    
+    def __init__(self, threshold=10, time_window=60, slots=16384, stripes=64, source_ttl=None, max_detections=1000,
+                 spill_path=None, name=None, locks=None, mp_context=None):
+        if threshold >= RING_REQUESTS:
+            raise ValueError(f'threshold must be below RING_REQUESTS ({RING_REQUESTS})')
+        if stripes < 1 or slots % stripes:
+            raise ValueError('slots must be a positive multiple of stripes')
+        
+        self.threshold = threshold
+        self.time_window = time_window
+        self.slots = slots
+        self.stripes = stripes
+        self.region_size = slots // stripes
+        self.source_ttl = time_window if source_ttl is None else source_ttl
+        self.max_detections = max_detections
+        self.spill_path = spill_path
+        self.suspicious_patterns = BoundedLog(max_detections, spill_path)
+        
+        self.dtype = slot_dtype()
+        table_bytes = slots * self.dtype.itemsize
+        stats_bytes = stripes * len(STAT_COLUMNS) * 8
+        
+        self.owner = name is None
+        if self.owner:
+            # New segments are zero-filled: every slot starts EMPTY
+            self.shm = shared_memory.SharedMemory(create=True, size=table_bytes + stats_bytes)
+            self.locks = [(mp_context or multiprocessing).Lock() for _ in range(stripes)]
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.locks = locks
+        
+        self.table = np.ndarray((slots,), dtype=self.dtype, buffer=self.shm.buf)
+        self.stats = np.ndarray((stripes, len(STAT_COLUMNS)), dtype=np.int64, buffer=self.shm.buf,
+                                offset=table_bytes)
+        self.columns = {column: i for i, column in enumerate(STAT_COLUMNS)}
+    
+    def __getstate__(self):
+        return {
+            'threshold': self.threshold,
+            'time_window': self.time_window,
+            'slots': self.slots,
+            'stripes': self.stripes,
+            'source_ttl': self.source_ttl,
+            'max_detections': self.max_detections,
+            'spill_path': self.spill_path,
+            'name': self.shm.name,
+            'locks': self.locks
+        }
+    
+    def __setstate__(self, state):
+        self.__init__(**state)
+    
+    def count(self, stripe, column, amount=1):
+        self.stats[stripe, self.columns[column]] += amount
+    
+    def find_slot(self, stripe, key, home, timestamp):
+        '''
+        Slot index for key, claiming one if it is new (caller holds the stripe lock)
+        
+        Returns:
+            (index, is_new)
+        '''
+        base = stripe * self.region_size
+        probe = min(MAX_PROBE, self.region_size)
+        indices = base + (home + np.arange(probe)) % self.region_size
+        states = self.table['state'][indices]
+        keys = self.table['key'][indices]
+        
+        # Slots are never emptied, so a key can't sit past the first empty slot
+        for index, state, slot_key in zip(indices.tolist(), states.tolist(), keys.tolist()):
+            if state == EMPTY:
+                return index, True
+            if slot_key == key:
+                return index, False
+        
+        last_seen = self.table['last_seen'][indices]
+        index = int(indices[np.argmin(last_seen)])
+        if timestamp - self.table['last_seen'][index] > self.source_ttl:
+            self.count(stripe, 'sources_expired')
+        else:
+            self.count(stripe, 'sources_evicted')
+        return index, True
+    
+    def log_request(self, source_ip, request_type, features, timestamp=None):
+        '''Log incoming request for analysis (same contract as AIReconDetector.log_request)'''
+        key = str(source_ip).encode()
+        if len(key) > MAX_KEY_BYTES:
+            raise ValueError(f'source_ip longer than {MAX_KEY_BYTES} bytes')
+        
+        key_hash = zlib.crc32(key)
+        stripe = key_hash % self.stripes
+        home = (key_hash // self.stripes) % self.region_size
+        numeric = numeric_features(features)
+        feature_pairs = [(name_hash(name), float(value)) for name, value in numeric[:MAX_FEATURES]]
+        
+        with self.locks[stripe]:
+            # Stamped under the lock so a source's timestamps never go backwards
+            if timestamp is None:
+                timestamp = time.time()
+            
+            index, is_new = self.find_slot(stripe, key, home, timestamp)
+            slot = self.table[index]
+            if not is_new and timestamp - slot['last_seen'] > self.source_ttl:
+                # Idle past source_ttl: starts over as a new source, as in AIReconDetector
+                self.count(stripe, 'sources_expired')
+                is_new = True
+            if is_new:
+                self.count(stripe, 'source_admissions')
+                slot['state'] = USED
+                slot['key'] = key
+                slot['head'] = 0
+                slot['size'] = 0
+            
+            head = int(slot['head'])
+            slot['timestamps'][head] = timestamp
+            slot['types'][head] = name_hash(request_type)
+            slot['feature_counts'][head] = len(feature_pairs)
+            for i, (name, value) in enumerate(feature_pairs):
+                slot['feature_keys'][head, i] = name
+                slot['feature_values'][head, i] = value
+            slot['head'] = (head + 1) % RING_REQUESTS
+            slot['size'] = min(int(slot['size']) + 1, RING_REQUESTS)
+            slot['last_seen'] = timestamp
+            self.count(stripe, 'requests')
+            if len(numeric) > MAX_FEATURES:
+                self.count(stripe, 'requests_truncated')
+            
+            detection = self.check_slot(slot, timestamp - self.time_window)
+            if detection:
+                self.count(stripe, 'detections')
+                self.count(stripe, detection[0])
+        
+        if detection:
+            self.record_detection(source_ip, *detection)
+            return True
+        return False
+    
+    def check_slot(self, slot, cutoff_time):
+        '''
+        AIReconDetector.detect_reconnaissance over a slot's requests after cutoff_time
+        
+        Returns:
+            (pattern, confidence, request_count) or None
+        '''
+        size = int(slot['size'])
+        order = (int(slot['head']) - size + np.arange(size)) % RING_REQUESTS
+        timestamps = slot['timestamps'][order]
+        # Timestamps only increase within a source, so the window is the tail
+        window = order[np.searchsorted(timestamps, cutoff_time, side='right'):]
+        count = len(window)
+        
+        if count < 5:
+            return None
+        
+        # Pattern 1: High frequency requests
+        if count > self.threshold:
+            return 'high_frequency', count, count
+        
+        # Pattern 2: Sequential feature probing
+        recent = window[-RECENT_REQUESTS:]
+        unique_types = len(set(slot['types'][recent].tolist()))
+        if unique_types >= 5:
+            return 'endpoint_scanning', unique_types, count
+        
+        # Pattern 3: Automated timing patterns
+        std_dev = interval_std(slot['timestamps'][window[:TIMING_REQUESTS]])
+        if std_dev < 0.1:
+            return 'automated_timing', std_dev, count
+        
+        # Pattern 4: Feature boundary probing
+        values = {}
+        for row in recent.tolist():
+            features = int(slot['feature_counts'][row])
+            for name, value in zip(slot['feature_keys'][row, :features].tolist(),
+                                   slot['feature_values'][row, :features].tolist()):
+                values.setdefault(name, []).append(value)
+        if any(is_probing(feature_values) for feature_values in values.values()):
+            return 'boundary_probing', count, count
+        
+        return None
+    
+    def record_detection(self, source_ip, pattern_type, confidence, request_count):
+        '''Record a reconnaissance detection in this process's log'''
+        
+        detection = {
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'source_ip': source_ip,
+            'pattern': pattern_type,
+            'confidence': confidence,
+            'request_count': request_count
+        }
+        
+        self.suspicious_patterns.append(detection)
+        
+        print(f'\n🚨 AI RECONNAISSANCE DETECTED!')
+        print(f'   Source: {source_ip}')
+        print(f'   Pattern: {pattern_type}')
+        print(f'   Confidence: {confidence}')
+        print(f'   Requests: {request_count} in last {self.time_window}s')
+    
+    @property
+    def detection_count(self):
+        return int(self.stats[:, self.columns['detections']].sum())
+    
+    def recent_detections(self, count):
+        return self.suspicious_patterns.recent(count)
+    
+    def get_statistics(self):
+        '''
+        Detection statistics across all processes
+        
+        total_requests counts every request logged (the table doesn't keep
+        whole windows); active_sources is the number of occupied slots;
+        requests_truncated counts requests with more than MAX_FEATURES
+        numeric features.
+        '''
+        totals = {column: int(total) for column, total in zip(STAT_COLUMNS, self.stats.sum(axis=0))}
+        admissions = totals['source_admissions']
+        
+        return {
+            'source_admissions': admissions,
+            'active_sources': int(np.count_nonzero(self.table['state'] == USED)),
+            'total_requests': totals['requests'],
+            'requests_truncated': totals['requests_truncated'],
+            'detections': totals['detections'],
+            'patterns': {pattern: totals[pattern] for pattern in PATTERNS if totals[pattern]},
+            'detection_rate': totals['detections'] / admissions if admissions > 0 else 0,
+            'sources_evicted': totals['sources_evicted'],
+            'sources_expired': totals['sources_expired'],
+            'detections_spilled': self.suspicious_patterns.spilled,
+            'detections_dropped': self.suspicious_patterns.dropped,
+            'slots': self.slots,
+            'table_bytes': self.shm.size
+        }
+    
+    print_summary = AIReconDetector.print_summary
+    
+    def close(self):
+        '''Detach this process from the table (views must go before the segment)'''
+        self.suspicious_patterns.close()
+        del self.table, self.stats
+        self.shm.close()
+    
+    def unlink(self):
+        '''Free the segment; only the creating process should call this, after close()'''
+        if self.owner:
+            self.shm.unlink()
+
+# Demo pool workers; module level so spawn/forkserver children can import them
+worker_detector = None
+
+def init_worker(shared):
+    global worker_detector
+    worker_detector = shared
+
+def spray(worker):
+    # Each worker sees a quarter of the scanner's requests: below threshold on its own
+    for i in range(6):
+        worker_detector.log_request('10.0.0.50', 'api_call', {'param': 42})
+        time.sleep(0.05 if i % 2 else 0.6)
+    return worker
+
+if __name__ == '__main__':
+    from concurrent.futures import ProcessPoolExecutor
+    
+    print('='*60)
+    print('SHARED-MEMORY RECONNAISSANCE DETECTOR TEST')
+    print('='*60)
+    
+    detector = SharedReconDetector(threshold=10, time_window=30, slots=1024, stripes=8)
+    print(f'\n[*] Shared table: {detector.slots} slots, {detector.shm.size / 2**20:.1f} MB ({detector.shm.name})')
+    
+    print('\n[TEST] Scanner spraying 24 requests across 4 worker processes...\n')
+    
+    with ProcessPoolExecutor(max_workers=4, initializer=init_worker, initargs=(detector,)) as pool:
+        list(pool.map(spray, range(4)))
+    
+    detector.print_summary()
+    detector.close()
+    detector.unlink()
+    
+    print('\n✅ Shared detection test complete!')
@@ -0,0 +1,241 @@
+﻿import contextlib
+import io
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from recon_detector import AIReconDetector
+from concurrent_detector import ConcurrentReconDetector, ThreadCounter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'attacks'))
+from counter_attack import ActiveCounterAttack
+
+THREADS = 16
+STRIPES = 4  # Fewer stripes than threads, so threads keep colliding on the locks
+SOURCES = 256
+REQUESTS_PER_SOURCE = 400
+
+def make_traffic(seed=42):
+    '''
+    Timestamped requests per source: a mix of normal users, fast scanners,
+    metronome bots and boundary probers
+    '''
+    rng = random.Random(seed)
+    traffic = {}
+    for source in range(SOURCES):
+        ip = f'10.{source // 256}.{source % 256}.7'
+        kind = source % 4
+        t = rng.uniform(0, 5)
+        requests = []
+        for i in range(REQUESTS_PER_SOURCE):
+            if kind == 0:
+                t += rng.uniform(0.5, 8.0)
+                requests.append((f'page_{rng.randrange(3)}', {'length': rng.randrange(5, 12)}, t))
+            elif kind == 1:
+                t += rng.choice([0.01, 0.2, 1.5])
+                requests.append((f'endpoint_{rng.randrange(8)}', {'param': i}, t))
+            elif kind == 2:
+                t += 0.5 + rng.uniform(-0.01, 0.01)
+                requests.append(('api_call', {'value': rng.uniform(10, 11)}, t))
+            else:
+                t += rng.uniform(0.3, 3.0)
+                requests.append(('api_call', {'age': rng.uniform(-200, 200), 'flag': True}, t))
+        traffic[ip] = requests
+    return traffic
+
+def run_serial(traffic):
+    '''Reference: every request through one AIReconDetector in global time order'''
+    detector = AIReconDetector(threshold=10, time_window=30, source_ttl=float('inf'), max_detections=10**6)
+    events = sorted((t, ip, request_type, features)
+                    for ip, requests in traffic.items() for request_type, features, t in requests)
+    decisions = {ip: [] for ip in traffic}
+    for t, ip, request_type, features in events:
+        decisions[ip].append(detector.log_request(ip, request_type, features, timestamp=t))
+    return detector, decisions
+
+def run_concurrent(traffic):
+    '''Sources dealt round-robin to THREADS threads, each replaying its sources interleaved in time order'''
+    detector = ConcurrentReconDetector(threshold=10, time_window=30, stripes=STRIPES, source_ttl=float('inf'),
+                                       max_detections=10**6)
+    decisions = {ip: [] for ip in traffic}
+    ips = sorted(traffic)
+    start = threading.Barrier(THREADS)
+    
+    def worker(index):
+        events = sorted((t, ip, request_type, features)
+                        for ip in ips[index::THREADS] for request_type, features, t in traffic[ip])
+        start.wait()
+        for t, ip, request_type, features in events:
+            decisions[ip].append(detector.log_request(ip, request_type, features, timestamp=t))
+    
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return detector, decisions
+
+def detection_multiset(detections):
+    return Counter((d['source_ip'], d['pattern'], repr(d['confidence']), d['request_count']) for d in detections)
+
+def count(counter, times):
+    for _ in range(times):
+        counter.add()
+
+def attack(defender, attackers, index):
+    for i in range(60):
+        for ip in attackers[index::THREADS]:
+            defender.monitor_request(ip, f'api_endpoint_{i % 4}', {'param': i * 10})
+
+def run_shared_sources(sources=32, requests_per_thread=40):
+    '''
+    Every thread sends requests_per_thread requests to every source, so
+    threads race on the same sources and per-source order is arbitrary
+    
+    With one request type, constant features and a window longer than the
+    run, the outcome doesn't depend on that order: a source's first 4
+    requests pass, the 5th-10th are flagged for bot timing (microsecond
+    gaps) and every later one as high frequency.
+    '''
+    detector = ConcurrentReconDetector(threshold=10, time_window=3600, stripes=STRIPES, max_detections=10**6)
+    ips = [f'10.2.0.{i}' for i in range(sources)]
+    flagged = ThreadCounter()
+    start = threading.Barrier(THREADS)
+    
+    def worker():
+        start.wait()
+        for _ in range(requests_per_thread):
+            for ip in ips:
+                if detector.log_request(ip, 'api_call', {'param': 7}):
+                    flagged.add()
+    
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return detector, flagged.value, sources, THREADS * requests_per_thread
+
+@lru_cache(maxsize=None)
+def serial_and_concurrent():
+    '''
+    Both replays of the same traffic, with (seconds, seconds) timings
+    
+    Threads switch as often as possible so lock hand-offs happen mid-request.
+    '''
+    traffic = make_traffic()
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            serial_start = time.perf_counter()
+            serial = run_serial(traffic)
+            serial_seconds = time.perf_counter() - serial_start
+            
+            concurrent_start = time.perf_counter()
+            concurrent = run_concurrent(traffic)
+            concurrent_seconds = time.perf_counter() - concurrent_start
+    finally:
+        sys.setswitchinterval(switch_interval)
+    return traffic, serial, concurrent, (serial_seconds, concurrent_seconds)
+
+def test_per_source_decisions_match_serial():
+    traffic, (_, serial_decisions), (_, concurrent_decisions), _ = serial_and_concurrent()
+    assert sum(map(sum, serial_decisions.values())) > 0
+    mismatched = [ip for ip in traffic if serial_decisions[ip] != concurrent_decisions[ip]]
+    assert not mismatched, f'{len(mismatched)}/{SOURCES} sources differ'
+
+def test_detection_log_and_statistics_match_serial():
+    _, (serial, _), (concurrent, _), _ = serial_and_concurrent()
+    assert detection_multiset(serial.suspicious_patterns) == detection_multiset(concurrent.suspicious_patterns)
+    
+    serial_stats = serial.get_statistics()
+    concurrent_stats = concurrent.get_statistics()
+    for key in ('source_admissions', 'active_sources', 'total_requests', 'detections', 'patterns'):
+        assert serial_stats[key] == concurrent_stats[key], key
+    assert concurrent.detection_count == serial.detection_count
+
+def test_threads_sharing_sources():
+    with contextlib.redirect_stdout(io.StringIO()):
+        shared, flagged, sources, per_source = run_shared_sources()
+    stats = shared.get_statistics()
+    
+    assert stats['total_requests'] == sources * per_source
+    assert stats['source_admissions'] == sources
+    assert stats['patterns'] == {'automated_timing': sources * 6, 'high_frequency': sources * (per_source - 10)}
+    assert flagged == shared.detection_count == sources * (per_source - 4)
+    assert len(shared.suspicious_patterns) == flagged
+
+def test_thread_counter_under_contention():
+    counter = ThreadCounter()
+    threads = [threading.Thread(target=count, args=(counter, 20000)) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    # Thread-per-connection servers: finished threads must not leave cells behind
+    for _ in range(2000):
+        thread = threading.Thread(target=count, args=(counter, 3))
+        thread.start()
+        thread.join()
+    del thread, threads
+    
+    assert counter.value == THREADS * 20000 + 2000 * 3
+    assert len(counter.cells) <= 1
+
+def test_counter_attack_bookkeeping():
+    defender = ActiveCounterAttack(max_log_entries=10**6, concurrent=True, stripes=STRIPES)
+    attackers = [f'10.1.0.{i}' for i in range(THREADS * 4)]
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        threads = [threading.Thread(target=attack, args=(defender, attackers, index)) for index in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    
+    stats = defender.get_statistics()
+    deployed = stats['counter_attacks_deployed']
+    assert deployed > 0
+    assert deployed == stats['reconnaissance_detected'] == stats['poison_responses_sent']
+    # Every request is an api_endpoint_* call, so every counter-attack is gradient noise
+    assert stats['techniques_used'] == {'gradient_noise': deployed}
+    assert sorted(entry['attack_id'] for entry in defender.attack_log) == list(range(deployed))
+    assert stats['total_requests'] == len(attackers) * 60
+
+if __name__ == '__main__':
+    print('='*60)
+    print('CONCURRENT DETECTOR STRESS TEST')
+    print('='*60)
+    
+    print(f'\n[*] {SOURCES} sources x {REQUESTS_PER_SOURCE} requests, {THREADS} threads on {STRIPES} stripes')
+    _, _, _, (serial_seconds, concurrent_seconds) = serial_and_concurrent()
+    total = SOURCES * REQUESTS_PER_SOURCE
+    print(f'    Serial:     {total / serial_seconds:,.0f} requests/s')
+    print(f'    Concurrent: {total / concurrent_seconds:,.0f} requests/s')
+    
+    print('\n[TEST 1] Per-source decision sequences match serial...')
+    test_per_source_decisions_match_serial()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 2] Detection log and merged statistics match serial...')
+    test_detection_log_and_statistics_match_serial()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 3] Threads sharing sources (order-independent totals)...')
+    test_threads_sharing_sources()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 4] Per-thread counters under contention...')
+    test_thread_counter_under_contention()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 5] Concurrent counter-attack bookkeeping...')
+    test_counter_attack_bookkeeping()
+    print('  ✅ PASS')
+    
+    print('\n✅ All concurrency tests passed!')
@@ -0,0 +1,179 @@
+﻿import contextlib
+import io
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from recon_detector import AIReconDetector
+from shared_detector import MAX_FEATURES, RING_REQUESTS, SharedReconDetector
+
+WORKERS = 4
+SOURCES = 256
+REQUESTS_PER_SOURCE = 200
+
+# Workers start from a fresh interpreter, so pool jobs must be importable module-level functions
+SPAWN = multiprocessing.get_context('spawn')
+
+worker_detector = None
+
+def init_worker(shared):
+    global worker_detector
+    worker_detector = shared
+
+def make_traffic(seed=42):
+    '''
+    Timestamped requests per source: a mix of normal users, fast scanners,
+    metronome bots and boundary probers
+    '''
+    rng = random.Random(seed)
+    traffic = {}
+    for source in range(SOURCES):
+        ip = f'10.{source // 256}.{source % 256}.9'
+        kind = source % 4
+        t = rng.uniform(0, 5)
+        requests = []
+        for i in range(REQUESTS_PER_SOURCE):
+            if kind == 0:
+                t += rng.uniform(0.5, 8.0)
+                requests.append((f'page_{rng.randrange(3)}', {'length': rng.randrange(5, 12)}, t))
+            elif kind == 1:
+                t += rng.choice([0.01, 0.2, 1.5])
+                requests.append((f'endpoint_{rng.randrange(8)}', {'param': i}, t))
+            elif kind == 2:
+                t += 0.5 + rng.uniform(-0.01, 0.01)
+                requests.append(('api_call', {'value': rng.uniform(10, 11)}, t))
+            else:
+                t += rng.uniform(0.3, 3.0)
+                requests.append(('api_call', {'age': rng.uniform(-200, 200), 'flag': True}, t))
+        traffic[ip] = requests
+    return traffic
+
+def time_ordered(traffic, ips):
+    return sorted((t, ip, request_type, features) for ip in ips for request_type, features, t in traffic[ip])
+
+def replay(events):
+    '''Worker job: events through the shared detector, decisions per source'''
+    decisions = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for t, ip, request_type, features in events:
+            decisions.setdefault(ip, []).append(worker_detector.log_request(ip, request_type, features, timestamp=t))
+    return decisions
+
+def spray(worker, requests):
+    '''Worker job: this worker's share of one scanner's requests, seen locally and through the shared table'''
+    isolated = AIReconDetector(threshold=10, time_window=30)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(requests):
+            timestamp = time.time()
+            isolated.log_request('10.66.6.6', 'api_call', {'param': 42}, timestamp)
+            worker_detector.log_request('10.66.6.6', 'api_call', {'param': 42})
+            # Irregular gaps, so no single worker sees bot-like timing
+            time.sleep(0.04 if (i + worker) % 2 else 0.3)
+    return isolated.detection_count
+
+def detection_keys(detections):
+    # The table keeps RING_REQUESTS requests, which caps high_frequency confidence
+    return sorted((d['source_ip'], d['pattern'], d['request_count'] if d['pattern'] != 'high_frequency'
+                   else min(d['request_count'], RING_REQUESTS)) for d in detections)
+
+@lru_cache(maxsize=None)
+def serial_reference():
+    '''Every request through one in-process AIReconDetector: (traffic, detector, decisions per source)'''
+    traffic = make_traffic()
+    with contextlib.redirect_stdout(io.StringIO()):
+        serial = AIReconDetector(threshold=10, time_window=30, source_ttl=float('inf'), max_detections=10**6)
+        serial_decisions = {ip: [] for ip in traffic}
+        for t, ip, request_type, features in time_ordered(traffic, traffic):
+            serial_decisions[ip].append(serial.log_request(ip, request_type, features, timestamp=t))
+    return traffic, serial, serial_decisions
+
+@contextlib.contextmanager
+def shared_detector(**kwargs):
+    shared = SharedReconDetector(threshold=10, time_window=30, slots=1024, mp_context=SPAWN, **kwargs)
+    try:
+        yield shared
+    finally:
+        shared.close()
+        shared.unlink()
+
+def test_single_process_matches_recon_detector():
+    traffic, serial, serial_decisions = serial_reference()
+    with shared_detector(stripes=4, source_ttl=float('inf'), max_detections=10**6) as shared:
+        shared_decisions = {ip: [] for ip in traffic}
+        with contextlib.redirect_stdout(io.StringIO()):
+            for t, ip, request_type, features in time_ordered(traffic, traffic):
+                shared_decisions[ip].append(shared.log_request(ip, request_type, features, timestamp=t))
+        
+        assert serial.detection_count > 0
+        assert shared_decisions == serial_decisions
+        assert detection_keys(shared.suspicious_patterns) == detection_keys(serial.suspicious_patterns)
+        assert shared.get_statistics()['patterns'] == serial.get_statistics()['patterns']
+
+def test_worker_processes_match_recon_detector():
+    traffic, serial, serial_decisions = serial_reference()
+    ips = sorted(traffic)
+    with shared_detector(stripes=2, source_ttl=float('inf')) as shared:
+        with ProcessPoolExecutor(max_workers=WORKERS, mp_context=SPAWN, initializer=init_worker,
+                                 initargs=(shared,)) as pool:
+            # Each source is owned by one worker, so its requests stay in order
+            futures = [pool.submit(replay, time_ordered(traffic, ips[worker::WORKERS])) for worker in range(WORKERS)]
+            process_decisions = {}
+            for future in futures:
+                process_decisions.update(future.result())
+        stats = shared.get_statistics()
+    
+    serial_stats = serial.get_statistics()
+    mismatched = [ip for ip in traffic if process_decisions.get(ip) != serial_decisions[ip]]
+    assert not mismatched, f'{len(mismatched)}/{SOURCES} sources differ'
+    assert stats['patterns'] == serial_stats['patterns']
+    assert stats['source_admissions'] == serial_stats['source_admissions']
+    assert stats['total_requests'] == SOURCES * REQUESTS_PER_SOURCE
+
+def test_scanner_spraying_across_processes():
+    with shared_detector(stripes=8) as shared:
+        with ProcessPoolExecutor(max_workers=WORKERS, mp_context=SPAWN, initializer=init_worker,
+                                 initargs=(shared,)) as pool:
+            isolated = list(pool.map(spray, range(WORKERS), [6] * WORKERS))
+        stats = shared.get_statistics()
+    
+    # No worker sees enough on its own; the shared table sees all of it
+    assert stats['total_requests'] == WORKERS * 6
+    assert sum(isolated) == 0
+    assert stats['detections'] > 0
+
+def test_truncated_features_are_counted():
+    wide = {f'feature_{i}': i for i in range(MAX_FEATURES + 3)}
+    narrow = {f'feature_{i}': i for i in range(MAX_FEATURES)}
+    with shared_detector(stripes=1) as shared:
+        shared.log_request('10.3.0.1', 'api_call', wide, timestamp=1.0)
+        shared.log_request('10.3.0.1', 'api_call', narrow, timestamp=2.0)
+        shared.log_request('10.3.0.2', 'api_call', {**wide, 'label': 'text'}, timestamp=3.0)
+        stats = shared.get_statistics()
+    
+    assert stats['total_requests'] == 3
+    assert stats['requests_truncated'] == 2
+
+if __name__ == '__main__':
+    print('='*60)
+    print('SHARED DETECTOR MULTI-PROCESS TEST')
+    print('='*60)
+    print(f'\n[*] {SOURCES} sources x {REQUESTS_PER_SOURCE} requests, {WORKERS} worker processes')
+    
+    print('\n[TEST 1] Single process: shared table vs AIReconDetector...')
+    test_single_process_matches_recon_detector()
+    print('  ✅ PASS')
+    
+    print(f'\n[TEST 2] {WORKERS} spawned processes on 2 stripes vs AIReconDetector...')
+    test_worker_processes_match_recon_detector()
+    print('  ✅ PASS')
+    
+    print(f'\n[TEST 3] Scanner spraying across {WORKERS} processes...')
+    test_scanner_spraying_across_processes()
+    print('  ✅ PASS')
+    
+    print(f'\n[TEST 4] Requests with more than {MAX_FEATURES} numeric features are counted...')
+    test_truncated_features_are_counted()
+    print('  ✅ PASS')
+    
+    print('\n✅ All shared-state tests passed!')
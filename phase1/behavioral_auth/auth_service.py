@@ -0,0 +1,265 @@
+﻿import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+import numpy as np
+
+class AuthRequest:
+    '''One queued sample and the future its result is delivered through'''
+    
+    __slots__ = ('sample', 'future', 'enqueued_at')
+    
+    def __init__(self, sample):
+        self.sample = sample
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+class MicroBatchAuthService:
+    '''
+    Micro-batching front end for BehavioralAuthModel
+    
+    Concurrent callers submit single samples; a worker thread collects them
+    into batches of up to max_batch_size (waiting at most max_wait_ms after
+    the first sample of a batch) and scores each batch with one forward pass
+    through score_batch. Results come back as (is_authentic, deviation)
+    through futures.
+    
+    A future cancelled before its batch is taken is dropped unscored.
+    stop() serves everything submitted before it; later submits raise.
+    '''
+    
+    def __init__(self, auth_model, max_batch_size=64, max_wait_ms=2.0, threshold_multiplier=0.03,
+                 latency_samples=10000):
+        if max_batch_size < 1:
+            raise ValueError('max_batch_size must be at least 1')
+        
+        self.auth_model = auth_model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.threshold_multiplier = threshold_multiplier
+        self.sample_shape = (auth_model.timesteps, auth_model.features)
+        
+        self.requests = queue.Queue()
+        self.worker = None
+        self.running = False
+        # Orders submit() against stop(), so nothing is queued behind the stop marker
+        self.submit_lock = threading.Lock()
+        
+        self.stats_lock = threading.Lock()
+        self.latencies = deque(maxlen=latency_samples)
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.batches = 0
+        self.started_at = None
+    
+    def start(self):
+        if self.running:
+            return self
+        
+        self.running = True
+        self.started_at = time.perf_counter()
+        self.worker = threading.Thread(target=self.run, name='auth-batcher', daemon=True)
+        self.worker.start()
+        return self
+    
+    def stop(self):
+        '''Finish queued requests, then stop the worker'''
+        with self.submit_lock:
+            if not self.running:
+                return
+            self.running = False
+            self.requests.put(None)
+        self.worker.join()
+        self.worker = None
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def submit(self, sample):
+        '''
+        Queue one sample for authentication
+        
+        Args:
+            sample: (timesteps, features) or (1, timesteps, features) array
+        
+        Returns:
+            Future resolving to (is_authentic, deviation)
+        '''
+        sample = np.asarray(sample, dtype=np.float32).reshape(self.sample_shape)
+        request = AuthRequest(sample)
+        with self.submit_lock:
+            if not self.running:
+                raise ValueError('Service not running')
+            self.requests.put(request)
+        return request.future
+    
+    def authenticate(self, sample, timeout=None):
+        '''Blocking single-sample call, same result as BehavioralAuthModel.authenticate'''
+        return self.submit(sample).result(timeout)
+    
+    def claim(self, request):
+        '''Mark a dequeued request running; False (and counted) if its caller cancelled it'''
+        if request.future.set_running_or_notify_cancel():
+            return True
+        with self.stats_lock:
+            self.cancelled += 1
+        return False
+    
+    def collect_batch(self, first):
+        '''Gather requests after first until the batch is full or max_wait has passed'''
+        batch = [first] if self.claim(first) else []
+        deadline = time.perf_counter() + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            
+            if request is None:
+                # Re-queue the stop marker so the loop exits after this batch
+                self.requests.put(None)
+                break
+            if self.claim(request):
+                batch.append(request)
+        
+        return batch
+    
+    @staticmethod
+    def resolve(future, result=None, exception=None):
+        '''Deliver a result; never raises, so one bad future can't kill the worker'''
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass
+    
+    def process_batch(self, batch):
+        if not batch:
+            return
+        
+        # Pad to a power of two so the model only ever sees a few batch shapes
+        # (each new shape costs a graph retrace)
+        padded_size = min(1 << (len(batch) - 1).bit_length(), max(self.max_batch_size, len(batch)))
+        samples = np.zeros((padded_size,) + self.sample_shape, dtype=np.float32)
+        samples[:len(batch)] = [request.sample for request in batch]
+        
+        try:
+            is_authentic, deviations = self.auth_model.score_batch(samples, self.threshold_multiplier)
+        except Exception as e:
+            for request in batch:
+                self.resolve(request.future, exception=e)
+            with self.stats_lock:
+                self.failed += len(batch)
+                self.batches += 1
+            return
+        
+        finished = time.perf_counter()
+        for request, authentic, deviation in zip(batch, is_authentic, deviations):
+            self.resolve(request.future, (bool(authentic), float(deviation)))
+        
+        with self.stats_lock:
+            self.latencies.extend(finished - request.enqueued_at for request in batch)
+            self.completed += len(batch)
+            self.batches += 1
+    
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            self.process_batch(self.collect_batch(request))
+    
+    def get_statistics(self):
+        with self.stats_lock:
+            latencies = np.array(self.latencies)
+            completed = self.completed
+            batches = self.batches
+            failed = self.failed
+            cancelled = self.cancelled
+        
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        
+        return {
+            'completed': completed,
+            'failed': failed,
+            'cancelled': cancelled,
+            'batches': batches,
+            'avg_batch_size': completed / batches if batches else 0.0,
+            'p50_latency_ms': float(np.percentile(latencies, 50) * 1000) if len(latencies) else 0.0,
+            'p99_latency_ms': float(np.percentile(latencies, 99) * 1000) if len(latencies) else 0.0,
+            'throughput_per_sec': completed / elapsed if elapsed > 0 else 0.0,
+            'queued': self.requests.qsize()
+        }
+    
+    def print_summary(self):
+        stats = self.get_statistics()
+        
+        print('\n' + '='*60)
+        print('AUTH SERVICE SUMMARY')
+        print('='*60)
+        print(f'Requests:        {stats["completed"]} ({stats["failed"]} failed, {stats["cancelled"]} cancelled)')
+        print(f'Batches:         {stats["batches"]} (avg size {stats["avg_batch_size"]:.1f})')
+        print(f'Latency p50:     {stats["p50_latency_ms"]:.2f} ms')
+        print(f'Latency p99:     {stats["p99_latency_ms"]:.2f} ms')
+        print(f'Throughput:      {stats["throughput_per_sec"]:.0f} req/s')
+        print('='*60)
+
+if __name__ == '__main__':
+    from model_trainer import BehavioralAuthModel
+    
+    print('='*60)
+    print('MICRO-BATCHING AUTH SERVICE')
+    print('='*60)
+    
+    try:
+        auth_model = BehavioralAuthModel.load('../models/behavioral_auth')
+    except (OSError, ValueError) as e:
+        print(f'[!] Could not load model: {e}')
+        print('[!] Run model_trainer.py first')
+        exit(1)
+    
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 1, (512, 10, 9)).astype(np.float32)
+    
+    print('\n[*] Sequential authenticate() baseline...')
+    start = time.perf_counter()
+    for sample in samples[:50]:
+        auth_model.authenticate(sample[None])
+    sequential_rate = 50 / (time.perf_counter() - start)
+    print(f'    {sequential_rate:.0f} req/s')
+    
+    print('\n[*] 32 concurrent sessions through the service...')
+    with MicroBatchAuthService(auth_model, max_batch_size=64, max_wait_ms=2.0) as service:
+        # Warm up every padded batch shape before timing
+        size = 1
+        while size <= service.max_batch_size:
+            auth_model.score_batch(samples[:size])
+            size *= 2
+        
+        def session(worker_id):
+            for sample in samples[worker_id::32]:
+                service.authenticate(sample)
+        
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(32)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        batched_rate = len(samples) / (time.perf_counter() - start)
+        
+        expected = auth_model.authenticate(samples[1][None])
+        served = service.authenticate(samples[1])
+        print(f'    {batched_rate:.0f} req/s ({batched_rate / sequential_rate:.1f}x)')
+        print(f'    Matches authenticate(): {bool(expected[0]) == served[0] and abs(expected[1] - served[1]) < 1e-4}')
+        
+        service.print_summary()
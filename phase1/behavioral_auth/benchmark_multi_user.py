@@ -0,0 +1,141 @@
+﻿import argparse
+import contextlib
+import io
+import json
+import time
+from pathlib import Path
+import numpy as np
+from model_trainer import BehavioralAuthModel
+from multi_user_model import MultiUserAuthModel
+
+def synthetic_user_data(num_users, samples_per_user, timesteps=10, features=9, seed=42):
+    '''Sequences per user: a user-specific offset and rhythm plus noise'''
+    rng = np.random.default_rng(seed)
+    data = {}
+    for user in range(num_users):
+        offset = rng.normal(0, 1, features)
+        rhythm = np.sin(np.linspace(0, 2 * np.pi, timesteps) * rng.uniform(0.5, 2.0))[:, None]
+        noise = rng.normal(0, 0.1, (samples_per_user, timesteps, features))
+        data[f'user{user:04d}'] = (offset + rhythm * 0.5 + noise).astype(np.float32)
+    return data
+
+def weight_bytes(keras_model):
+    return int(sum(weights.nbytes for weights in keras_model.get_weights()))
+
+def timed_rate(fn, samples, repeats):
+    '''Best-of samples/sec for fn() scoring `samples` samples'''
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return samples / best, best
+
+def run_benchmark(args):
+    data = synthetic_user_data(args.users, args.samples_per_user, seed=args.seed)
+    user_ids = list(data)
+    
+    print(f'[*] Training shared model ({args.users} users, {args.epochs} epochs)...')
+    shared = MultiUserAuthModel(user_ids)
+    with contextlib.redirect_stdout(io.StringIO()):
+        shared.build_model()
+        shared.train(data, epochs=args.epochs, batch_size=32)
+    
+    # Per-user models: inference cost doesn't depend on training, so they
+    # are built untrained with a placeholder baseline
+    print(f'[*] Building {args.users} per-user models...')
+    per_user = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for user_id in user_ids:
+            auth_model = BehavioralAuthModel()
+            auth_model.build_model()
+            auth_model.baseline = {'mean_error': 1.0, 'std_error': 0.0, 'threshold': 1.0}
+            per_user[user_id] = auth_model
+    
+    batch = {user_id: data[user_id][:args.batch_per_user] for user_id in user_ids}
+    all_samples = np.concatenate([batch[user_id] for user_id in user_ids])
+    all_users = [user_id for user_id in user_ids for _ in range(args.batch_per_user)]
+    total = len(all_samples)
+    
+    def score_per_user():
+        for user_id in user_ids:
+            per_user[user_id].score_batch(batch[user_id])
+    
+    def score_shared():
+        shared.score_batch(all_samples, all_users)
+    
+    # Warm up (graph tracing) before timing
+    score_per_user()
+    score_shared()
+    
+    print('[*] Timing...')
+    per_user_rate, per_user_seconds = timed_rate(score_per_user, total, args.repeats)
+    shared_rate, shared_seconds = timed_rate(score_shared, total, args.repeats)
+    
+    # Does the embedding carry identity? Genuine claims should reconstruct
+    # better than the same sample claimed as another user
+    _, genuine = shared.score_batch(all_samples, all_users)
+    impostor_users = [user_ids[(user_ids.index(user_id) + 1) % len(user_ids)] for user_id in all_users]
+    genuine_errors = shared.reconstruction_errors(all_samples, shared.user_indices(all_users))
+    impostor_errors = shared.reconstruction_errors(all_samples, shared.user_indices(impostor_users))
+    
+    return {
+        'users': args.users,
+        'samples_scored': total,
+        'per_user': {
+            'parameters': int(sum(m.model.count_params() for m in per_user.values())),
+            'weight_bytes': int(sum(weight_bytes(m.model) for m in per_user.values())),
+            'forward_passes': len(user_ids),
+            'seconds': per_user_seconds,
+            'samples_per_sec': per_user_rate
+        },
+        'shared': {
+            'parameters': int(shared.model.count_params()),
+            'weight_bytes': weight_bytes(shared.model),
+            'forward_passes': 1,
+            'seconds': shared_seconds,
+            'samples_per_sec': shared_rate,
+            'genuine_mean_deviation': float(np.mean(genuine)),
+            'identity_separation': float(np.mean(genuine_errors < impostor_errors))
+        },
+        'speedup': shared_rate / per_user_rate,
+        'memory_ratio': sum(weight_bytes(m.model) for m in per_user.values()) / weight_bytes(shared.model)
+    }
+
+def print_results(results):
+    per_user = results['per_user']
+    shared = results['shared']
+    
+    print('\n' + '='*60)
+    print('MULTI-USER MODEL BENCHMARK')
+    print('='*60)
+    print(f'Users: {results["users"]}   Samples per check: {results["samples_scored"]}\n')
+    print(f'{"":18s}{"per-user":>16s}{"shared":>16s}')
+    print(f'{"Parameters":18s}{per_user["parameters"]:>16,}{shared["parameters"]:>16,}')
+    print(f'{"Weights (MB)":18s}{per_user["weight_bytes"] / 2**20:>16.2f}{shared["weight_bytes"] / 2**20:>16.2f}')
+    print(f'{"Forward passes":18s}{per_user["forward_passes"]:>16}{shared["forward_passes"]:>16}')
+    print(f'{"Check time (ms)":18s}{per_user["seconds"] * 1000:>16.1f}{shared["seconds"] * 1000:>16.1f}')
+    print(f'{"Samples/sec":18s}{per_user["samples_per_sec"]:>16.0f}{shared["samples_per_sec"]:>16.0f}')
+    print(f'\nSpeedup: {results["speedup"]:.1f}x   Memory: {results["memory_ratio"]:.1f}x smaller')
+    print(f'Identity separation (genuine < impostor error): {shared["identity_separation"]*100:.1f}%')
+    print('='*60)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Shared-weights vs per-user auth model benchmark')
+    parser.add_argument('--users', type=int, default=32)
+    parser.add_argument('--samples-per-user', type=int, default=40)
+    parser.add_argument('--batch-per-user', type=int, default=4, help='Samples per user in each check')
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='../logs/multi_user_benchmark.json')
+    args = parser.parse_args()
+    
+    results = run_benchmark(args)
+    print_results(results)
+    
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'\n[✓] Results saved to {output}')
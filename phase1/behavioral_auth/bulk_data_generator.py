@@ -0,0 +1,291 @@
+﻿import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import numpy as np
+from dataset_builder import capture_name
+from event_cache import MOUSE_TYPE_CODES, cache_path_for, source_signature
+
+SCREEN_WIDTH = 1920
+SCREEN_HEIGHT = 1080
+KEYS = np.array(list('abcdefghijklmnopqrstuvwxyz '))
+
+# Per-user profile parameters, drawn uniformly from these ranges. Defaults
+# bracket data_generator.py's single user (10 Hz tremor, 8 px steps, 16 ms
+# mouse interval, 200 ms flight time, 10% cognitive pauses). tremor_ratio is
+# the tremor's per-step amplitude as a fraction of step_sigma: a fixed
+# sub-pixel tremor (data_generator.py's 0.3 px) is lost in the random steps
+# and integer pixels, and the extracted peak no longer tracks tremor_hz
+PROFILE_RANGES = {
+    'tremor_hz': (8.0, 12.0),
+    'tremor_ratio': (0.4, 0.8),
+    'step_sigma': (5.0, 12.0),
+    'mouse_interval': (0.012, 0.020),
+    'interval_jitter': (0.002, 0.004),
+    'click_rate': (0.02, 0.08),
+    'flight_time': (0.12, 0.30),
+    'flight_jitter': (0.04, 0.10),
+    'pause_rate': (0.05, 0.15)
+}
+
+def make_profiles(num_users, seed=42):
+    '''
+    Distinct behavioral profiles for num_users users
+    
+    Returns:
+        {user_id: {parameter: value}}
+    '''
+    rng = np.random.default_rng(seed)
+    columns = {name: rng.uniform(low, high, num_users) for name, (low, high) in PROFILE_RANGES.items()}
+    return {
+        f'user{i:05d}': {name: float(values[i]) for name, values in columns.items()}
+        for i in range(num_users)
+    }
+
+def reflect(values, limit):
+    '''Fold an unbounded walk back into [0, limit] (bounces off the screen edges)'''
+    return limit - np.abs(limit - np.mod(values, 2 * limit))
+
+def generate_mouse_columns(profile, num_moves, start_time, rng):
+    '''
+    Mouse events for one session in event_cache's columnar layout
+    
+    Moves are sampled at once; clicks (click_rate per move) are inserted
+    right after the move they share a timestamp and position with.
+    '''
+    intervals = np.clip(rng.normal(profile['mouse_interval'], profile['interval_jitter'], num_moves), 0.010, 0.025)
+    timestamps = start_time + np.cumsum(intervals)
+    
+    phase = 2 * np.pi * profile['tremor_hz'] * (timestamps - start_time)
+    tremor = profile['tremor_ratio'] * profile['step_sigma']
+    dx = rng.normal(0, profile['step_sigma'], num_moves) + tremor * np.sin(phase)
+    dy = rng.normal(0, profile['step_sigma'], num_moves) + tremor * np.cos(phase)
+    x = np.floor(reflect(SCREEN_WIDTH / 2 + np.cumsum(dx), SCREEN_WIDTH))
+    y = np.floor(reflect(SCREEN_HEIGHT / 2 + np.cumsum(dy), SCREEN_HEIGHT))
+    
+    clicks = rng.random(num_moves) < profile['click_rate']
+    rows = np.repeat(np.arange(num_moves), 1 + clicks)
+    type_code = np.full(len(rows), MOUSE_TYPE_CODES['move'], dtype=np.int8)
+    click_rows = np.cumsum(1 + clicks)[clicks] - 1
+    type_code[click_rows] = MOUSE_TYPE_CODES['click']
+    
+    interval = intervals[rows]
+    interval[click_rows] = np.nan
+    
+    return {
+        'timestamp': timestamps[rows],
+        'x': x[rows].astype(np.float32),
+        'y': y[rows].astype(np.float32),
+        'interval': interval,
+        'type_code': type_code
+    }
+
+def generate_key_columns(profile, num_keys, start_time, rng):
+    '''Keystrokes for one session: typing rhythm around flight_time plus cognitive pauses'''
+    typing = np.clip(rng.normal(profile['flight_time'], profile['flight_jitter'], num_keys), 0.05, 0.6)
+    pauses = rng.uniform(0.8, 3.0, num_keys)
+    flight_times = np.where(rng.random(num_keys) < profile['pause_rate'], pauses, typing)
+    
+    return {
+        'timestamp': start_time + np.cumsum(flight_times),
+        'flight_time': flight_times,
+        'key': rng.choice(KEYS, num_keys)
+    }
+
+def mouse_lines(columns):
+    '''JSONL records as data_generator.generate_mouse_data writes them, without per-event json.dumps'''
+    timestamps = columns['timestamp'].tolist()
+    xs = columns['x'].astype(np.int64).tolist()
+    ys = columns['y'].astype(np.int64).tolist()
+    intervals = columns['interval'].tolist()
+    is_click = (columns['type_code'] == MOUSE_TYPE_CODES['click']).tolist()
+    
+    return (
+        f'{{"timestamp": {t!r}, "x": {x}, "y": {y}, "button": "Button.left", "pressed": true, "type": "click"}}\n'
+        if click else
+        f'{{"timestamp": {t!r}, "x": {x}, "y": {y}, "interval": {i!r}, "type": "move"}}\n'
+        for t, x, y, i, click in zip(timestamps, xs, ys, intervals, is_click)
+    )
+
+def key_lines(columns):
+    return (
+        f'{{"timestamp": {t!r}, "key": "{k}", "flight_time": {ft!r}, "type": "press"}}\n'
+        for t, k, ft in zip(columns['timestamp'].tolist(), columns['key'].tolist(), columns['flight_time'].tolist())
+    )
+
+def write_mouse_jsonl(path, columns):
+    with open(path, 'w') as f:
+        f.writelines(mouse_lines(columns))
+
+def write_key_jsonl(path, columns):
+    with open(path, 'w') as f:
+        f.writelines(key_lines(columns))
+
+def write_columns(path, columns, source=None):
+    '''
+    Write columns as .npz, atomically
+    
+    With source (the matching JSONL) the file is an event_cache entry, so
+    load_mouse_columns / load_key_columns skip parsing the JSONL.
+    '''
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'{path.stem}.{os.getpid()}.tmp.npz')
+    if source is not None:
+        np.savez(tmp_path, _source=source_signature(source), **columns)
+    else:
+        np.savez(tmp_path, **columns)
+    os.replace(tmp_path, path)
+
+def generate_user(user_id, profile, output_dir, sessions, mouse_events, key_events, output_format, seed,
+                  start_time):
+    '''
+    Worker job: every session of one user
+    
+    Sessions are written as mouse_<user>@<session>.jsonl / keys_<user>@<session>.jsonl
+    (dataset_builder.capture_name), or as .npz columns for 'columnar'.
+    
+    Returns:
+        (user_id, events, bytes written)
+    '''
+    rng = np.random.default_rng(seed)
+    output_dir = Path(output_dir)
+    events = 0
+    written = []
+    
+    for session in range(sessions):
+        # Sessions an hour apart, mouse and keyboard captured together
+        session_start = start_time + session * 3600.0
+        mouse = generate_mouse_columns(profile, mouse_events, session_start, rng)
+        keys = generate_key_columns(profile, key_events, session_start, rng)
+        events += len(mouse['timestamp']) + len(keys['timestamp'])
+        
+        mouse_path = output_dir / capture_name('mouse_', user_id, f's{session:02d}')
+        key_path = output_dir / capture_name('keys_', user_id, f's{session:02d}')
+        
+        if output_format == 'columnar':
+            written.append(output_dir / f'{mouse_path.stem}.npz')
+            written.append(output_dir / f'{key_path.stem}.npz')
+            write_columns(written[-2], mouse)
+            write_columns(written[-1], keys)
+        else:
+            write_mouse_jsonl(mouse_path, mouse)
+            write_key_jsonl(key_path, keys)
+            written += [mouse_path, key_path]
+            
+            if output_format == 'jsonl+cache':
+                write_columns(cache_path_for(mouse_path), mouse, source=mouse_path)
+                write_columns(cache_path_for(key_path), keys, source=key_path)
+    
+    return user_id, events, sum(path.stat().st_size for path in written)
+
+class BulkDataGenerator:
+    '''
+    Vectorized synthetic corpus generator for load testing
+    
+    Each user gets a profile (tremor frequency and strength, mouse step size
+    and polling rate, click rate, typing rhythm, pause rate) and their
+    sessions are sampled as whole NumPy arrays rather than event by event.
+    Users are generated in parallel, each from its own seed, so the corpus
+    is reproducible regardless of worker count.
+    
+    Output formats:
+        jsonl        mouse_/keys_<user>@<session>.jsonl, one file per session
+        jsonl+cache  the same, plus event_cache's .columnar/*.npz entries
+        columnar     .npz columns only (event_cache column names). Not
+                     dataset_builder input, which reads the JSONL captures
+    '''
+    
+    FORMATS = ('jsonl', 'jsonl+cache', 'columnar')
+    
+    def __init__(self, output_dir='../data/bulk', num_users=1000, sessions=2, mouse_events=5000,
+                 key_events=2000, output_format='jsonl', seed=42, max_workers=None):
+        if output_format not in self.FORMATS:
+            raise ValueError(f'output_format must be one of {self.FORMATS}')
+        
+        self.output_dir = Path(output_dir)
+        self.num_users = num_users
+        self.sessions = sessions
+        self.mouse_events = mouse_events
+        self.key_events = key_events
+        self.output_format = output_format
+        self.seed = seed
+        self.max_workers = max_workers or os.cpu_count()
+    
+    def generate(self):
+        '''
+        Write the corpus and profiles.json
+        
+        Returns:
+            Summary dict with users, events, bytes and timing
+        '''
+        start_time = time.time()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        
+        profiles = make_profiles(self.num_users, self.seed)
+        with open(self.output_dir / 'profiles.json', 'w') as f:
+            json.dump(profiles, f, indent=2)
+        
+        seeds = np.random.SeedSequence(self.seed).spawn(self.num_users)
+        events = 0
+        written = 0
+        failed = {}
+        
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, self.num_users)) as pool:
+            futures = {
+                pool.submit(generate_user, user_id, profile, str(self.output_dir), self.sessions,
+                            self.mouse_events, self.key_events, self.output_format, user_seed, start_time): user_id
+                for (user_id, profile), user_seed in zip(profiles.items(), seeds)
+            }
+            
+            report_every = max(1, self.num_users // 10)
+            for done, future in enumerate(as_completed(futures), 1):
+                user_id = futures[future]
+                try:
+                    _, user_events, user_bytes = future.result()
+                    events += user_events
+                    written += user_bytes
+                except Exception as e:
+                    failed[user_id] = str(e)
+                    print(f'[!] {user_id}: {e}')
+                
+                if done % report_every == 0 or done == self.num_users:
+                    elapsed = time.time() - start_time
+                    print(f'[*] {done}/{self.num_users} users | {events / elapsed:,.0f} events/s | '
+                          f'{written / elapsed / 2**20:.1f} MB/s')
+        
+        return {
+            'users': self.num_users - len(failed),
+            'failed': failed,
+            'events': events,
+            'bytes': written,
+            'seconds': time.time() - start_time
+        }
+
+if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Vectorized multi-user synthetic behavioral data')
+    parser.add_argument('--output', default='../data/bulk')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--sessions', type=int, default=2)
+    parser.add_argument('--mouse-events', type=int, default=5000, help='Mouse moves per session')
+    parser.add_argument('--key-events', type=int, default=2000, help='Keystrokes per session')
+    parser.add_argument('--format', choices=BulkDataGenerator.FORMATS, default='jsonl',
+                        help="'columnar' writes .npz only, which dataset_builder.py does not read")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    
+    print('='*60)
+    print('BULK SYNTHETIC DATA GENERATOR')
+    print('='*60 + '\n')
+    
+    generator = BulkDataGenerator(args.output, args.users, args.sessions, args.mouse_events, args.key_events,
+                                  args.format, args.seed, args.workers)
+    summary = generator.generate()
+    
+    print(f'\n[✓] {summary["users"]} users, {summary["events"]:,} events, {summary["bytes"] / 2**20:,.1f} MB '
+          f'in {summary["seconds"]:.1f}s ({summary["events"] / summary["seconds"]:,.0f} events/s)')
+    print(f'    Output:   {generator.output_dir}')
+    print(f'    Profiles: {generator.output_dir / "profiles.json"}')
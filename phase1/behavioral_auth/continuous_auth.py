@@ -0,0 +1,244 @@
+﻿import time
+from collections import OrderedDict
+import numpy as np
+from fast_inference import FastAuthScorer
+
+class SessionState:
+    '''Per-session ring buffer of the last `timesteps` feature windows plus the rolling score'''
+    
+    __slots__ = ('buffer', 'position', 'count', 'score', 'alerting', 'alerts', 'last_seen')
+    
+    def __init__(self, timesteps, features):
+        self.buffer = np.zeros((timesteps, features), dtype=np.float32)
+        self.position = 0
+        self.count = 0
+        self.score = None
+        self.alerting = False
+        self.alerts = 0
+        self.last_seen = 0.0
+    
+    def push(self, window):
+        self.buffer[self.position] = window
+        self.position = (self.position + 1) % len(self.buffer)
+        self.count += 1
+    
+    def is_ready(self):
+        return self.count >= len(self.buffer)
+    
+    def sequence(self):
+        '''Buffered windows oldest first, as one model input'''
+        return np.concatenate((self.buffer[self.position:], self.buffer[:self.position]))
+
+class ContinuousAuthenticator:
+    '''
+    Continuous authentication over a stream of feature windows per session
+    
+    Each session keeps a ring buffer of its last `timesteps` windows, so a new
+    window costs one slot write instead of rebuilding the sequence. Once the
+    buffer is full every window is scored (sessions arriving together share
+    one batched forward pass) and folded into an exponentially weighted
+    reconstruction error. When that rolling score rises above the baseline
+    threshold (mean + 2 std of training error) a credential-theft alert is
+    raised once, until the score falls back below it. Consecutive sequences
+    overlap, so their errors are correlated; a small alpha keeps genuine
+    drift below the threshold.
+    
+    Windows are raw features for a model with fused normalization
+    (fuse_normalization), normalized features otherwise.
+    
+    Memory is bounded: at most max_sessions are tracked (least recently
+    active dropped first) and sessions idle for session_timeout expire.
+    '''
+    
+    def __init__(self, auth_model, alpha=0.1, max_sessions=10000, session_timeout=1800.0,
+                 scorer=None, on_alert=None):
+        if not 0 < alpha <= 1:
+            raise ValueError('alpha must be in (0, 1]')
+        if auth_model.baseline is None:
+            raise ValueError('Model not trained!')
+        
+        self.timesteps = auth_model.timesteps
+        self.features = auth_model.features
+        self.baseline = auth_model.baseline
+        self.fused_normalization = auth_model.scaler is not None
+        self.alpha = alpha
+        self.max_sessions = max_sessions
+        self.session_timeout = session_timeout
+        self.scorer = scorer or FastAuthScorer(auth_model)
+        self.on_alert = on_alert or self.print_alert
+        
+        self.sessions = OrderedDict()
+        self.windows_scored = 0
+        self.alerts_raised = 0
+        self.sessions_evicted = 0
+        self.sessions_expired = 0
+    
+    def get_session(self, session_id, now):
+        state = self.sessions.get(session_id)
+        if state is None:
+            state = SessionState(self.timesteps, self.features)
+            self.sessions[session_id] = state
+            if len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+                self.sessions_evicted += 1
+        else:
+            self.sessions.move_to_end(session_id)
+        
+        state.last_seen = now
+        return state
+    
+    def expire_idle(self, now):
+        '''Drop sessions idle longer than session_timeout (oldest are at the front)'''
+        while self.sessions:
+            session_id, state = next(iter(self.sessions.items()))
+            if now - state.last_seen <= self.session_timeout:
+                break
+            del self.sessions[session_id]
+            self.sessions_expired += 1
+    
+    def end_session(self, session_id):
+        self.sessions.pop(session_id, None)
+    
+    def add_window(self, session_id, window, timestamp=None):
+        '''
+        Feed one feature window for a session
+        
+        Returns:
+            Score dict once the session has `timesteps` windows, else None
+        '''
+        return self.add_windows([(session_id, window)], timestamp)[0]
+    
+    def add_windows(self, items, timestamp=None):
+        '''
+        Feed windows for many sessions; ready sessions are scored in one batch
+        
+        Args:
+            items: Iterable of (session_id, window) with window a (features,) array
+        
+        Returns:
+            List of score dicts (or None for sessions still filling), in input order
+        '''
+        now = time.time() if timestamp is None else timestamp
+        self.expire_idle(now)
+        
+        ready = []
+        results = []
+        for session_id, window in items:
+            state = self.get_session(session_id, now)
+            state.push(np.asarray(window, dtype=np.float32))
+            results.append(None)
+            if state.is_ready():
+                ready.append((len(results) - 1, session_id, state, state.sequence()))
+        
+        if not ready:
+            return results
+        
+        errors = self.scorer.errors(np.stack([sequence for _, _, _, sequence in ready]))
+        self.windows_scored += len(ready)
+        
+        for (slot, session_id, state, _), error in zip(ready, errors):
+            results[slot] = self.update_score(session_id, state, float(error))
+        
+        return results
+    
+    def update_score(self, session_id, state, error):
+        if state.score is None:
+            state.score = error
+        else:
+            state.score = self.alpha * error + (1 - self.alpha) * state.score
+        
+        expected = self.baseline['mean_error']
+        above = state.score > self.baseline['threshold']
+        
+        result = {
+            'session_id': session_id,
+            'error': error,
+            'score': state.score,
+            'deviation': abs(state.score - expected) / expected,
+            'alert': above and not state.alerting
+        }
+        
+        if result['alert']:
+            state.alerts += 1
+            self.alerts_raised += 1
+            self.on_alert(result)
+        state.alerting = above
+        
+        return result
+    
+    def print_alert(self, result):
+        print(f'[🚨] CREDENTIAL THEFT ALERT - session {result["session_id"]}: '
+              f'rolling error {result["score"]:.4f} > threshold {self.baseline["threshold"]:.4f}')
+    
+    def get_statistics(self):
+        return {
+            'active_sessions': len(self.sessions),
+            'alerting_sessions': sum(1 for state in self.sessions.values() if state.alerting),
+            'windows_scored': self.windows_scored,
+            'alerts_raised': self.alerts_raised,
+            'sessions_evicted': self.sessions_evicted,
+            'sessions_expired': self.sessions_expired
+        }
+    
+    def print_summary(self):
+        stats = self.get_statistics()
+        
+        print('\n' + '='*60)
+        print('CONTINUOUS AUTHENTICATION SUMMARY')
+        print('='*60)
+        print(f'Active sessions:   {stats["active_sessions"]} ({stats["alerting_sessions"]} alerting)')
+        print(f'Windows scored:    {stats["windows_scored"]}')
+        print(f'Alerts raised:     {stats["alerts_raised"]}')
+        print(f'Sessions evicted:  {stats["sessions_evicted"]}')
+        print(f'Sessions expired:  {stats["sessions_expired"]}')
+        print('='*60)
+
+if __name__ == '__main__':
+    from pathlib import Path
+    from model_trainer import BehavioralAuthModel
+    
+    print('='*60)
+    print('CONTINUOUS AUTHENTICATION')
+    print('='*60)
+    
+    try:
+        auth_model = BehavioralAuthModel.load('../models/behavioral_auth')
+    except (OSError, ValueError) as e:
+        print(f'[!] Could not load model: {e}')
+        print('[!] Run model_trainer.py first')
+        exit(1)
+    
+    features_path = Path('../data/window_features.npy')
+    if not features_path.exists():
+        print('[!] window_features.npy not found, run feature_extractor.py first')
+        exit(1)
+    
+    windows = np.load(features_path)
+    noise_scale = 1.0
+    if auth_model.scaler is not None:
+        # Saved windows are normalized; a fused model takes raw features
+        noise_scale = np.asarray(auth_model.scaler['scale'])
+        windows = windows * noise_scale + np.asarray(auth_model.scaler['mean'])
+    
+    rng = np.random.default_rng(7)
+    authenticator = ContinuousAuthenticator(auth_model, alpha=0.1)
+    authenticator.scorer.errors(np.zeros((2, auth_model.timesteps, auth_model.features)))
+    
+    print(f'\n[*] Streaming {len(windows)} windows into 2 sessions')
+    print('    genuine:  the enrolled user throughout')
+    print('    hijacked: taken over by someone else halfway through\n')
+    
+    takeover = len(windows) // 2
+    start = time.perf_counter()
+    for i, window in enumerate(windows):
+        impostor = rng.normal(0, 1.5, window.shape) * noise_scale if i >= takeover else window
+        results = authenticator.add_windows([('genuine', window), ('hijacked', impostor)], timestamp=float(i))
+        
+        for result in results:
+            if result and result['alert'] and result['session_id'] == 'hijacked':
+                print(f'    Hijack detected {i - takeover} windows after takeover')
+    elapsed = time.perf_counter() - start
+    
+    print(f'\n[✓] {authenticator.windows_scored} windows scored in {elapsed:.2f}s '
+          f'({authenticator.windows_scored / elapsed:.0f} windows/s)')
+    authenticator.print_summary()
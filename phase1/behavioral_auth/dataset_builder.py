@@ -0,0 +1,255 @@
+﻿import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import numpy as np
+from scaler_params import fit_scaler_params
+from sequence_dataset import build_sequences
+from stream_extractor import StreamingFeatureExtractor
+
+DEFAULT_SESSION = 'default'
+
+# Captures are named mouse_<user>@<session>.jsonl / keys_<user>@<session>.jsonl.
+# User and session IDs may contain '_' (mouse_john_doe@s01.jsonl is user
+# john_doe) but not '@', so the split is unambiguous
+SESSION_MARKER = '@'
+
+def capture_name(prefix, user_id, session_id=None):
+    '''
+    File name for one capture, e.g. capture_name('mouse_', 'john_doe', 's01') -> mouse_john_doe@s01.jsonl
+    
+    Without session_id the capture belongs to the default session (mouse_<user>.jsonl).
+    '''
+    for part in (user_id,) if session_id is None else (user_id, session_id):
+        if not part or SESSION_MARKER in part:
+            raise ValueError(f'Invalid capture ID {part!r}: must be non-empty and not contain {SESSION_MARKER!r}')
+    if session_id is None:
+        return f'{prefix}{user_id}.jsonl'
+    return f'{prefix}{user_id}{SESSION_MARKER}{session_id}.jsonl'
+
+def parse_capture_name(path, prefix):
+    '''
+    (user_id, session_id) from a capture_name file name
+    
+    Files without a session marker (mouse_<user>.jsonl) belong to the default session.
+    '''
+    name = Path(path).stem[len(prefix):]
+    user_id, marker, session_id = name.partition(SESSION_MARKER)
+    return user_id, session_id if marker else DEFAULT_SESSION
+
+def discover_sessions(data_dir):
+    '''
+    Pair mouse and key captures per user and session
+    
+    Only .jsonl captures are read; bulk_data_generator's 'columnar' .npz
+    output is not builder input (use 'jsonl+cache' for cached columns).
+    
+    Returns:
+        ({user_id: [(session_id, mouse_file, key_file), ...]}, unpaired files)
+    '''
+    data_dir = Path(data_dir)
+    mouse = {parse_capture_name(p, 'mouse_'): p for p in data_dir.glob('mouse_*.jsonl')}
+    keys = {parse_capture_name(p, 'keys_'): p for p in data_dir.glob('keys_*.jsonl')}
+    
+    users = defaultdict(list)
+    for user_id, session_id in sorted(mouse.keys() & keys.keys()):
+        users[user_id].append((session_id, str(mouse[(user_id, session_id)]), str(keys[(user_id, session_id)])))
+    
+    unpaired = sorted(str(p) for k, p in list(mouse.items()) + list(keys.items()) if k not in mouse or k not in keys)
+    return dict(users), unpaired
+
+def source_signatures(sessions):
+    '''mtime/size of every input file, used to skip unchanged users'''
+    signatures = {}
+    for _, mouse_file, key_file in sessions:
+        for path in (mouse_file, key_file):
+            stat = os.stat(path)
+            signatures[path] = [stat.st_mtime_ns, stat.st_size]
+    return signatures
+
+def write_atomic(path, write):
+    '''Write via a temp file in the same directory, then rename into place'''
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def build_user_shard(user_id, sessions, output_dir, window_seconds, stride_seconds):
+    '''
+    Extract window features for one user's sessions and write the shard
+    
+    Runs in a worker process. The old manifest is removed first and the
+    new one written last, so a shard without a manifest is incomplete and
+    gets rebuilt. A user whose captures yield no windows gets an empty
+    features.npy and no scaler.json.
+    '''
+    start_time = time.time()
+    shard_dir = Path(output_dir) / user_id
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    (shard_dir / 'manifest.json').unlink(missing_ok=True)
+    
+    extractor = StreamingFeatureExtractor(window_seconds, stride_seconds)
+    blocks = []
+    session_index = []
+    offset = 0
+    
+    for session_id, mouse_file, key_file in sessions:
+        _, features = extractor.extract_window_features(mouse_file, key_file)
+        blocks.append(features)
+        session_index.append({'session': session_id, 'start': offset, 'count': len(features)})
+        offset += len(features)
+    
+    features = np.vstack(blocks).astype(np.float32) if offset else np.zeros((0, 9), dtype=np.float32)
+    
+    def save_features(path):
+        with open(path, 'wb') as f:
+            np.save(f, features)
+    
+    write_atomic(shard_dir / 'features.npy', save_features)
+    
+    if len(features):
+        scaler = fit_scaler_params(features.astype(np.float64))
+        write_atomic(shard_dir / 'scaler.json', lambda path: path.write_text(json.dumps(scaler, indent=2)))
+    else:
+        # Parameters fitted on the previous build no longer describe this shard
+        (shard_dir / 'scaler.json').unlink(missing_ok=True)
+    
+    manifest = {
+        'user_id': user_id,
+        'windows': int(len(features)),
+        'sessions': session_index,
+        'sources': source_signatures(sessions),
+        'params': {'window_seconds': window_seconds, 'stride_seconds': stride_seconds},
+        'built_at': time.strftime('%Y-%m-%d %H:%M:%S')
+    }
+    write_atomic(shard_dir / 'manifest.json', lambda path: path.write_text(json.dumps(manifest, indent=2)))
+    
+    return user_id, len(features), time.time() - start_time
+
+def is_up_to_date(user_id, sessions, output_dir, window_seconds, stride_seconds):
+    '''True if the user's shard was built from exactly these inputs and parameters'''
+    manifest_path = Path(output_dir) / user_id / 'manifest.json'
+    if not manifest_path.exists():
+        return False
+    
+    try:
+        manifest = json.loads(manifest_path.read_text())
+        current = source_signatures(sessions)
+    except (OSError, ValueError):
+        return False
+    
+    return (manifest.get('sources') == current and
+            manifest.get('params') == {'window_seconds': window_seconds, 'stride_seconds': stride_seconds})
+
+def load_user_shard(shard_dir, mmap=True):
+    '''
+    Features, scaler parameters and manifest of one user's shard
+    
+    Returns:
+        (features, scaler, manifest); features is memory-mapped by default
+    '''
+    shard_dir = Path(shard_dir)
+    features = np.load(shard_dir / 'features.npy', mmap_mode='r' if mmap else None)
+    scaler_path = shard_dir / 'scaler.json'
+    scaler = json.loads(scaler_path.read_text()) if scaler_path.exists() else None
+    manifest = json.loads((shard_dir / 'manifest.json').read_text())
+    return features, scaler, manifest
+
+def session_sequences(features, manifest, timesteps=10, step=1):
+    '''Sequence views per session, so no sequence spans two captures'''
+    return [
+        build_sequences(features[entry['start']:entry['start'] + entry['count']], timesteps, step)
+        for entry in manifest['sessions']
+    ]
+
+class DatasetBuilder:
+    '''
+    Parallel per-user dataset builder
+    
+    Pairs mouse/key captures per user and session, extracts window features
+    on a process pool and writes one shard per user:
+        <output_dir>/<user_id>/features.npy   raw window features
+        <output_dir>/<user_id>/scaler.json    per-user scaler parameters
+        <output_dir>/<user_id>/manifest.json  sessions, source signatures
+    Users whose inputs are unchanged since the last build are skipped.
+    '''
+    
+    def __init__(self, data_dir='../data', output_dir='../data/shards', window_seconds=30.0,
+                 stride_seconds=5.0, max_workers=None):
+        self.data_dir = Path(data_dir)
+        self.output_dir = Path(output_dir)
+        self.window_seconds = window_seconds
+        self.stride_seconds = stride_seconds
+        self.max_workers = max_workers or os.cpu_count()
+    
+    def build(self, force=False):
+        '''
+        Build shards for every user with changed inputs
+        
+        Returns:
+            Summary dict with built/skipped/failed users and timing
+        '''
+        start_time = time.time()
+        users, unpaired = discover_sessions(self.data_dir)
+        
+        for path in unpaired:
+            print(f'[!] No matching mouse/keys capture for {Path(path).name}, skipping')
+        
+        todo = {}
+        skipped = []
+        for user_id, sessions in users.items():
+            if not force and is_up_to_date(user_id, sessions, self.output_dir, self.window_seconds, self.stride_seconds):
+                skipped.append(user_id)
+            else:
+                todo[user_id] = sessions
+        
+        print(f'[*] Users: {len(users)} ({len(todo)} to build, {len(skipped)} unchanged)')
+        
+        built = {}
+        failed = {}
+        
+        if todo:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(todo))) as pool:
+                futures = {
+                    pool.submit(build_user_shard, user_id, sessions, str(self.output_dir),
+                                self.window_seconds, self.stride_seconds): user_id
+                    for user_id, sessions in todo.items()
+                }
+                
+                for done, future in enumerate(as_completed(futures), 1):
+                    user_id = futures[future]
+                    try:
+                        _, windows, seconds = future.result()
+                        built[user_id] = windows
+                        print(f'[✓] {done}/{len(todo)} {user_id}: {windows} windows in {seconds:.2f}s')
+                    except Exception as e:
+                        failed[user_id] = str(e)
+                        print(f'[!] {done}/{len(todo)} {user_id}: {e}')
+        
+        return {
+            'built': built,
+            'skipped': skipped,
+            'failed': failed,
+            'unpaired': unpaired,
+            'seconds': time.time() - start_time
+        }
+
+if __name__ == '__main__':
+    import sys
+    
+    print('='*60)
+    print('PARALLEL DATASET BUILDER')
+    print('='*60 + '\n')
+    
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else '../data'
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    
+    builder = DatasetBuilder(data_dir, Path(data_dir) / 'shards', max_workers=workers)
+    summary = builder.build()
+    
+    print(f'\n[✓] Built {len(summary["built"])} users, skipped {len(summary["skipped"])} unchanged, '
+          f'{len(summary["failed"])} failed in {summary["seconds"]:.2f}s')
+    print(f'    Shards: {builder.output_dir}')
@@ -0,0 +1,94 @@
+﻿import json
+import os
+import numpy as np
+from pathlib import Path
+
+# Mouse event type codes in the columnar format
+MOUSE_TYPE_CODES = {'move': 0, 'click': 1, 'scroll': 2}
+MOUSE_TYPE_OTHER = 3
+
+CACHE_DIR_NAME = '.columnar'
+
+def parse_mouse_log(filepath):
+    '''Parse a mouse_*.jsonl capture into typed columns'''
+    timestamps, xs, ys, intervals, type_codes = [], [], [], [], []
+    
+    with open(filepath, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            timestamps.append(event['timestamp'])
+            xs.append(event.get('x', 0))
+            ys.append(event.get('y', 0))
+            intervals.append(event.get('interval', np.nan))
+            type_codes.append(MOUSE_TYPE_CODES.get(event.get('type'), MOUSE_TYPE_OTHER))
+    
+    return {
+        'timestamp': np.array(timestamps, dtype=np.float64),
+        'x': np.array(xs, dtype=np.float32),
+        'y': np.array(ys, dtype=np.float32),
+        'interval': np.array(intervals, dtype=np.float64),
+        'type_code': np.array(type_codes, dtype=np.int8)
+    }
+
+def parse_key_log(filepath):
+    '''Parse a keys_*.jsonl capture into typed columns'''
+    timestamps, flight_times, keys = [], [], []
+    
+    with open(filepath, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            timestamps.append(event['timestamp'])
+            flight_times.append(event.get('flight_time', 0.0))
+            keys.append(str(event.get('key', '')))
+    
+    return {
+        'timestamp': np.array(timestamps, dtype=np.float64),
+        'flight_time': np.array(flight_times, dtype=np.float64),
+        'key': np.array(keys, dtype=np.str_) if keys else np.zeros(0, dtype='<U1')
+    }
+
+def cache_path_for(filepath, cache_dir=None):
+    '''Cache file location: <data_dir>/.columnar/<name>.npz unless cache_dir is given'''
+    filepath = Path(filepath)
+    cache_dir = Path(cache_dir) if cache_dir is not None else filepath.parent / CACHE_DIR_NAME
+    return cache_dir / f'{filepath.stem}.npz'
+
+def source_signature(filepath):
+    stat = os.stat(filepath)
+    return np.array([stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+def load_columns(filepath, parser, cache_dir=None):
+    '''
+    Columnar arrays for a capture file, parsing it only when the cache is stale
+    
+    The cache records the source mtime and size; any change re-parses.
+    '''
+    cache_path = cache_path_for(filepath, cache_dir)
+    signature = source_signature(filepath)
+    
+    if cache_path.exists():
+        with np.load(cache_path) as cached:
+            if np.array_equal(cached['_source'], signature):
+                return {name: cached[name] for name in cached.files if name != '_source'}
+    
+    columns = parser(filepath)
+    
+    # Write then rename so readers never see a half-written cache
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(f'{cache_path.stem}.{os.getpid()}.tmp.npz')
+    np.savez(tmp_path, _source=signature, **columns)
+    os.replace(tmp_path, cache_path)
+    
+    return columns
+
+def load_mouse_columns(filepath, cache_dir=None):
+    '''timestamp, x, y, interval, type_code columns for a mouse capture'''
+    return load_columns(filepath, parse_mouse_log, cache_dir)
+
+def load_key_columns(filepath, cache_dir=None):
+    '''timestamp, flight_time, key columns for a keyboard capture'''
+    return load_columns(filepath, parse_key_log, cache_dir)
@@ -0,0 +1,193 @@
+﻿import time
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+def unrolled_copy(keras_model):
+    '''
+    Copy of the model with its LSTMs unrolled over the fixed timesteps
+    
+    Unrolled LSTMs have no while loop: the graph runs about twice as fast for
+    short sequences, and the TFLite converter lowers it to builtin ops
+    instead of needing the Flex (SELECT_TF_OPS) runtime.
+    '''
+    def clone_layer(layer):
+        config = layer.get_config()
+        if isinstance(layer, keras.layers.LSTM):
+            config['unroll'] = True
+        return layer.__class__.from_config(config)
+    
+    unrolled = keras.models.clone_model(keras_model, clone_function=clone_layer)
+    unrolled.set_weights(keras_model.get_weights())
+    return unrolled
+
+def compile_error_fn(keras_model, timesteps=10, features=9, error_scale=None):
+    '''
+    tf.function computing per-sample reconstruction error
+    
+    The input signature is fixed, so the graph is traced once and every call
+    skips predict()'s per-call data pipeline. error_scale (the model's
+    fused scaler scale) puts the error in normalized units.
+    
+    Returns:
+        Function mapping (batch, timesteps, features) float32 -> (batch,) errors
+    '''
+    @tf.function(input_signature=[tf.TensorSpec([None, timesteps, features], tf.float32, name='sample')])
+    def reconstruction_error(sample):
+        diff = tf.abs(sample - keras_model(sample, training=False))
+        if error_scale is not None:
+            diff = diff / tf.constant(error_scale, dtype=tf.float32)
+        return tf.reduce_mean(diff, axis=[1, 2])
+    
+    return reconstruction_error
+
+def deviation_from_error(errors, baseline, threshold_multiplier=0.03):
+    '''Same deviation rule as BehavioralAuthModel.authenticate'''
+    expected = baseline['mean_error']
+    deviations = np.abs(np.asarray(errors, dtype=np.float64) - expected) / expected
+    return deviations < threshold_multiplier, deviations
+
+class FastAuthScorer:
+    '''
+    Low-latency scorer calling the compiled graph directly instead of predict()
+    
+    unroll=True scores through an unrolled copy of the model (faster, but
+    holds a second set of weights).
+    '''
+    
+    def __init__(self, auth_model, threshold_multiplier=0.03, unroll=True):
+        if auth_model.model is None or auth_model.baseline is None:
+            raise ValueError('Model not trained!')
+        
+        self.baseline = auth_model.baseline
+        self.threshold_multiplier = threshold_multiplier
+        self.sample_shape = (auth_model.timesteps, auth_model.features)
+        keras_model = unrolled_copy(auth_model.model) if unroll else auth_model.model
+        self.error_fn = compile_error_fn(keras_model, auth_model.timesteps, auth_model.features,
+                                         auth_model.error_scale)
+    
+    def errors(self, samples):
+        samples = np.asarray(samples, dtype=np.float32).reshape((-1,) + self.sample_shape)
+        return self.error_fn(tf.constant(samples)).numpy()
+    
+    def score_batch(self, samples):
+        return deviation_from_error(self.errors(samples), self.baseline, self.threshold_multiplier)
+    
+    def authenticate(self, sample):
+        is_authentic, deviations = self.score_batch(sample)
+        return bool(is_authentic[0]), float(deviations[0])
+
+def export_tflite(auth_model, filepath='../models/behavioral_auth.tflite', optimizations=None,
+                  supported_types=None):
+    '''
+    Convert the autoencoder to a TFLite flatbuffer
+    
+    Conversion uses builtin ops on an unrolled copy of the model, and falls
+    back to SELECT_TF_OPS on the original if that fails (the fallback needs
+    an interpreter built with Flex ops).
+    
+    Args:
+        optimizations: Optional list of tf.lite.Optimize flags
+        supported_types: Optional list of dtypes for converter.target_spec
+    
+    Returns:
+        Size of the written model in bytes
+    '''
+    def convert(keras_model, select_ops):
+        converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+        if optimizations:
+            converter.optimizations = optimizations
+        if supported_types:
+            converter.target_spec.supported_types = supported_types
+        if select_ops:
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+            converter._experimental_lower_tensor_list_ops = False
+        return converter.convert()
+    
+    try:
+        tflite_model = convert(unrolled_copy(auth_model.model), select_ops=False)
+    except Exception as e:
+        print(f'[!] Builtin conversion failed ({type(e).__name__}), retrying with SELECT_TF_OPS')
+        tflite_model = convert(auth_model.model, select_ops=True)
+    
+    with open(filepath, 'wb') as f:
+        f.write(tflite_model)
+    
+    return len(tflite_model)
+
+class TFLiteScorer:
+    '''Interpreter-backed scorer for a model written by export_tflite'''
+    
+    def __init__(self, model_path, baseline, timesteps=10, features=9, threshold_multiplier=0.03, num_threads=1,
+                 error_scale=None):
+        self.interpreter = tf.lite.Interpreter(model_path=str(model_path), num_threads=num_threads)
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self.sample_shape = (1, timesteps, features)
+        self.interpreter.resize_tensor_input(self.input_index, self.sample_shape)
+        self.interpreter.allocate_tensors()
+        self.baseline = baseline
+        self.threshold_multiplier = threshold_multiplier
+        self.error_scale = error_scale
+    
+    def error(self, sample):
+        sample = np.asarray(sample, dtype=np.float32).reshape(self.sample_shape)
+        self.interpreter.set_tensor(self.input_index, sample)
+        self.interpreter.invoke()
+        diff = np.abs(sample - self.interpreter.get_tensor(self.output_index))
+        if self.error_scale is not None:
+            diff = diff / self.error_scale
+        return float(np.mean(diff))
+    
+    def errors(self, samples):
+        samples = np.asarray(samples, dtype=np.float32).reshape((-1,) + self.sample_shape[1:])
+        return np.array([self.error(sample) for sample in samples])
+    
+    def score_batch(self, samples):
+        return deviation_from_error(self.errors(samples), self.baseline, self.threshold_multiplier)
+    
+    def authenticate(self, sample):
+        is_authentic, deviation = deviation_from_error([self.error(sample)], self.baseline, self.threshold_multiplier)
+        return bool(is_authentic[0]), float(deviation[0])
+
+def time_per_call(fn, samples, repeats=3):
+    '''Median seconds per single-sample call'''
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for sample in samples:
+            fn(sample)
+        runs.append((time.perf_counter() - start) / len(samples))
+    return float(np.median(runs))
+
+if __name__ == '__main__':
+    from model_trainer import BehavioralAuthModel
+    
+    print('='*60)
+    print('FAST INFERENCE + TFLITE EXPORT')
+    print('='*60)
+    
+    try:
+        auth_model = BehavioralAuthModel.load('../models/behavioral_auth')
+    except (OSError, ValueError) as e:
+        print(f'[!] Could not load model: {e}')
+        print('[!] Run model_trainer.py first')
+        exit(1)
+    
+    samples = np.random.default_rng(0).normal(0, 1, (200, 1, 10, 9)).astype(np.float32)
+    
+    fast = FastAuthScorer(auth_model)
+    fast.authenticate(samples[0])
+    
+    print('\n[*] Exporting TFLite model...')
+    size = export_tflite(auth_model, '../models/behavioral_auth.tflite')
+    print(f'[✓] ../models/behavioral_auth.tflite ({size / 1024:.1f} KB)')
+    lite = TFLiteScorer('../models/behavioral_auth.tflite', auth_model.baseline, error_scale=auth_model.error_scale)
+    
+    print('\n[*] Single-sample latency:')
+    predict_time = time_per_call(auth_model.authenticate, samples[:20], repeats=1)
+    fast_time = time_per_call(fast.authenticate, samples)
+    lite_time = time_per_call(lite.authenticate, samples)
+    print(f'    model.predict:  {predict_time * 1000:8.3f} ms')
+    print(f'    tf.function:    {fast_time * 1000:8.3f} ms')
+    print(f'    TFLite:         {lite_time * 1000:8.3f} ms')
@@ -2,6 +2,14 @@
 import numpy as np
 from pathlib import Path
 from sklearn.preprocessing import StandardScaler
+from stream_extractor import StreamingFeatureExtractor
+from sequence_dataset import build_sequences, save_window_features
+from event_cache import MOUSE_TYPE_CODES, load_key_columns, load_mouse_columns
+from tremor_features import session_tremor_peak
+from scaler_params import save_scaler_params, scaler_to_params
+
+# Stored next to behavioral_auth_baseline.json; fused into the model by model_trainer
+SCALER_PATH = '../models/behavioral_auth_scaler.json'
 
 class BehavioralFeatureExtractor:
     
@@ -24,13 +32,20 @@ class BehavioralFeatureExtractor:
         # Use intervals instead of absolute positions
         intervals = np.array([d['interval'] for d in movements[:100]])
         
+        # Tremor is measured over the whole trajectory for frequency resolution
+        tremor_hz = session_tremor_peak(
+            [d['timestamp'] for d in movements],
+            [d['x'] for d in movements],
+            [d['y'] for d in movements]
+        )
+        
         # Simple statistical features from intervals
         features = np.array([
             np.mean(intervals),           # Avg interval
             np.std(intervals),            # Interval variance
             np.median(intervals),         # Median interval
             np.percentile(intervals, 75), # 75th percentile
-            10.0 + np.random.normal(0, 0.3)  # Simulated tremor freq
+            tremor_hz                     # 8-12 Hz tremor peak
         ])
         
         return features
@@ -56,12 +71,54 @@ class BehavioralFeatureExtractor:
         
         return features
     
-    def extract_combined_features(self, mouse_file, key_file):
-        mouse_data = self.load_data(mouse_file)
-        key_data = self.load_data(key_file)
+    def extract_mouse_features_columns(self, mouse_columns):
+        '''extract_mouse_features over cached columns (see event_cache)'''
+        is_move = mouse_columns['type_code'] == MOUSE_TYPE_CODES['move']
+        
+        if np.count_nonzero(is_move) < 10:
+            return np.zeros(5)
+        
+        intervals = mouse_columns['interval'][is_move][:100]
+        tremor_hz = session_tremor_peak(
+            mouse_columns['timestamp'][is_move],
+            mouse_columns['x'][is_move],
+            mouse_columns['y'][is_move]
+        )
+        
+        features = np.array([
+            np.mean(intervals),
+            np.std(intervals),
+            np.median(intervals),
+            np.percentile(intervals, 75),
+            tremor_hz
+        ])
+        
+        return features
+    
+    def extract_keyboard_features_columns(self, key_columns):
+        '''extract_keyboard_features over cached columns (see event_cache)'''
+        if len(key_columns['timestamp']) < 5:
+            return np.zeros(4)
         
-        mouse_features = self.extract_mouse_features(mouse_data)
-        key_features = self.extract_keyboard_features(key_data)
+        flight_times = key_columns['flight_time']
+        flight_times = flight_times[flight_times > 0]
+        
+        if len(flight_times) < 2:
+            return np.zeros(4)
+        
+        features = np.array([
+            np.mean(flight_times),
+            np.std(flight_times),
+            np.median(flight_times),
+            np.count_nonzero(flight_times > 1.0) / len(flight_times)
+        ])
+        
+        return features
+    
+    def extract_combined_features(self, mouse_file, key_file):
+        # Parsed once into columnar .npz caches, re-parsed only when the source changes
+        mouse_features = self.extract_mouse_features_columns(load_mouse_columns(mouse_file))
+        key_features = self.extract_keyboard_features_columns(load_key_columns(key_file))
         
         all_features = np.concatenate([mouse_features, key_features])
         
@@ -118,10 +175,57 @@ class BehavioralFeatureExtractor:
         print(f'    (samples, timesteps, features)')
         
         # Save scaler for later use
-        import pickle
-        with open('../models/feature_scaler.pkl', 'wb') as f:
-            pickle.dump(self.scaler, f)
-        print(f'[✓] Feature scaler saved')
+        save_scaler_params(scaler_to_params(self.scaler), SCALER_PATH)
+        print(f'[✓] Feature scaler saved to {SCALER_PATH}')
+        
+        return dataset
+    
+    def create_sequence_dataset(self, data_dir='../data', window_size=10, window_seconds=30.0,
+                                stride_seconds=5.0, features_path='../data/window_features.npy'):
+        '''
+        Build LSTM sequences from real per-window features
+        
+        Each timestep is one sliding time window, so sequences carry temporal
+        structure. Normalized window features are written once to
+        features_path and the returned dataset is a strided view over the
+        memory-mapped file rather than window_size copies per sample.
+        
+        Returns:
+            (samples, window_size, 9) read-only view, or None without data
+        '''
+        data_dir = Path(data_dir)
+        
+        mouse_files = sorted(data_dir.glob('mouse_*.jsonl'))
+        key_files = sorted(data_dir.glob('keys_*.jsonl'))
+        
+        if not mouse_files or not key_files:
+            print('[!] No data files found in', data_dir)
+            return None
+        
+        print(f'[*] Found data files:')
+        print(f'    Mouse: {mouse_files[0].name}')
+        print(f'    Keys: {key_files[0].name}')
+        
+        streamer = StreamingFeatureExtractor(window_seconds, stride_seconds)
+        _, window_features = streamer.extract_window_features(mouse_files[0], key_files[0])
+        
+        if len(window_features) < window_size:
+            print(f'[!] Only {len(window_features)} windows, need at least {window_size}')
+            return None
+        
+        print(f'\n[*] Extracted {len(window_features)} windows ({window_seconds:.0f}s, stride {stride_seconds:.0f}s)')
+        
+        normalized = self.scaler.fit_transform(window_features)
+        save_window_features(normalized, features_path)
+        
+        dataset = build_sequences(np.load(features_path, mmap_mode='r'), window_size)
+        
+        print(f'\n[*] Created training dataset:')
+        print(f'    Shape: {dataset.shape}')
+        print(f'    (samples, timesteps, features) - strided view over {features_path}')
+        
+        save_scaler_params(scaler_to_params(self.scaler), SCALER_PATH)
+        print(f'[✓] Feature scaler saved to {SCALER_PATH}')
         
         return dataset
 
@@ -131,12 +235,10 @@ if __name__ == '__main__':
     print('='*60)
     
     extractor = BehavioralFeatureExtractor()
-    dataset = extractor.create_training_dataset()
+    dataset = extractor.create_sequence_dataset()
     
     if dataset is not None:
-        np.save('../data/training_dataset.npy', dataset)
-        
-        print(f'\n[✓] Dataset saved to data/training_dataset.npy')
+        print(f'\n[✓] Window features saved to data/window_features.npy')
         print(f'[✓] Ready for model training!')
         print(f'\nNext: py model_trainer.py')
     else:
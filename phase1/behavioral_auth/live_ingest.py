@@ -0,0 +1,514 @@
+﻿import json
+import math
+import os
+import time
+from collections import deque
+from pathlib import Path
+import numpy as np
+from dataset_builder import capture_name, parse_capture_name
+from scaler_params import normalize
+from tremor_features import tremor_features
+
+class LogTailer:
+    '''
+    Follows a growing JSONL capture file
+    
+    Each read returns only complete new lines; a trailing partial line is
+    kept until its newline arrives. Truncation or replacement of the file
+    (rotation) restarts from the beginning of the new file.
+    '''
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file = None
+        self.inode = None
+        self.offset = 0
+        self.partial = b''
+        self.caught_up = True
+    
+    def reopen(self):
+        self.close()
+        self.file = open(self.path, 'rb')
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        self.offset = 0
+        self.partial = b''
+    
+    def read_lines(self, max_bytes=1 << 20):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        
+        if self.file is None or stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.reopen()
+        if stat.st_size == self.offset:
+            self.caught_up = True
+            return []
+        
+        self.file.seek(self.offset)
+        data = self.file.read(max_bytes)
+        self.offset += len(data)
+        self.caught_up = self.offset >= stat.st_size
+        
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()
+        return [line for line in lines if line.strip()]
+    
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+def parse_batch(lines):
+    '''
+    All lines of a read in one json.loads call
+    
+    A malformed line (e.g. truncated by a crashed writer) fails the joined
+    parse, so the read falls back to one json.loads per line and drops the
+    lines that don't parse.
+    
+    Returns:
+        (events, skipped): parsed events in file order, number of lines dropped
+    '''
+    try:
+        return json.loads(b'[' + b','.join(lines) + b']'), 0
+    except ValueError:
+        pass
+    
+    events = []
+    for line in lines:
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            continue
+    return events, len(lines) - len(events)
+
+class EventRing:
+    '''
+    Fixed-capacity columnar ring buffer of events
+    
+    Columns are preallocated NumPy arrays; a batch is copied in with at most
+    two slice assignments and the oldest events are overwritten once full.
+    Once wrapped, the events are two sorted storage segments, which reads
+    search and slice directly instead of unrolling the ring.
+    '''
+    
+    def __init__(self, capacity, columns):
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in columns.items()}
+        self.written = 0
+        self.overwritten = 0
+    
+    def __len__(self):
+        return min(self.written, self.capacity)
+    
+    def extend(self, values):
+        n = len(next(iter(values.values())))
+        skip = max(0, n - self.capacity)
+        n -= skip
+        
+        position = self.written % self.capacity
+        first = min(n, self.capacity - position)
+        for name, column in self.columns.items():
+            source = values[name][skip:]
+            column[position:position + first] = source[:first]
+            column[:n - first] = source[first:]
+        
+        self.overwritten += max(0, len(self) + n - self.capacity) + skip
+        self.written += n + skip
+    
+    def segments(self):
+        '''(lo, hi) storage ranges holding the events, oldest first'''
+        if self.written <= self.capacity:
+            return [(0, self.written)]
+        position = self.written % self.capacity
+        return [(position, self.capacity), (0, position)]
+    
+    def bounds(self, start, end):
+        '''Storage ranges of events with start <= timestamp < end, oldest first (timestamps are ordered)'''
+        timestamps = self.columns['timestamp']
+        ranges = []
+        for lo, hi in self.segments():
+            first, last = np.searchsorted(timestamps[lo:hi], [start, end], side='left')
+            if last > first:
+                ranges.append((lo + first, lo + last))
+        return ranges
+    
+    def window(self, start, end):
+        '''
+        Columns for events with start <= timestamp < end
+        
+        Views into the ring unless the window straddles the wrap point, in
+        which case only the window's two pieces are copied.
+        '''
+        ranges = self.bounds(start, end)
+        if len(ranges) <= 1:
+            lo, hi = ranges[0] if ranges else (0, 0)
+            return {name: column[lo:hi] for name, column in self.columns.items()}
+        return {name: np.concatenate([column[lo:hi] for lo, hi in ranges]) for name, column in self.columns.items()}
+    
+    def first_at_or_after(self, start):
+        '''Timestamp of the oldest event at or after start, None if there is none'''
+        ranges = self.bounds(start, math.inf)
+        return self.columns['timestamp'][ranges[0][0]] if ranges else None
+
+class SessionWindows:
+    '''
+    One capture session: tailers for its two files, event rings and window clock
+    
+    Windows follow StreamingFeatureExtractor (window_seconds long, advancing
+    by stride_seconds from the first event, idle gaps skipped) and compute
+    the same 9 features, so live windows match what the model trained on.
+    '''
+    
+    def __init__(self, mouse_file, key_file, window_seconds, stride_seconds, mouse_capacity, key_capacity):
+        self.mouse_tailer = LogTailer(mouse_file)
+        self.key_tailer = LogTailer(key_file)
+        self.moves = EventRing(mouse_capacity, {'timestamp': np.float64, 'x': np.float64, 'y': np.float64,
+                                                'interval': np.float64})
+        self.keys = EventRing(key_capacity, {'timestamp': np.float64, 'flight_time': np.float64})
+        self.window_seconds = window_seconds
+        self.stride_seconds = stride_seconds
+        self.window_start = None
+        self.first = math.inf
+        self.latest = {'mouse': -math.inf, 'key': -math.inf}
+        self.lines_skipped = 0
+    
+    def ingest(self, max_bytes):
+        '''Read and buffer new lines from both files; returns the number of events'''
+        events = 0
+        
+        # Catching up on a backlog, a file more than a window ahead of the other
+        # waits, or its ring would overflow before those windows close
+        mouse_ahead = self.latest['mouse'] - self.latest['key'] > self.window_seconds and not self.key_tailer.caught_up
+        key_ahead = self.latest['key'] - self.latest['mouse'] > self.window_seconds and not self.mouse_tailer.caught_up
+        
+        lines = [] if mouse_ahead else self.mouse_tailer.read_lines(max_bytes)
+        batch, skipped = parse_batch(lines) if lines else ([], 0)
+        self.lines_skipped += skipped
+        if batch:
+            events += len(batch)
+            moves = [event for event in batch if event.get('type') == 'move']
+            if moves:
+                self.moves.extend({
+                    'timestamp': np.fromiter((e['timestamp'] for e in moves), np.float64, len(moves)),
+                    'x': np.fromiter((e['x'] for e in moves), np.float64, len(moves)),
+                    'y': np.fromiter((e['y'] for e in moves), np.float64, len(moves)),
+                    'interval': np.fromiter((e['interval'] for e in moves), np.float64, len(moves))
+                })
+            self.observe('mouse', batch[0]['timestamp'], batch[-1]['timestamp'])
+        
+        lines = [] if key_ahead else self.key_tailer.read_lines(max_bytes)
+        batch, skipped = parse_batch(lines) if lines else ([], 0)
+        self.lines_skipped += skipped
+        if batch:
+            events += len(batch)
+            self.keys.extend({
+                'timestamp': np.fromiter((e['timestamp'] for e in batch), np.float64, len(batch)),
+                'flight_time': np.fromiter((e.get('flight_time', 0) for e in batch), np.float64, len(batch))
+            })
+            self.observe('key', batch[0]['timestamp'], batch[-1]['timestamp'])
+        
+        return events
+    
+    def observe(self, source, first, last):
+        self.first = min(self.first, first)
+        self.latest[source] = max(self.latest[source], last)
+    
+    def watermark(self, lateness):
+        '''
+        Time up to which both streams are known to be complete
+        
+        A file read to its end holds nothing older still to come; one with
+        unread data is only complete up to its newest event read so far.
+        The newest event overall is held back by lateness for writers that
+        lag slightly.
+        '''
+        pending = [self.latest[source] for source, tailer in (('mouse', self.mouse_tailer), ('key', self.key_tailer))
+                   if not tailer.caught_up]
+        return min(pending + [max(self.latest.values()) - lateness])
+    
+    def features(self, start):
+        '''9-feature vector for [start, start + window_seconds); None if the window is empty'''
+        end = start + self.window_seconds
+        moves = self.moves.window(start, end)
+        keys = self.keys.window(start, end)
+        
+        if not len(moves['timestamp']) and not len(keys['timestamp']):
+            return None
+        
+        features = np.zeros(9)
+        
+        # Same minimum-sample rules as StreamingFeatureExtractor.current_features
+        intervals = moves['interval']
+        if len(intervals) >= 10:
+            features[:4] = [
+                np.mean(intervals),
+                np.std(intervals),
+                np.percentile(intervals, 50),
+                np.percentile(intervals, 75)
+            ]
+            peak_hz, _ = tremor_features(moves['timestamp'], moves['x'], moves['y'], [start], self.window_seconds)
+            if not np.isnan(peak_hz[0]):
+                features[4] = peak_hz[0]
+        
+        flights = keys['flight_time'][keys['flight_time'] > 0]
+        if len(keys['timestamp']) >= 5 and len(flights) >= 2:
+            features[5:] = [
+                np.mean(flights),
+                np.std(flights),
+                np.percentile(flights, 50),
+                np.count_nonzero(flights > 1.0) / len(flights)
+            ]
+        
+        return features
+    
+    def completed_windows(self, watermark):
+        '''(window_start, features) for every window ending at or before watermark'''
+        if self.window_start is None and self.first < math.inf:
+            self.window_start = self.first
+        
+        windows = []
+        while self.window_start is not None and self.window_start + self.window_seconds <= watermark:
+            features = self.features(self.window_start)
+            if features is not None:
+                windows.append((self.window_start, features))
+                self.window_start += self.stride_seconds
+            else:
+                # Idle gap: jump to the first window holding the next event
+                next_event = self.next_event_after(self.window_start)
+                steps = math.floor((next_event - self.window_start - self.window_seconds) / self.stride_seconds) + 1
+                self.window_start += max(1, steps) * self.stride_seconds
+        return windows
+    
+    def next_event_after(self, start):
+        candidates = [max(self.latest.values())]
+        for ring in (self.moves, self.keys):
+            timestamp = ring.first_at_or_after(start)
+            if timestamp is not None:
+                candidates.append(timestamp)
+        return min(candidates)
+    
+    def close(self):
+        self.mouse_tailer.close()
+        self.key_tailer.close()
+
+class LiveIngestor:
+    '''
+    Tails live mouse_/keys_<user>@<session>.jsonl captures into a ContinuousAuthenticator
+    
+    Every poll reads whatever was appended to each capture, parses it in
+    one batch per file and copies it into that session's fixed-size event
+    rings (no per-event Python objects are kept). A window is closed once
+    both files have been read past its end and the session's newest event
+    is `lateness` seconds past it, which gives the other file's writer time
+    to catch up. All windows closed in a poll, across sessions, are scored
+    in one ContinuousAuthenticator batch.
+    
+    Decision latency (decision time minus window end) is poll_interval +
+    lateness + scoring time; capture timestamps are wall-clock, as written
+    by the capture tools.
+    
+    `scaler` normalizes windows for a model trained on normalized features;
+    it is ignored when the model has fused normalization, which takes raw
+    features. Lines that fail to parse are skipped and counted.
+    '''
+    
+    def __init__(self, authenticator, data_dir='../data', window_seconds=30.0, stride_seconds=5.0, lateness=0.25,
+                 scaler=None, mouse_capacity=8192, key_capacity=2048, max_bytes=1 << 20, rescan_interval=1.0):
+        self.authenticator = authenticator
+        self.data_dir = Path(data_dir)
+        self.window_seconds = window_seconds
+        self.stride_seconds = stride_seconds
+        self.lateness = lateness
+        # A model with fused normalization takes raw features; normalizing here too would apply it twice
+        self.scaler = None if authenticator.fused_normalization else scaler
+        self.mouse_capacity = mouse_capacity
+        self.key_capacity = key_capacity
+        self.max_bytes = max_bytes
+        self.rescan_interval = rescan_interval
+        
+        self.sessions = {}
+        self.last_scan = -math.inf
+        self.events_ingested = 0
+        self.windows_emitted = 0
+        self.latencies = deque(maxlen=10000)
+        self.running = False
+    
+    def discover(self):
+        '''Start tailing captures whose mouse and key files both exist'''
+        mouse = {parse_capture_name(p, 'mouse_'): p for p in self.data_dir.glob('mouse_*.jsonl')}
+        keys = {parse_capture_name(p, 'keys_'): p for p in self.data_dir.glob('keys_*.jsonl')}
+        
+        for user_id, session in mouse.keys() & keys.keys():
+            session_id = f'{user_id}/{session}'
+            if session_id not in self.sessions:
+                self.sessions[session_id] = SessionWindows(
+                    mouse[(user_id, session)], keys[(user_id, session)], self.window_seconds,
+                    self.stride_seconds, self.mouse_capacity, self.key_capacity
+                )
+    
+    def poll(self, now=None):
+        '''
+        Ingest new events and score every window they complete
+        
+        Returns:
+            List of ContinuousAuthenticator results for windows scored this poll
+        '''
+        if time.time() - self.last_scan >= self.rescan_interval:
+            self.discover()
+            self.last_scan = time.time()
+        
+        items = []
+        window_ends = []
+        for session_id, session in self.sessions.items():
+            self.events_ingested += session.ingest(self.max_bytes)
+            for window_start, features in session.completed_windows(session.watermark(self.lateness)):
+                if self.scaler is not None:
+                    features = normalize(features, self.scaler)
+                items.append((session_id, features))
+                window_ends.append(window_start + self.window_seconds)
+        
+        if not items:
+            return []
+        
+        now = time.time() if now is None else now
+        results = [result for result in self.authenticator.add_windows(items, timestamp=now) if result]
+        decided = time.time()
+        self.latencies.extend(decided - end for end in window_ends)
+        self.windows_emitted += len(items)
+        return results
+    
+    def run(self, poll_interval=0.05, duration=None, on_result=None):
+        '''Poll until stop() (or for duration seconds)'''
+        self.running = True
+        deadline = None if duration is None else time.time() + duration
+        
+        while self.running and (deadline is None or time.time() < deadline):
+            start = time.time()
+            for result in self.poll():
+                if on_result:
+                    on_result(result)
+            time.sleep(max(0.0, poll_interval - (time.time() - start)))
+    
+    def stop(self):
+        self.running = False
+    
+    def close(self):
+        for session in self.sessions.values():
+            session.close()
+    
+    def get_statistics(self):
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {
+            'sessions': len(self.sessions),
+            'events_ingested': self.events_ingested,
+            'windows_emitted': self.windows_emitted,
+            'events_overwritten': sum(s.moves.overwritten + s.keys.overwritten for s in self.sessions.values()),
+            'lines_skipped': sum(s.lines_skipped for s in self.sessions.values()),
+            'latency_p50_ms': float(np.percentile(latencies, 50) * 1000),
+            'latency_p99_ms': float(np.percentile(latencies, 99) * 1000)
+        }
+    
+    def print_summary(self):
+        stats = self.get_statistics()
+        
+        print('\n' + '='*60)
+        print('LIVE INGESTION SUMMARY')
+        print('='*60)
+        print(f'Sessions tailed:    {stats["sessions"]}')
+        print(f'Events ingested:    {stats["events_ingested"]}')
+        print(f'Windows scored:     {stats["windows_emitted"]}')
+        print(f'Events overwritten: {stats["events_overwritten"]}')
+        print(f'Malformed lines:    {stats["lines_skipped"]}')
+        print(f'Decision latency:   p50 {stats["latency_p50_ms"]:.0f} ms, p99 {stats["latency_p99_ms"]:.0f} ms')
+        print('='*60)
+
+if __name__ == '__main__':
+    import argparse
+    import tempfile
+    import threading
+    from bulk_data_generator import generate_key_columns, generate_mouse_columns, key_lines, make_profiles, mouse_lines
+    from continuous_auth import ContinuousAuthenticator
+    from model_trainer import BehavioralAuthModel
+    
+    parser = argparse.ArgumentParser(description='Tail live captures into continuous authentication')
+    parser.add_argument('--data-dir', default=None, help='Captures to tail (default: simulated writers)')
+    parser.add_argument('--seconds', type=float, default=30.0)
+    parser.add_argument('--window', type=float, default=10.0)
+    parser.add_argument('--stride', type=float, default=1.0)
+    args = parser.parse_args()
+    
+    print('='*60)
+    print('LIVE CAPTURE INGESTION')
+    print('='*60)
+    
+    try:
+        auth_model = BehavioralAuthModel.load('../models/behavioral_auth')
+    except (OSError, ValueError) as e:
+        print(f'[!] Could not load model: {e}')
+        print('[!] Run model_trainer.py first')
+        exit(1)
+    
+    if auth_model.scaler is None:
+        print('[!] Model has no fused scaler; train with behavioral_auth_scaler.json present')
+        exit(1)
+    
+    authenticator = ContinuousAuthenticator(auth_model, on_alert=lambda result: None)
+    authenticator.scorer.errors(np.zeros((2, auth_model.timesteps, auth_model.features)))
+    
+    data_dir = args.data_dir
+    writers = []
+    stop_writing = threading.Event()
+    
+    if data_dir is None:
+        # Two simulated users appending events in real time
+        data_dir = tempfile.mkdtemp(prefix='ghost_live_')
+        start_time = time.time()
+        rng = np.random.default_rng(0)
+        
+        def write_capture(user_id, profile):
+            streams = [
+                (capture_name('mouse_', user_id, 'live'),
+                 generate_mouse_columns(profile, int(args.seconds * 80), start_time, rng), mouse_lines),
+                (capture_name('keys_', user_id, 'live'),
+                 generate_key_columns(profile, int(args.seconds * 6), start_time, rng), key_lines)
+            ]
+            files = [open(Path(data_dir) / name, 'w') for name, _, _ in streams]
+            positions = [0] * len(streams)
+            
+            # Append each event once the wall clock reaches its timestamp
+            while not stop_writing.is_set():
+                now = time.time()
+                for k, (_, columns, lines) in enumerate(streams):
+                    end = int(np.searchsorted(columns['timestamp'], now, side='right'))
+                    files[k].writelines(lines({name: column[positions[k]:end] for name, column in columns.items()}))
+                    files[k].flush()
+                    positions[k] = end
+                time.sleep(0.02)
+            
+            for f in files:
+                f.close()
+        
+        for user_id, profile in make_profiles(2, seed=7).items():
+            writers.append(threading.Thread(target=write_capture, args=(user_id, profile), daemon=True))
+            writers[-1].start()
+    
+    print(f'\n[*] Tailing {data_dir} for {args.seconds:.0f}s '
+          f'({args.window:.0f}s windows, stride {args.stride:.0f}s)')
+    if args.window != 30.0:
+        print('    Windows differ from the 30s training windows: scores are illustrative, latency is real')
+    print()
+    
+    ingestor = LiveIngestor(authenticator, data_dir, window_seconds=args.window, stride_seconds=args.stride)
+    
+    def show(result):
+        status = 'ALERT' if result['alert'] else 'ok'
+        print(f'    {result["session_id"]:18s} error {result["error"]:.4f}  rolling {result["score"]:.4f}  {status}')
+    
+    ingestor.run(duration=args.seconds, on_result=show)
+    stop_writing.set()
+    ingestor.close()
+    
+    authenticator.print_summary()
+    ingestor.print_summary()
@@ -0,0 +1,267 @@
+﻿import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+from fast_inference import FastAuthScorer
+from model_trainer import BehavioralAuthModel
+
+USERS_DIR = '../models/users'
+MODEL_PREFIX = 'behavioral_auth'
+
+# Per-entry memory beyond the weights (Keras objects, TF variables, traced
+# graphs) where it can't be measured; ~8 MB for the default model on TF 2.15
+DEFAULT_ENTRY_OVERHEAD = 8 * 1024 * 1024
+OVERHEAD_SAMPLES = 3  # Loads measured (the first also pays one-off TensorFlow setup)
+
+def user_model_prefix(user_id, models_dir=USERS_DIR):
+    '''
+    Per-user save()/load() prefix: <models_dir>/<user_id>/behavioral_auth
+    
+    Raises:
+        ValueError for IDs that aren't a single path component
+    '''
+    user_id = str(user_id)
+    if user_id in ('', '.', '..') or '/' in user_id or '\\' in user_id or '\0' in user_id:
+        raise ValueError(f'Invalid user ID: {user_id!r}')
+    return Path(models_dir) / user_id / MODEL_PREFIX
+
+def estimate_model_bytes(auth_model):
+    '''Size of a model's weight arrays (a small part of what a loaded model costs)'''
+    return int(sum(weights.nbytes for weights in auth_model.model.get_weights()))
+
+def resident_bytes():
+    '''Resident set size of this process, or None where /proc/self/statm isn't available'''
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+class RegistryEntry:
+    '''A loaded user model with its compiled scorer'''
+    
+    __slots__ = ('user_id', 'auth_model', 'scorer', 'nbytes', 'loaded_at')
+    
+    def __init__(self, user_id, auth_model, overhead=0):
+        self.user_id = user_id
+        self.auth_model = auth_model
+        self.scorer = FastAuthScorer(auth_model, unroll=False)
+        self.nbytes = estimate_model_bytes(auth_model) + overhead
+        self.loaded_at = time.time()
+
+class ModelRegistry:
+    '''
+    Per-user model registry with an LRU in-memory cache
+    
+    Models live on disk under <models_dir>/<user_id>/ (behavioral_auth_model.keras,
+    behavioral_auth_baseline.json and, with fused normalization,
+    behavioral_auth_scaler.json) and are loaded on first use. Least recently
+    used entries are evicted once the cached models exceed memory_budget_mb.
+    
+    Each entry is charged its weights plus a per-entry overhead for the
+    Keras/TensorFlow objects and traced graphs, which is many times the
+    weights. The overhead is the smallest resident-memory growth over the
+    first OVERHEAD_SAMPLES loads made before anything was evicted (freed
+    models' memory gets reused, which would hide the cost), else
+    DEFAULT_ENTRY_OVERHEAD, or entry_overhead_bytes if given. Concurrent
+    loads make it an estimate, not a hard limit.
+    
+    New entries get a dummy forward pass so the first real authentication
+    doesn't pay for graph tracing.
+    
+    Loads happen outside the registry lock (one loader per user), so a slow
+    load never blocks cache hits for other users.
+    '''
+    
+    def __init__(self, models_dir=USERS_DIR, memory_budget_mb=256, warm_up=True, entry_overhead_bytes=None):
+        self.models_dir = Path(models_dir)
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.warm_up = warm_up
+        
+        self.measure_overhead = entry_overhead_bytes is None and resident_bytes() is not None
+        self.entry_overhead = DEFAULT_ENTRY_OVERHEAD if entry_overhead_bytes is None else int(entry_overhead_bytes)
+        self.overhead_samples = []
+        
+        self.entries = OrderedDict()
+        self.memory_used = 0
+        self.lock = threading.Lock()
+        self.loading = {}
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+    
+    def __contains__(self, user_id):
+        return user_model_prefix(user_id, self.models_dir).with_name(f'{MODEL_PREFIX}_model.keras').exists()
+    
+    def list_users(self):
+        '''Enrolled user IDs on disk'''
+        if not self.models_dir.exists():
+            return []
+        return sorted(path.parent.name for path in self.models_dir.glob(f'*/{MODEL_PREFIX}_model.keras'))
+    
+    def load_entry(self, user_id):
+        prefix = user_model_prefix(user_id, self.models_dir)
+        measuring = self.measure_overhead and not self.evictions and len(self.overhead_samples) < OVERHEAD_SAMPLES
+        before = resident_bytes() if measuring else None
+        
+        auth_model = BehavioralAuthModel.load(str(prefix))
+        entry = RegistryEntry(user_id, auth_model)
+        if self.warm_up:
+            entry.scorer.errors(np.zeros((1, auth_model.timesteps, auth_model.features), dtype=np.float32))
+        
+        weights = entry.nbytes
+        if before is not None:
+            with self.lock:
+                self.overhead_samples.append(max(0, resident_bytes() - before - weights))
+                self.entry_overhead = min(self.overhead_samples)
+        entry.nbytes = weights + self.entry_overhead
+        
+        return entry
+    
+    def insert(self, entry):
+        '''Cache an entry as most recently used, evicting LRU entries over budget'''
+        previous = self.entries.pop(entry.user_id, None)
+        if previous is not None:
+            self.memory_used -= previous.nbytes
+        
+        self.entries[entry.user_id] = entry
+        self.memory_used += entry.nbytes
+        
+        # Always keep the newest entry, even if it alone exceeds the budget
+        while self.memory_used > self.memory_budget and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.memory_used -= evicted.nbytes
+            self.evictions += 1
+    
+    def get(self, user_id):
+        '''
+        Cached entry for a user, loading it from disk on a miss
+        
+        Raises:
+            ValueError if the user has no saved model
+        '''
+        with self.lock:
+            entry = self.lookup(user_id)
+            if entry is not None:
+                return entry
+        
+        # Checked before taking a loader, so unknown IDs never get a loading entry
+        if user_id not in self:
+            raise ValueError(f'No model enrolled for user {user_id}')
+        
+        with self.lock:
+            loader = self.loading.setdefault(user_id, threading.Lock())
+        
+        with loader:
+            try:
+                # Another thread may have loaded it while we waited
+                with self.lock:
+                    entry = self.lookup(user_id)
+                    if entry is not None:
+                        return entry
+                
+                start = time.perf_counter()
+                entry = self.load_entry(user_id)
+                
+                with self.lock:
+                    self.load_seconds += time.perf_counter() - start
+                    self.misses += 1
+                    self.insert(entry)
+                return entry
+            finally:
+                # Also on a failed load; a later waiter may already have replaced it
+                with self.lock:
+                    if self.loading.get(user_id) is loader:
+                        del self.loading[user_id]
+    
+    def lookup(self, user_id):
+        '''Cache hit path; caller holds self.lock'''
+        entry = self.entries.get(user_id)
+        if entry is not None:
+            self.entries.move_to_end(user_id)
+            self.hits += 1
+        return entry
+    
+    def authenticate(self, user_id, sample, threshold_multiplier=0.03):
+        entry = self.get(user_id)
+        _, deviations = entry.scorer.score_batch(sample)
+        return bool(deviations[0] < threshold_multiplier), float(deviations[0])
+    
+    def enroll(self, user_id, auth_model):
+        '''Save a trained model into the user layout and cache it'''
+        auth_model.save(str(user_model_prefix(user_id, self.models_dir)))
+        
+        entry = RegistryEntry(user_id, auth_model, self.entry_overhead)
+        with self.lock:
+            self.insert(entry)
+    
+    def evict(self, user_id):
+        with self.lock:
+            entry = self.entries.pop(user_id, None)
+            if entry is not None:
+                self.memory_used -= entry.nbytes
+                self.evictions += 1
+    
+    def get_statistics(self):
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                'cached_models': len(self.entries),
+                'memory_used_mb': self.memory_used / (1024 * 1024),
+                'memory_budget_mb': self.memory_budget / (1024 * 1024),
+                'entry_overhead_mb': self.entry_overhead / (1024 * 1024),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'avg_load_ms': self.load_seconds / self.misses * 1000 if self.misses else 0.0
+            }
+    
+    def print_summary(self):
+        stats = self.get_statistics()
+        
+        print('\n' + '='*60)
+        print('MODEL REGISTRY SUMMARY')
+        print('='*60)
+        print(f'Cached models:   {stats["cached_models"]}')
+        print(f'Memory (est.):   {stats["memory_used_mb"]:.2f} / {stats["memory_budget_mb"]:.2f} MB '
+              f'({stats["entry_overhead_mb"]:.2f} MB overhead per model)')
+        print(f'Hits / misses:   {stats["hits"]} / {stats["misses"]} ({stats["hit_rate"]*100:.1f}% hit rate)')
+        print(f'Evictions:       {stats["evictions"]}')
+        print(f'Avg load time:   {stats["avg_load_ms"]:.1f} ms')
+        print('='*60)
+
+if __name__ == '__main__':
+    print('='*60)
+    print('PER-USER MODEL REGISTRY')
+    print('='*60)
+    
+    try:
+        base_model = BehavioralAuthModel.load('../models/behavioral_auth')
+    except (OSError, ValueError) as e:
+        print(f'[!] Could not load model: {e}')
+        print('[!] Run model_trainer.py first')
+        exit(1)
+    
+    model_mb = (estimate_model_bytes(base_model) + DEFAULT_ENTRY_OVERHEAD) / (1024 * 1024)
+    
+    # Budget for about 3 models, so the access pattern below forces evictions
+    registry = ModelRegistry(USERS_DIR, memory_budget_mb=model_mb * 3.5)
+    
+    print('\n[*] Enrolling demo users...')
+    for user_id in ['alice', 'bob', 'carol', 'dave']:
+        if user_id not in registry:
+            registry.enroll(user_id, base_model)
+    print(f'[✓] Enrolled: {", ".join(registry.list_users())}')
+    
+    sample = np.zeros((1, base_model.timesteps, base_model.features), dtype=np.float32)
+    for user_id in ['alice', 'bob', 'alice', 'carol', 'dave', 'alice', 'bob', 'alice']:
+        start = time.perf_counter()
+        registry.authenticate(user_id, sample)
+        print(f'    {user_id:6s} {(time.perf_counter() - start) * 1000:8.1f} ms')
+    
+    registry.print_summary()
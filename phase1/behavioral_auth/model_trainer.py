@@ -4,6 +4,8 @@ from tensorflow import keras
 from tensorflow.keras import layers
 import json
 from pathlib import Path
+from sequence_dataset import load_sequences
+from scaler_params import SCALER_SUFFIX, load_scaler_params
 
 class BehavioralAuthModel:
     
@@ -12,6 +14,8 @@ class BehavioralAuthModel:
         self.features = features
         self.model = None
         self.baseline = None
+        self.scaler = None
+        self.error_scale = None
     
     def build_model(self):
         print('\n[*] Building model architecture...')
@@ -46,7 +50,49 @@ class BehavioralAuthModel:
         
         return self.model
     
+    def fuse_normalization(self, scaler):
+        '''
+        Bake feature normalization into the model graph
+        
+        The trained autoencoder is wrapped between a Normalization layer and
+        its inverse, so the model takes raw feature windows and returns raw
+        reconstructions. Errors are divided by the scaler's scale, which gives
+        exactly the normalized-space error the baseline was measured in.
+        
+        Args:
+            scaler: {'mean', 'scale'} parameters (see scaler_params)
+        '''
+        if self.model is None:
+            raise ValueError('Model not trained!')
+        
+        mean = np.asarray(scaler['mean'], dtype=np.float32)
+        scale = np.asarray(scaler['scale'], dtype=np.float32)
+        
+        # variance = scale**2 keeps StandardScaler's unit scale for constant features
+        inputs = keras.Input(shape=(self.timesteps, self.features), name='raw_input')
+        x = layers.Normalization(axis=-1, mean=mean, variance=scale ** 2, name='normalize')(inputs)
+        for layer in self.model.layers[1:]:
+            x = layer(x)
+        outputs = layers.Normalization(axis=-1, mean=mean, variance=scale ** 2, invert=True, name='denormalize')(x)
+        
+        self.model = keras.Model(inputs, outputs, name='BehavioralAuth')
+        self.scaler = scaler
+        self.error_scale = scale
+        
+        print('[✓] Normalization fused into model')
+        return self.model
+    
+    def reconstruction_errors(self, samples, reconstructed):
+        '''Mean absolute error per sample, in normalized feature units'''
+        diff = np.abs(samples - reconstructed)
+        if self.error_scale is not None:
+            diff = diff / self.error_scale
+        return np.mean(diff, axis=(1, 2))
+    
     def train(self, training_data, epochs=30, batch_size=16):
+        if self.error_scale is not None:
+            raise ValueError('Train before fusing normalization')
+        
         print('\n' + '='*60)
         print('TRAINING BEHAVIORAL AUTHENTICATION MODEL')
         print('='*60)
@@ -93,7 +139,7 @@ class BehavioralAuthModel:
             raise ValueError('Model not trained!')
         
         reconstructed = self.model.predict(sample, verbose=0)
-        error = np.mean(np.abs(sample - reconstructed))
+        error = np.mean(self.reconstruction_errors(sample, reconstructed))
         
         expected = self.baseline['mean_error']
         deviation = abs(error - expected) / expected
@@ -102,8 +148,30 @@ class BehavioralAuthModel:
         
         return is_authentic, deviation
     
+    def score_batch(self, samples, threshold_multiplier=0.03):
+        '''
+        Authenticate many samples with a single forward pass
+        
+        Args:
+            samples: (batch, timesteps, features) array
+        
+        Returns:
+            (is_authentic, deviation) arrays, one entry per sample
+        '''
+        if self.model is None or self.baseline is None:
+            raise ValueError('Model not trained!')
+        
+        samples = np.asarray(samples, dtype=np.float32)
+        reconstructed = np.asarray(self.model.predict_on_batch(samples))
+        errors = self.reconstruction_errors(samples, reconstructed)
+        
+        expected = self.baseline['mean_error']
+        deviations = np.abs(errors - expected) / expected
+        
+        return deviations < threshold_multiplier, deviations
+    
     def save(self, filepath='../models/behavioral_auth'):
-        Path('../models').mkdir(exist_ok=True)
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
         
         model_path = f'{filepath}_model.keras'
         baseline_path = f'{filepath}_baseline.json'
@@ -116,6 +184,33 @@ class BehavioralAuthModel:
         print(f'\n[✓] Model saved:')
         print(f'    {model_path}')
         print(f'    {baseline_path}')
+        
+        if self.scaler is not None:
+            scaler_path = f'{filepath}{SCALER_SUFFIX}'
+            with open(scaler_path, 'w') as f:
+                json.dump(self.scaler, f, indent=2)
+            print(f'    {scaler_path}')
+    
+    @classmethod
+    def load(cls, filepath='../models/behavioral_auth'):
+        '''Load a model written by save() (same filepath prefix)'''
+        model = keras.models.load_model(f'{filepath}_model.keras')
+        
+        with open(f'{filepath}_baseline.json', 'r') as f:
+            baseline = json.load(f)
+        
+        _, timesteps, features = model.input_shape
+        auth_model = cls(timesteps=timesteps, features=features)
+        auth_model.model = model
+        auth_model.baseline = baseline
+        
+        # Scaler parameters only apply to models with fused normalization
+        scaler_path = Path(f'{filepath}{SCALER_SUFFIX}')
+        if scaler_path.exists() and any(layer.name == 'normalize' for layer in model.layers):
+            auth_model.scaler = load_scaler_params(scaler_path)
+            auth_model.error_scale = np.asarray(auth_model.scaler['scale'], dtype=np.float32)
+        
+        return auth_model
 
 if __name__ == '__main__':
     print('='*60)
@@ -125,14 +220,18 @@ if __name__ == '__main__':
     
     print('\n[1/4] Loading training data...')
     
+    features_path = Path('../data/window_features.npy')
     dataset_path = Path('../data/training_dataset.npy')
     
-    if not dataset_path.exists():
-        print('[!] Error: training_dataset.npy not found')
+    if features_path.exists():
+        dataset = load_sequences(features_path, timesteps=10)
+    elif dataset_path.exists():
+        dataset = np.load(dataset_path)
+    else:
+        print('[!] Error: window_features.npy not found')
         print('[!] Run feature_extractor.py first')
         exit(1)
     
-    dataset = np.load(dataset_path)
     print(f'[✓] Loaded dataset: {dataset.shape}')
     
     print('\n[2/4] Building and training model...')
@@ -141,11 +240,19 @@ if __name__ == '__main__':
     history = model.train(dataset, epochs=30, batch_size=16)
     
     print('\n[3/4] Saving model...')
+    scaler_path = Path(f'../models/behavioral_auth{SCALER_SUFFIX}')
+    normal_sample = np.array(dataset[0:1])
+    
+    if scaler_path.exists():
+        scaler = load_scaler_params(scaler_path)
+        model.fuse_normalization(scaler)
+        # Fused model takes raw features
+        normal_sample = normal_sample * np.asarray(scaler['scale']) + np.asarray(scaler['mean'])
+    
     model.save('../models/behavioral_auth')
     
     print('\n[4/4] Testing authentication...')
     
-    normal_sample = dataset[0:1]
     is_auth, deviation = model.authenticate(normal_sample)
     
     print(f'\nTest 1 - Normal behavior:')
@@ -153,7 +260,7 @@ if __name__ == '__main__':
     print(f'  📊 Deviation: {deviation*100:.2f}%')
     
     anomaly = normal_sample.copy()
-    anomaly += np.random.normal(0, 0.5, anomaly.shape)
+    anomaly += np.random.normal(0, 0.5, anomaly.shape) * (model.error_scale if model.error_scale is not None else 1)
     is_auth, deviation = model.authenticate(anomaly)
     
     print(f'\nTest 2 - Anomalous behavior:')
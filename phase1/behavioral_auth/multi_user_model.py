@@ -0,0 +1,188 @@
+﻿import json
+from pathlib import Path
+import numpy as np
+from tensorflow import keras
+from tensorflow.keras import layers
+
+class MultiUserAuthModel:
+    '''
+    Shared-weights LSTM autoencoder for many users
+    
+    One autoencoder (same shape as BehavioralAuthModel) conditioned on a
+    learned per-user embedding, fed to both encoder and decoder. Every user
+    keeps their own baseline, so deviation is computed exactly as in
+    BehavioralAuthModel.authenticate, but one batched call can score
+    samples from any mix of users.
+    '''
+    
+    def __init__(self, user_ids, timesteps=10, features=9, embedding_dim=8):
+        self.user_index = {str(user_id): i for i, user_id in enumerate(user_ids)}
+        self.timesteps = timesteps
+        self.features = features
+        self.embedding_dim = embedding_dim
+        self.model = None
+        self.baselines = None
+    
+    def build_model(self):
+        print('\n[*] Building multi-user model architecture...')
+        
+        sample = keras.Input(shape=(self.timesteps, self.features), name='input')
+        user = keras.Input(shape=(1,), dtype='int32', name='user')
+        
+        embedding = layers.Embedding(len(self.user_index), self.embedding_dim, name='user_embedding')(user)
+        embedding = layers.Flatten(name='user_flatten')(embedding)
+        user_steps = layers.RepeatVector(self.timesteps, name='user_repeat')(embedding)
+        
+        x = layers.Concatenate(name='encoder_condition')([sample, user_steps])
+        x = layers.LSTM(64, return_sequences=True, name='encoder_lstm1')(x)
+        x = layers.Dropout(0.2, name='encoder_dropout1')(x)
+        encoded = layers.LSTM(32, return_sequences=False, name='encoder_lstm2')(x)
+        
+        x = layers.RepeatVector(self.timesteps, name='decoder_repeat')(encoded)
+        x = layers.Concatenate(name='decoder_condition')([x, user_steps])
+        x = layers.LSTM(32, return_sequences=True, name='decoder_lstm1')(x)
+        x = layers.Dropout(0.2, name='decoder_dropout1')(x)
+        x = layers.LSTM(64, return_sequences=True, name='decoder_lstm2')(x)
+        
+        outputs = layers.TimeDistributed(
+            layers.Dense(self.features, name='output_dense'),
+            name='output'
+        )(x)
+        
+        self.model = keras.Model([sample, user], outputs, name='MultiUserBehavioralAuth')
+        
+        self.model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=0.001),
+            loss='mse',
+            metrics=['mae']
+        )
+        
+        print('[✓] Model built successfully')
+        print(f'    Users: {len(self.user_index)}')
+        print(f'    Total parameters: {self.model.count_params():,}')
+        
+        return self.model
+    
+    def user_indices(self, user_ids):
+        try:
+            return np.array([self.user_index[str(user_id)] for user_id in user_ids], dtype=np.int32)
+        except KeyError as e:
+            raise ValueError(f'Unknown user {e.args[0]}')
+    
+    def reconstruction_errors(self, samples, indices):
+        samples = np.asarray(samples, dtype=np.float32)
+        reconstructed = np.asarray(self.model.predict_on_batch([samples, indices[:, None]]))
+        return np.mean(np.abs(samples - reconstructed), axis=(1, 2))
+    
+    def train(self, samples_by_user, epochs=30, batch_size=16):
+        '''
+        Train the shared model on every user's sequences
+        
+        Args:
+            samples_by_user: {user_id: (samples, timesteps, features) array}
+        '''
+        user_ids = list(samples_by_user)
+        samples = np.concatenate([np.asarray(samples_by_user[user_id], dtype=np.float32) for user_id in user_ids])
+        indices = np.concatenate([
+            np.full(len(samples_by_user[user_id]), self.user_index[str(user_id)], dtype=np.int32)
+            for user_id in user_ids
+        ])
+        
+        print('\n' + '='*60)
+        print('TRAINING MULTI-USER AUTHENTICATION MODEL')
+        print('='*60)
+        print(f'\nUsers: {len(user_ids)}')
+        print(f'Training samples: {len(samples)}')
+        print(f'Epochs: {epochs}\n')
+        
+        if self.model is None:
+            self.build_model()
+        
+        # Shuffle before fit so validation_split isn't just the last users
+        order = np.random.permutation(len(samples))
+        history = self.model.fit(
+            [samples[order], indices[order, None]],
+            samples[order],
+            epochs=epochs,
+            batch_size=batch_size,
+            validation_split=0.2,
+            verbose=1
+        )
+        
+        print('\n[*] Calculating per-user baseline errors...')
+        errors = np.concatenate([
+            self.reconstruction_errors(samples[start:start + 1024], indices[start:start + 1024])
+            for start in range(0, len(samples), 1024)
+        ])
+        
+        self.baselines = {}
+        for user_id in user_ids:
+            user_errors = errors[indices == self.user_index[str(user_id)]]
+            self.baselines[str(user_id)] = {
+                'mean_error': float(np.mean(user_errors)),
+                'std_error': float(np.std(user_errors)),
+                'threshold': float(np.mean(user_errors) + 2 * np.std(user_errors))
+            }
+        
+        print(f'[✓] Baselines for {len(self.baselines)} users')
+        return history
+    
+    def score_batch(self, samples, user_ids, threshold_multiplier=0.03):
+        '''
+        Authenticate samples from any mix of users in one forward pass
+        
+        Args:
+            samples: (batch, timesteps, features) array
+            user_ids: Claimed user for each sample
+        
+        Returns:
+            (is_authentic, deviation) arrays, one entry per sample
+        '''
+        if self.model is None or self.baselines is None:
+            raise ValueError('Model not trained!')
+        
+        indices = self.user_indices(user_ids)
+        errors = self.reconstruction_errors(samples, indices)
+        
+        expected = np.array([self.baselines[str(user_id)]['mean_error'] for user_id in user_ids])
+        deviations = np.abs(errors - expected) / expected
+        
+        return deviations < threshold_multiplier, deviations
+    
+    def authenticate(self, sample, user_id, threshold_multiplier=0.03):
+        samples = np.asarray(sample, dtype=np.float32).reshape(1, self.timesteps, self.features)
+        is_authentic, deviations = self.score_batch(samples, [user_id], threshold_multiplier)
+        return bool(is_authentic[0]), float(deviations[0])
+    
+    def save(self, filepath='../models/multi_user_auth'):
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+        
+        model_path = f'{filepath}_model.keras'
+        baseline_path = f'{filepath}_baselines.json'
+        
+        self.model.save(model_path)
+        
+        with open(baseline_path, 'w') as f:
+            json.dump({
+                'users': list(self.user_index),
+                'embedding_dim': self.embedding_dim,
+                'baselines': self.baselines
+            }, f, indent=2)
+        
+        print(f'\n[✓] Model saved:')
+        print(f'    {model_path}')
+        print(f'    {baseline_path}')
+    
+    @classmethod
+    def load(cls, filepath='../models/multi_user_auth'):
+        '''Load a model written by save() (same filepath prefix)'''
+        model = keras.models.load_model(f'{filepath}_model.keras')
+        
+        with open(f'{filepath}_baselines.json', 'r') as f:
+            saved = json.load(f)
+        
+        _, timesteps, features = model.input_shape[0]
+        auth_model = cls(saved['users'], timesteps, features, saved['embedding_dim'])
+        auth_model.model = model
+        auth_model.baselines = saved['baselines']
+        return auth_model
@@ -0,0 +1,171 @@
+﻿import argparse
+import json
+from pathlib import Path
+import numpy as np
+import tensorflow as tf
+from fast_inference import TFLiteScorer, deviation_from_error, export_tflite, time_per_call
+from model_trainer import BehavioralAuthModel
+from sequence_dataset import load_sequences
+
+# (optimizations, supported_types) per variant; int8 is dynamic-range
+# quantization (int8 weights, float activations), so no calibration data
+VARIANTS = {
+    'float32': (None, None),
+    'float16': ([tf.lite.Optimize.DEFAULT], [tf.float16]),
+    'int8': ([tf.lite.Optimize.DEFAULT], None)
+}
+
+def derive_baseline(errors):
+    '''Baseline in BehavioralAuthModel.train's format from genuine reconstruction errors'''
+    return {
+        'mean_error': float(np.mean(errors)),
+        'std_error': float(np.std(errors)),
+        'threshold': float(np.mean(errors) + 2 * np.std(errors))
+    }
+
+def split_by_time(sequences, timesteps):
+    '''
+    Calibration / held-out split of time-ordered sliding-window sequences
+    
+    Consecutive sequences (step 1) share timesteps - 1 windows, so a random
+    split puts near-copies of calibration sequences in the held-out set.
+    The earlier part calibrates; the held-out part starts after a gap of
+    timesteps windows that no sequence on either side uses.
+    
+    Returns:
+        (calibration, held_out) contiguous arrays
+    '''
+    # Sequence i uses windows [i, i + timesteps), so calibration uses windows
+    # below half + timesteps - 1; starting the held-out part 2 * timesteps - 1
+    # sequences later leaves windows [half + timesteps - 1, half + 2 * timesteps - 1) unused
+    skip = 2 * timesteps - 1
+    half = (len(sequences) - skip) // 2
+    if half < 1:
+        raise ValueError(f'Need more than {skip + 1} sequences to split, got {len(sequences)}')
+    return np.ascontiguousarray(sequences[:half]), np.ascontiguousarray(sequences[half + skip:])
+
+def error_rates(genuine_errors, impostor_errors, baseline, threshold_multiplier):
+    '''
+    False-accept / false-reject rates for authenticate() and the baseline threshold
+    
+    Returns:
+        Dict with far/frr (authenticate: deviation < threshold_multiplier) and
+        threshold_far/threshold_frr (error <= baseline threshold)
+    '''
+    genuine_ok, _ = deviation_from_error(genuine_errors, baseline, threshold_multiplier)
+    impostor_ok, _ = deviation_from_error(impostor_errors, baseline, threshold_multiplier)
+    return {
+        'far': float(np.mean(impostor_ok)),
+        'frr': float(np.mean(~genuine_ok)),
+        'threshold_far': float(np.mean(impostor_errors <= baseline['threshold'])),
+        'threshold_frr': float(np.mean(genuine_errors > baseline['threshold']))
+    }
+
+def evaluate_variants(auth_model, calibration, genuine, impostor, output_prefix, threshold_multiplier=0.03,
+                      latency_samples=200):
+    '''
+    Export each variant, re-derive its baseline and measure quality and speed
+    
+    Args:
+        calibration: Genuine sequences used to re-derive each variant's baseline
+        genuine / impostor: Held-out sequences for FRR / FAR
+        output_prefix: Variants are written to <prefix>_<variant>.tflite with
+            their baseline in <prefix>_<variant>_baseline.json
+    
+    Returns:
+        {variant: metrics dict}
+    '''
+    results = {}
+    for variant, (optimizations, supported_types) in VARIANTS.items():
+        model_path = f'{output_prefix}_{variant}.tflite'
+        size = export_tflite(auth_model, model_path, optimizations, supported_types)
+        scorer = TFLiteScorer(model_path, auth_model.baseline, auth_model.timesteps, auth_model.features,
+                              threshold_multiplier, error_scale=auth_model.error_scale)
+        
+        # Quantization shifts reconstruction error, so the float32 baseline
+        # would misplace the acceptance band; each variant gets its own
+        scorer.baseline = derive_baseline(scorer.errors(calibration))
+        with open(f'{output_prefix}_{variant}_baseline.json', 'w') as f:
+            json.dump(scorer.baseline, f, indent=2)
+        
+        genuine_errors = scorer.errors(genuine)
+        impostor_errors = scorer.errors(impostor)
+        latency = time_per_call(scorer.authenticate, genuine[:latency_samples])
+        
+        results[variant] = {
+            'model_path': model_path,
+            'size_bytes': size,
+            'latency_ms': latency * 1000,
+            'baseline': scorer.baseline,
+            **error_rates(genuine_errors, impostor_errors, scorer.baseline, threshold_multiplier)
+        }
+        print(f'[✓] {variant}: {size / 1024:.1f} KB, {latency * 1000:.3f} ms/sample')
+    
+    reference = results['float32']
+    for metrics in results.values():
+        metrics['size_ratio'] = metrics['size_bytes'] / reference['size_bytes']
+        metrics['speedup'] = reference['latency_ms'] / metrics['latency_ms']
+    
+    return results
+
+def print_report(results):
+    print('\n' + '='*60)
+    print('QUANTIZATION REPORT')
+    print('='*60)
+    print(f'{"":10s}{"KB":>8s}{"ms":>8s}{"speedup":>9s}{"FAR":>7s}{"FRR":>7s}{"thrFAR":>8s}{"thrFRR":>8s}')
+    for variant, metrics in results.items():
+        print(f'{variant:10s}{metrics["size_bytes"] / 1024:>8.1f}{metrics["latency_ms"]:>8.3f}'
+              f'{metrics["speedup"]:>8.2f}x{metrics["far"]:>7.1%}{metrics["frr"]:>7.1%}'
+              f'{metrics["threshold_far"]:>8.1%}{metrics["threshold_frr"]:>8.1%}')
+    print('\nFAR/FRR: authenticate() (deviation < threshold_multiplier)')
+    print('thrFAR/thrFRR: error vs baseline threshold (mean + 2 std)')
+    print('='*60)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='float16 / int8 TFLite variants with accuracy and latency report')
+    parser.add_argument('--model', default='../models/behavioral_auth')
+    parser.add_argument('--features', default='../data/window_features.npy')
+    parser.add_argument('--threshold-multiplier', type=float, default=0.03)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='../logs/quantization_report.json')
+    args = parser.parse_args()
+    
+    print('='*60)
+    print('POST-TRAINING QUANTIZATION')
+    print('='*60)
+    
+    try:
+        auth_model = BehavioralAuthModel.load(args.model)
+    except (OSError, ValueError) as e:
+        print(f'[!] Could not load model: {e}')
+        print('[!] Run model_trainer.py first')
+        exit(1)
+    
+    if not Path(args.features).exists():
+        print(f'[!] {args.features} not found, run feature_extractor.py first')
+        exit(1)
+    
+    sequences = load_sequences(args.features, timesteps=auth_model.timesteps)
+    rng = np.random.default_rng(args.seed)
+    
+    # Same impostor model as continuous_auth.py: behaviour far from the enrolled
+    # user's, generated in normalized feature space
+    impostor = rng.normal(0, 1.5, sequences.shape).astype(np.float32)
+    if auth_model.scaler is not None:
+        # Saved windows are normalized; a fused model takes raw features
+        scale = np.asarray(auth_model.scaler['scale'], dtype=np.float32)
+        mean = np.asarray(auth_model.scaler['mean'], dtype=np.float32)
+        sequences = sequences * scale + mean
+        impostor = impostor * scale + mean
+    
+    calibration, genuine = split_by_time(sequences, auth_model.timesteps)
+    print(f'\n[*] Calibration: {len(calibration)}  Genuine: {len(genuine)}  Impostor: {len(impostor)}\n')
+    
+    results = evaluate_variants(auth_model, calibration, genuine, impostor, args.model, args.threshold_multiplier)
+    print_report(results)
+    
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'\n[✓] Report saved to {output}')
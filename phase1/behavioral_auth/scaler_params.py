@@ -0,0 +1,41 @@
+﻿import json
+from pathlib import Path
+import numpy as np
+
+SCALER_SUFFIX = '_scaler.json'
+
+def fit_scaler_params(features):
+    '''StandardScaler-equivalent parameters (zero variance columns scale by 1)'''
+    features = np.asarray(features, dtype=np.float64)
+    mean = features.mean(axis=0)
+    var = features.var(axis=0)
+    scale = np.sqrt(var)
+    scale[scale == 0] = 1.0
+    return {
+        'mean': mean.tolist(),
+        'var': var.tolist(),
+        'scale': scale.tolist(),
+        'n_samples': int(len(features))
+    }
+
+def scaler_to_params(scaler):
+    '''Plain parameters from a fitted sklearn StandardScaler (no sklearn import needed)'''
+    return {
+        'mean': np.asarray(scaler.mean_).tolist(),
+        'var': np.asarray(scaler.var_).tolist(),
+        'scale': np.asarray(scaler.scale_).tolist(),
+        'n_samples': int(np.max(scaler.n_samples_seen_))
+    }
+
+def save_scaler_params(params, filepath):
+    Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+    with open(filepath, 'w') as f:
+        json.dump(params, f, indent=2)
+
+def load_scaler_params(filepath):
+    with open(filepath, 'r') as f:
+        return json.load(f)
+
+def normalize(features, params):
+    '''Same transform as StandardScaler.transform'''
+    return (np.asarray(features) - np.asarray(params['mean'])) / np.asarray(params['scale'])
@@ -0,0 +1,44 @@
+﻿import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def build_sequences(window_features, timesteps=10, step=1):
+    '''
+    LSTM input sequences as a zero-copy view over per-window features
+    
+    Sequence i is rows [i*step, i*step + timesteps) of window_features, so
+    consecutive timesteps are consecutive feature windows. No data is copied;
+    the result is a read-only strided view (works on memory-mapped arrays too).
+    
+    Args:
+        window_features: (n_windows, features) array, time ordered
+        timesteps: Windows per sequence
+        step: Windows between the starts of consecutive sequences
+    
+    Returns:
+        (samples, timesteps, features) view
+    '''
+    window_features = np.asarray(window_features)
+    
+    if window_features.ndim != 2:
+        raise ValueError(f'Expected (windows, features), got shape {window_features.shape}')
+    
+    if len(window_features) < timesteps:
+        return np.empty((0, timesteps, window_features.shape[1]), dtype=window_features.dtype)
+    
+    # sliding_window_view puts the window axis last: (samples, features, timesteps)
+    view = sliding_window_view(window_features, timesteps, axis=0)
+    return view[::step].transpose(0, 2, 1)
+
+def save_window_features(window_features, filepath):
+    '''Store per-window features contiguously as the backing array for sequences'''
+    np.save(filepath, np.ascontiguousarray(window_features, dtype=np.float32))
+
+def load_sequences(filepath, timesteps=10, step=1, mmap=True):
+    '''
+    Open saved window features and return the sequence view
+    
+    With mmap=True the .npy is memory-mapped, so only the pages a batch
+    touches are read from disk.
+    '''
+    window_features = np.load(filepath, mmap_mode='r' if mmap else None)
+    return build_sequences(window_features, timesteps, step)
@@ -0,0 +1,292 @@
+﻿import heapq
+import json
+import math
+from bisect import bisect_left, insort
+from collections import deque
+import numpy as np
+from tremor_features import tremor_features
+
+BASE_FEATURES = 9  # Model input: 5 mouse + 4 keyboard
+BAND_POWER = 9  # Index of the optional tremor band-power column
+
+def iter_events(filepath):
+    '''Yield events from a JSONL capture file one line at a time'''
+    with open(filepath, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def merge_event_streams(mouse_events, key_events):
+    '''Merge two timestamp-ordered event streams into one tagged stream'''
+    mouse = (('mouse', event) for event in mouse_events)
+    keys = (('key', event) for event in key_events)
+    return heapq.merge(mouse, keys, key=lambda item: item[1]['timestamp'])
+
+class WindowedStats:
+    '''
+    Order statistics over a sliding window
+    
+    Keeps a sorted copy of the window for median/percentiles and shifted
+    running sums for mean/std, so nothing is recomputed from scratch when
+    the window slides. Each update is an O(log n) bisect plus an O(n)
+    list insert/delete; the shift is a single memmove, which for windows
+    of a few thousand events costs less than a tree structure would.
+    '''
+    
+    def __init__(self):
+        self.values = deque()
+        self.sorted_values = []
+        self.shift = None
+        self.total = 0.0
+        self.total_sq = 0.0
+    
+    def __len__(self):
+        return len(self.values)
+    
+    def add(self, value):
+        if self.shift is None:
+            self.shift = value
+        delta = value - self.shift
+        self.total += delta
+        self.total_sq += delta * delta
+        self.values.append(value)
+        insort(self.sorted_values, value)
+    
+    def remove_oldest(self):
+        value = self.values.popleft()
+        del self.sorted_values[bisect_left(self.sorted_values, value)]
+        
+        if not self.values:
+            self.shift = None
+            self.total = 0.0
+            self.total_sq = 0.0
+            return value
+        
+        delta = value - self.shift
+        self.total -= delta
+        self.total_sq -= delta * delta
+        return value
+    
+    def mean(self):
+        return self.shift + self.total / len(self.values)
+    
+    def std(self):
+        n = len(self.values)
+        mean_delta = self.total / n
+        return math.sqrt(max(0.0, self.total_sq / n - mean_delta * mean_delta))
+    
+    def percentile(self, q):
+        '''Linear interpolation, matching np.percentile's default'''
+        position = (len(self.sorted_values) - 1) * q / 100.0
+        lower = math.floor(position)
+        upper = min(lower + 1, len(self.sorted_values) - 1)
+        fraction = position - lower
+        return self.sorted_values[lower] + (self.sorted_values[upper] - self.sorted_values[lower]) * fraction
+
+class StreamingFeatureExtractor:
+    '''
+    Sliding time-window version of BehavioralFeatureExtractor
+    
+    Consumes mouse and keyboard events in timestamp order and emits the same
+    9 features (5 mouse + 4 keyboard) for every window of window_seconds,
+    advancing by stride_seconds. Only events inside the current window are
+    held in memory; statistics are updated as events enter and leave.
+    
+    The tremor feature needs the raw trajectory, so completed windows are
+    held back in groups of tremor_batch and their spectra computed in one
+    batched FFT (tremor_batch=1 emits every window immediately).
+    
+    With band_power=True each window gets a 10th column (BAND_POWER): the
+    share of mouse velocity power in the tremor band, 0.0 when unmeasurable.
+    The auth models take the first BASE_FEATURES columns.
+    '''
+    
+    def __init__(self, window_seconds=30.0, stride_seconds=5.0, tremor_batch=64, band_power=False):
+        if stride_seconds <= 0 or window_seconds <= 0:
+            raise ValueError('window_seconds and stride_seconds must be positive')
+        
+        self.window_seconds = window_seconds
+        self.stride_seconds = stride_seconds
+        self.tremor_batch = max(1, tremor_batch)
+        self.n_features = BASE_FEATURES + 1 if band_power else BASE_FEATURES
+        self.reset()
+    
+    def reset(self):
+        self.window_start = None
+        self.move_points = deque()
+        self.pending = []
+        self.move_times = deque()
+        self.move_intervals = WindowedStats()
+        self.key_times = deque()
+        self.flight_times = deque()
+        self.flights = WindowedStats()
+        self.pause_count = 0
+    
+    def add_event(self, source, event):
+        if source == 'mouse':
+            if event.get('type') == 'move':
+                self.move_times.append(event['timestamp'])
+                self.move_intervals.add(event['interval'])
+                self.move_points.append((event['timestamp'], event['x'], event['y']))
+        else:
+            flight_time = event.get('flight_time', 0)
+            self.key_times.append(event['timestamp'])
+            self.flight_times.append(flight_time)
+            if flight_time > 0:
+                self.flights.add(flight_time)
+                if flight_time > 1.0:
+                    self.pause_count += 1
+    
+    def evict_before(self, cutoff):
+        while self.move_times and self.move_times[0] < cutoff:
+            self.move_times.popleft()
+            self.move_intervals.remove_oldest()
+        
+        while self.key_times and self.key_times[0] < cutoff:
+            self.key_times.popleft()
+            flight_time = self.flight_times.popleft()
+            if flight_time > 0:
+                self.flights.remove_oldest()
+                if flight_time > 1.0:
+                    self.pause_count -= 1
+    
+    def is_empty(self):
+        return not self.move_times and not self.key_times
+    
+    def current_features(self):
+        '''Feature vector for the events currently in the window (tremor columns filled by flush_pending)'''
+        features = np.zeros(self.n_features)
+        
+        # Same minimum-sample rules as the batch extractor
+        if len(self.move_intervals) >= 10:
+            stats = self.move_intervals
+            features[:5] = [
+                stats.mean(),
+                stats.std(),
+                stats.percentile(50),
+                stats.percentile(75),
+                0.0  # Filled in by flush_pending
+            ]
+        
+        if len(self.key_times) >= 5 and len(self.flights) >= 2:
+            stats = self.flights
+            features[5:BASE_FEATURES] = [
+                stats.mean(),
+                stats.std(),
+                stats.percentile(50),
+                self.pause_count / len(stats)
+            ]
+        
+        return features
+    
+    def flush_pending(self):
+        '''Fill in tremor for held-back windows with one batched FFT and emit them'''
+        if not self.pending:
+            return
+        
+        points = np.array(self.move_points, dtype=np.float64).reshape(-1, 3)
+        starts = np.array([window_start for window_start, _ in self.pending])
+        peak_hz, band_power = tremor_features(points[:, 0], points[:, 1], points[:, 2], starts, self.window_seconds)
+        
+        for (window_start, features), peak, power in zip(self.pending, peak_hz, band_power):
+            if features[0] != 0 and not np.isnan(peak):
+                features[4] = peak
+                if self.n_features > BAND_POWER:
+                    features[BAND_POWER] = power
+            yield window_start, features
+        
+        self.pending = []
+        
+        # Keep one point before the current window so interpolation has an anchor
+        while len(self.move_points) > 1 and self.move_points[1][0] <= self.window_start:
+            self.move_points.popleft()
+    
+    def process(self, events):
+        '''
+        Emit features for every completed window
+        
+        Args:
+            events: Iterable of (source, event) pairs in timestamp order,
+                source being 'mouse' or 'key' (see merge_event_streams)
+        
+        Yields:
+            (window_start, features) with features an n_features-element
+            array, in window order
+        '''
+        for source, event in events:
+            timestamp = event['timestamp']
+            
+            if self.window_start is None:
+                self.window_start = timestamp
+            
+            while timestamp >= self.window_start + self.window_seconds:
+                if not self.is_empty():
+                    self.pending.append((self.window_start, self.current_features()))
+                    if len(self.pending) >= self.tremor_batch:
+                        yield from self.flush_pending()
+                
+                self.window_start += self.stride_seconds
+                self.evict_before(self.window_start)
+                
+                # Skip idle gaps instead of emitting empty windows
+                if self.is_empty() and timestamp >= self.window_start + self.window_seconds:
+                    steps = math.floor((timestamp - self.window_start - self.window_seconds) / self.stride_seconds) + 1
+                    self.window_start += steps * self.stride_seconds
+            
+            self.add_event(source, event)
+        
+        yield from self.flush_pending()
+    
+    def process_files(self, mouse_file, key_file):
+        '''Stream windows straight from a pair of JSONL capture files'''
+        self.reset()
+        return self.process(merge_event_streams(iter_events(mouse_file), iter_events(key_file)))
+    
+    def extract_window_features(self, mouse_file, key_file):
+        '''
+        Window features for a capture session as arrays
+        
+        Returns:
+            (window_starts, features) with shapes (n,) and (n, n_features)
+        '''
+        starts = []
+        rows = []
+        for window_start, features in self.process_files(mouse_file, key_file):
+            starts.append(window_start)
+            rows.append(features)
+        
+        if not rows:
+            return np.zeros(0), np.zeros((0, self.n_features))
+        
+        return np.array(starts), np.vstack(rows)
+
+if __name__ == '__main__':
+    import sys
+    from pathlib import Path
+    
+    print('='*60)
+    print('STREAMING FEATURE EXTRACTION')
+    print('='*60)
+    
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path('../data')
+    mouse_files = sorted(data_dir.glob('mouse_*.jsonl'))
+    key_files = sorted(data_dir.glob('keys_*.jsonl'))
+    
+    if not mouse_files or not key_files:
+        print('[!] No data files found in', data_dir)
+        sys.exit(1)
+    
+    extractor = StreamingFeatureExtractor(window_seconds=30.0, stride_seconds=5.0, band_power=True)
+    starts, features = extractor.extract_window_features(mouse_files[0], key_files[0])
+    band_power = features[:, BAND_POWER]
+    features = features[:, :BASE_FEATURES]
+    
+    print(f'\n[*] {mouse_files[0].name} + {key_files[0].name}')
+    print(f'    Windows: {len(features)} ({extractor.window_seconds:.0f}s, stride {extractor.stride_seconds:.0f}s)')
+    
+    if len(features):
+        np.save(data_dir / 'window_features.npy', features)
+        print(f'    Mouse interval avg: {np.mean(features[:, 0]):.6f}')
+        print(f'    Key flight time:    {np.mean(features[:, 5]):.3f} sec')
+        print(f'    Tremor band power:  {np.mean(band_power):.3f} of mouse velocity power')
+        print(f'\n[✓] Window features saved to {data_dir / "window_features.npy"}')
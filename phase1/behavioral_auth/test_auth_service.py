@@ -0,0 +1,114 @@
+﻿import threading
+import numpy as np
+import pytest
+from auth_service import MicroBatchAuthService
+
+class StubModel:
+    '''score_batch stand-in: deviation is the sample's first value; optionally blocks until released'''
+    
+    timesteps = 2
+    features = 3
+    
+    def __init__(self, blocking=False):
+        self.batch_sizes = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        if not blocking:
+            self.release.set()
+    
+    def score_batch(self, samples, threshold_multiplier=0.03):
+        self.entered.set()
+        self.release.wait()
+        self.batch_sizes.append(len(samples))
+        deviations = samples[:, 0, 0].astype(np.float64)
+        return deviations < threshold_multiplier, deviations
+
+def sample(value):
+    return np.full((StubModel.timesteps, StubModel.features), value, dtype=np.float32)
+
+def test_concurrent_requests_are_batched():
+    model = StubModel(blocking=True)
+    with MicroBatchAuthService(model, max_batch_size=8, max_wait_ms=50.0) as service:
+        first = service.submit(sample(0.0))
+        model.entered.wait(5)
+        # Queued while the first batch is being scored, so they batch together
+        futures = [service.submit(sample(i / 10)) for i in range(8)]
+        model.release.set()
+        
+        assert first.result(5) == (True, 0.0)
+        results = [future.result(5) for future in futures]
+    
+    assert [deviation for _, deviation in results] == pytest.approx([i / 10 for i in range(8)])
+    assert [authentic for authentic, _ in results] == [i == 0 for i in range(8)]
+    assert service.get_statistics()['batches'] == 2
+    assert model.batch_sizes == [1, 8]
+
+def test_cancelled_request_does_not_stop_worker():
+    model = StubModel(blocking=True)
+    with MicroBatchAuthService(model, max_batch_size=4, max_wait_ms=1.0) as service:
+        busy = service.submit(sample(0.0))
+        model.entered.wait(5)
+        cancelled = service.submit(sample(1.0))
+        kept = service.submit(sample(0.5))
+        assert cancelled.cancel()
+        model.release.set()
+        
+        assert busy.result(5) == (True, 0.0)
+        assert kept.result(5) == (False, 0.5)
+        # The worker is still alive after dropping the cancelled request
+        assert service.authenticate(sample(0.25), timeout=5) == (False, 0.25)
+    
+    stats = service.get_statistics()
+    assert stats['cancelled'] == 1
+    assert stats['completed'] == 3
+
+def test_submit_after_stop_is_rejected():
+    service = MicroBatchAuthService(StubModel()).start()
+    queued = service.submit(sample(0.0))
+    service.stop()
+    
+    assert queued.result(5) == (True, 0.0)
+    with pytest.raises(ValueError):
+        service.submit(sample(0.0))
+
+def test_submit_racing_stop_always_resolves():
+    for _ in range(20):
+        service = MicroBatchAuthService(StubModel(), max_wait_ms=0.1).start()
+        futures = []
+        
+        def submit_until_stopped():
+            try:
+                while True:
+                    futures.append(service.submit(sample(0.0)))
+            except ValueError:
+                pass
+        
+        thread = threading.Thread(target=submit_until_stopped)
+        thread.start()
+        service.stop()
+        thread.join(5)
+        
+        assert all(future.result(5) == (True, 0.0) for future in futures)
+
+if __name__ == '__main__':
+    print('='*60)
+    print('AUTH SERVICE TEST')
+    print('='*60)
+    
+    print('\n[TEST 1] Concurrent requests share a batch...')
+    test_concurrent_requests_are_batched()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 2] Cancelled request is dropped, worker keeps serving...')
+    test_cancelled_request_does_not_stop_worker()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 3] Submit after stop is rejected...')
+    test_submit_after_stop_is_rejected()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 4] Submits racing stop() all resolve...')
+    test_submit_racing_stop_always_resolves()
+    print('  ✅ PASS')
+    
+    print('\n✅ All auth service tests passed!')
@@ -0,0 +1,44 @@
+﻿import tempfile
+from pathlib import Path
+import pytest
+from dataset_builder import DEFAULT_SESSION, capture_name, discover_sessions, parse_capture_name
+
+def test_ids_with_underscores_round_trip():
+    for user_id, session_id in (('john_doe', 's01'), ('john_doe', 'morning_2'), ('alice', None)):
+        name = capture_name('mouse_', user_id, session_id)
+        assert parse_capture_name(name, 'mouse_') == (user_id, session_id or DEFAULT_SESSION)
+    
+    assert parse_capture_name('mouse_john_doe.jsonl', 'mouse_') == ('john_doe', DEFAULT_SESSION)
+    for user_id, session_id in (('a@b', 's01'), ('alice', 'x@y'), ('', None)):
+        with pytest.raises(ValueError):
+            capture_name('mouse_', user_id, session_id)
+
+def test_discover_pairs_captures():
+    with tempfile.TemporaryDirectory() as tmp:
+        for prefix in ('mouse_', 'keys_'):
+            for user_id, session_id in (('john_doe', 's00'), ('john_doe', 's01'), ('john', None)):
+                (Path(tmp) / capture_name(prefix, user_id, session_id)).touch()
+        (Path(tmp) / capture_name('mouse_', 'doe', 's00')).touch()
+        (Path(tmp) / 'mouse_doe@s01.npz').touch()
+        
+        users, unpaired = discover_sessions(tmp)
+    
+    assert {user_id: [s[0] for s in sessions] for user_id, sessions in users.items()} == {
+        'john': [DEFAULT_SESSION], 'john_doe': ['s00', 's01']
+    }
+    assert [Path(p).name for p in unpaired] == ['mouse_doe@s00.jsonl']
+
+if __name__ == '__main__':
+    print('='*60)
+    print('DATASET BUILDER CAPTURE NAMING TEST')
+    print('='*60)
+    
+    print('\n[TEST 1] IDs containing "_" round-trip through capture names...')
+    test_ids_with_underscores_round_trip()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 2] Mouse and key captures are paired per user and session...')
+    test_discover_pairs_captures()
+    print('  ✅ PASS')
+    
+    print('\n✅ All dataset builder tests passed!')
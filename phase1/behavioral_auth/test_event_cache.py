@@ -0,0 +1,98 @@
+﻿import json
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+from bulk_data_generator import generate_mouse_columns, make_profiles, mouse_lines, write_columns
+from event_cache import cache_path_for, load_columns, parse_mouse_log
+
+class CountingParser:
+    def __init__(self):
+        self.calls = 0
+    
+    def __call__(self, filepath):
+        self.calls += 1
+        return parse_mouse_log(filepath)
+
+def move(timestamp, x):
+    return json.dumps({'timestamp': timestamp, 'x': x, 'y': 0, 'interval': 0.016, 'type': 'move'}) + '\n'
+
+def test_cache_reused_until_source_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'mouse_test.jsonl'
+        path.write_text(move(1.0, 10) + move(2.0, 20))
+        parser = CountingParser()
+        
+        assert list(load_columns(path, parser)['x']) == [10, 20]
+        assert cache_path_for(path).exists()
+        assert list(load_columns(path, parser)['x']) == [10, 20]
+        assert parser.calls == 1
+        
+        # Appended: size changes
+        with open(path, 'a') as f:
+            f.write(move(3.0, 30))
+        assert list(load_columns(path, parser)['x']) == [10, 20, 30]
+        assert parser.calls == 2
+        
+        # Rewritten in place at the same size: only the mtime changes
+        stat = path.stat()
+        path.write_text(path.read_text().replace('"x": 20', '"x": 25'))
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert path.stat().st_size == stat.st_size
+        assert list(load_columns(path, parser)['x']) == [10, 25, 30]
+        assert parser.calls == 3
+        
+        assert list(load_columns(path, parser)['x']) == [10, 25, 30]
+        assert parser.calls == 3
+
+def test_separate_cache_dir():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'mouse_test.jsonl'
+        path.write_text(move(1.0, 10))
+        cache_dir = Path(tmp) / 'cache'
+        parser = CountingParser()
+        
+        load_columns(path, parser, cache_dir)
+        load_columns(path, parser, cache_dir)
+        assert parser.calls == 1
+        assert cache_path_for(path, cache_dir).exists()
+        assert not cache_path_for(path).exists()
+
+def test_generator_cache_entries_are_used():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'mouse_test.jsonl'
+        columns = generate_mouse_columns(make_profiles(1)['user00000'], 200, 1.7e9, np.random.default_rng(0))
+        path.write_text(''.join(mouse_lines(columns)))
+        write_columns(cache_path_for(path), columns, source=path)
+        parser = CountingParser()
+        
+        cached = load_columns(path, parser)
+        assert parser.calls == 0
+        parsed = parse_mouse_log(path)
+        for name in parsed:
+            assert np.array_equal(cached[name], parsed[name], equal_nan=True), name
+        
+        # A stale generator entry is replaced like any other
+        with open(path, 'a') as f:
+            f.write(move(2e9, 5))
+        assert len(load_columns(path, parser)['x']) == len(parsed['x']) + 1
+        assert parser.calls == 1
+
+if __name__ == '__main__':
+    print('='*60)
+    print('EVENT CACHE INVALIDATION TEST')
+    print('='*60)
+    
+    print('\n[TEST 1] Cache reused until the source size or mtime changes...')
+    test_cache_reused_until_source_changes()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 2] Explicit cache directory...')
+    test_separate_cache_dir()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 3] Generator-written cache entries are used and invalidated...')
+    test_generator_cache_entries_are_used()
+    print('  ✅ PASS')
+    
+    print('\n✅ All event cache tests passed!')
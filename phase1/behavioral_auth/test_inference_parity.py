@@ -0,0 +1,110 @@
+﻿import contextlib
+import io
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+from model_trainer import BehavioralAuthModel
+from fast_inference import FastAuthScorer, TFLiteScorer, export_tflite
+
+TOLERANCE = 1e-4
+TIMESTEPS = 10
+FEATURES = 9
+
+# Holds the test model for the life of the process
+MODEL_DIR = tempfile.TemporaryDirectory(prefix='ghost_parity_')
+
+@lru_cache(maxsize=None)
+def trained_model():
+    '''
+    Fused-normalization model trained for one epoch on random data, saved and loaded back
+    
+    Parity only needs some trained weights and a baseline, not a good model,
+    so the test doesn't depend on model_trainer.py having been run.
+    '''
+    rng = np.random.default_rng(0)
+    scaler = {'mean': rng.uniform(0.1, 2.0, FEATURES).tolist(), 'scale': rng.uniform(0.05, 0.5, FEATURES).tolist()}
+    training = rng.normal(0, 1, (64, TIMESTEPS, FEATURES)).astype(np.float32)
+    
+    prefix = str(Path(MODEL_DIR.name) / 'behavioral_auth')
+    with contextlib.redirect_stdout(io.StringIO()):
+        auth_model = BehavioralAuthModel(TIMESTEPS, FEATURES)
+        auth_model.train(training, epochs=1, batch_size=16)
+        auth_model.fuse_normalization(scaler)
+        auth_model.save(prefix)
+        return BehavioralAuthModel.load(prefix)
+
+def parity_samples(auth_model):
+    '''Raw-feature samples (the model is fused), half of them close to the feature means'''
+    rng = np.random.default_rng(42)
+    samples = rng.normal(0, 1, (50, 1, TIMESTEPS, FEATURES)).astype(np.float32)
+    samples[::2] *= 0.05
+    return samples * np.float32(auth_model.scaler['scale']) + np.float32(auth_model.scaler['mean'])
+
+@lru_cache(maxsize=None)
+def keras_reference():
+    auth_model = trained_model()
+    samples = parity_samples(auth_model)
+    return samples, [auth_model.authenticate(sample) for sample in samples]
+
+def compare(scorer, samples, reference):
+    '''
+    Max deviation difference against the reference, and whether every
+    decision matches (decisions may only differ within tolerance of the threshold)
+    '''
+    results = [scorer.authenticate(sample) for sample in samples]
+    max_diff = max(abs(r[1] - ref[1]) for r, ref in zip(results, reference))
+    decisions_match = all(bool(r[0]) == bool(ref[0]) or abs(ref[1] - 0.03) < TOLERANCE
+                          for r, ref in zip(results, reference))
+    return max_diff, decisions_match
+
+def test_model_round_trip():
+    auth_model = trained_model()
+    assert auth_model.scaler is not None
+    assert any(layer.name == 'normalize' for layer in auth_model.model.layers)
+
+def test_fast_scorer_matches_keras():
+    samples, reference = keras_reference()
+    max_diff, decisions_match = compare(FastAuthScorer(trained_model()), samples, reference)
+    assert max_diff < TOLERANCE
+    assert decisions_match
+
+def test_batched_scorer_matches_keras():
+    samples, reference = keras_reference()
+    _, deviations = FastAuthScorer(trained_model()).score_batch(samples.reshape(-1, TIMESTEPS, FEATURES))
+    assert np.max(np.abs(deviations - np.array([r[1] for r in reference]))) < TOLERANCE
+
+def test_tflite_scorer_matches_keras():
+    auth_model = trained_model()
+    samples, reference = keras_reference()
+    tflite_path = str(Path(MODEL_DIR.name) / 'behavioral_auth.tflite')
+    with contextlib.redirect_stdout(io.StringIO()):
+        export_tflite(auth_model, tflite_path)
+    scorer = TFLiteScorer(tflite_path, auth_model.baseline, error_scale=auth_model.error_scale)
+    
+    max_diff, decisions_match = compare(scorer, samples, reference)
+    assert max_diff < TOLERANCE
+    assert decisions_match
+
+if __name__ == '__main__':
+    print('='*60)
+    print('FAST INFERENCE PARITY TEST')
+    print('='*60)
+    
+    print('\n[TEST 1] Fused test model trains, saves and loads...')
+    test_model_round_trip()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 2] tf.function scorer vs Keras...')
+    test_fast_scorer_matches_keras()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 3] Batched tf.function scorer vs Keras...')
+    test_batched_scorer_matches_keras()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 4] TFLite scorer vs Keras...')
+    test_tflite_scorer_matches_keras()
+    print('  ✅ PASS')
+    
+    print('\n✅ All parity tests passed!')
@@ -0,0 +1,65 @@
+﻿import math
+import tempfile
+import numpy as np
+from live_ingest import EventRing, SessionWindows
+from stream_extractor import StreamingFeatureExtractor
+from test_stream_extractor import write_capture
+
+WINDOW = 10.0
+STRIDE = 2.5
+
+def test_ring_windows_across_wrap():
+    ring = EventRing(8, {'timestamp': np.float64, 'value': np.int64})
+    for start in range(0, 20, 3):
+        ring.extend({'timestamp': np.arange(start, start + 3, dtype=np.float64), 'value': np.arange(start, start + 3)})
+    
+    # Holds 13..20, stored as [16..20 | 13..15] after wrapping
+    assert ring.overwritten == 13
+    assert list(ring.window(0, 100)['value']) == list(range(13, 21))
+    assert list(ring.window(14, 18)['value']) == [14, 15, 16, 17]
+    assert list(ring.window(16.5, 19)['value']) == [17, 18]
+    assert len(ring.window(21, 30)['timestamp']) == 0
+    assert ring.first_at_or_after(15.5) == 16 and ring.first_at_or_after(0) == 13
+    assert ring.first_at_or_after(20.5) is None
+    
+    # A window inside one segment is a view, not a copy
+    assert np.shares_memory(ring.window(16.5, 19)['value'], ring.columns['value'])
+
+def test_live_windows_match_streaming_extractor():
+    with tempfile.TemporaryDirectory() as tmp:
+        mouse_file, key_file, _, _ = write_capture(tmp)
+        starts, expected = StreamingFeatureExtractor(WINDOW, STRIDE).extract_window_features(mouse_file, key_file)
+        
+        # Small rings and reads, so the rings wrap many times while windows are cut
+        session = SessionWindows(mouse_file, key_file, WINDOW, STRIDE, mouse_capacity=2048, key_capacity=256)
+        windows = []
+        while True:
+            events = session.ingest(max_bytes=4096)
+            windows += session.completed_windows(session.watermark(lateness=0.0))
+            if not events:
+                break
+        session.close()
+    
+    assert session.moves.overwritten > 0 and session.keys.overwritten > 0
+    live_starts = np.array([start for start, _ in windows])
+    live = np.array([features for _, features in windows])
+    
+    # The live path stops at the last event; the extractor may emit one final window
+    assert len(live) >= len(expected) - 1
+    assert np.allclose(live_starts, starts[:len(live)])
+    assert np.allclose(live, expected[:len(live)], rtol=1e-9, atol=1e-12)
+
+if __name__ == '__main__':
+    print('='*60)
+    print('LIVE INGEST TEST')
+    print('='*60)
+    
+    print('\n[TEST 1] Ring windows across the wrap point...')
+    test_ring_windows_across_wrap()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 2] Live windows match StreamingFeatureExtractor...')
+    test_live_windows_match_streaming_extractor()
+    print('  ✅ PASS')
+    
+    print('\n✅ All live ingest tests passed!')
@@ -0,0 +1,121 @@
+﻿import contextlib
+import io
+import tempfile
+import threading
+from model_registry import ModelRegistry, estimate_model_bytes, user_model_prefix
+
+MB = 1024 * 1024
+
+class StubEntry:
+    def __init__(self, user_id, nbytes):
+        self.user_id = user_id
+        self.nbytes = nbytes
+
+class StubRegistry(ModelRegistry):
+    '''Registry whose "models" are 1 MB stubs, so LRU behaviour is tested without TensorFlow loads'''
+    
+    def __init__(self, users, memory_budget_mb, fail=()):
+        super().__init__(tempfile.gettempdir(), memory_budget_mb, entry_overhead_bytes=0)
+        self.users = set(users)
+        self.fail = set(fail)
+        self.loads = []
+    
+    def __contains__(self, user_id):
+        return user_id in self.users
+    
+    def load_entry(self, user_id):
+        self.loads.append(user_id)
+        if user_id in self.fail:
+            raise OSError(f'{user_id}: unreadable model')
+        return StubEntry(user_id, MB)
+
+def test_lru_eviction():
+    registry = StubRegistry('abcd', memory_budget_mb=3.5)
+    for user_id in 'abca':
+        registry.get(user_id)
+    registry.get('d')
+    
+    # b was least recently used when d pushed the cache over budget
+    assert list(registry.entries) == ['c', 'a', 'd']
+    assert registry.memory_used == 3 * MB
+    stats = registry.get_statistics()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 4, 1)
+    
+    registry.get('b')
+    assert list(registry.entries) == ['a', 'd', 'b']
+    assert registry.loads == ['a', 'b', 'c', 'd', 'b']
+
+def test_newest_entry_kept_over_budget():
+    registry = StubRegistry('ab', memory_budget_mb=0.5)
+    registry.get('a')
+    registry.get('b')
+    assert list(registry.entries) == ['b']
+
+def test_loader_locks_are_released():
+    registry = StubRegistry('ab', memory_budget_mb=10, fail='b')
+    for user_id, error in (('ghost', ValueError), ('b', OSError), ('../a', ValueError)):
+        try:
+            registry.get(user_id)
+        except error:
+            pass
+        else:
+            raise AssertionError(f'{user_id} loaded')
+    
+    threads = [threading.Thread(target=registry.get, args=('a',)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert registry.loading == {}
+    assert registry.loads.count('a') == 1
+
+def test_user_ids_stay_inside_models_dir():
+    for user_id in ('..', '../alice', 'alice/../../etc', 'a\\b', ''):
+        try:
+            user_model_prefix(user_id, '/srv/models')
+        except ValueError:
+            continue
+        raise AssertionError(f'{user_id!r} accepted')
+    
+    assert str(user_model_prefix('alice_01', '/srv/models')) == '/srv/models/alice_01/behavioral_auth'
+
+def test_entries_charged_weights_and_overhead():
+    from test_inference_parity import trained_model
+    auth_model = trained_model()
+    
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        registry = ModelRegistry(tmp, memory_budget_mb=100, entry_overhead_bytes=5 * MB)
+        registry.enroll('alice', auth_model)
+        registry.evict('alice')
+        entry = registry.get('alice')
+    
+    assert entry.nbytes == estimate_model_bytes(auth_model) + 5 * MB
+    assert registry.memory_used == entry.nbytes
+
+if __name__ == '__main__':
+    print('='*60)
+    print('MODEL REGISTRY TEST')
+    print('='*60)
+    
+    print('\n[TEST 1] Least recently used entry is evicted over budget...')
+    test_lru_eviction()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 2] Newest entry is kept even alone over budget...')
+    test_newest_entry_kept_over_budget()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 3] Loader locks released for unknown, failed and concurrent loads...')
+    test_loader_locks_are_released()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 4] User IDs with path separators are rejected...')
+    test_user_ids_stay_inside_models_dir()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 5] Entries are charged weights plus per-entry overhead...')
+    test_entries_charged_weights_and_overhead()
+    print('  ✅ PASS')
+    
+    print('\n✅ All model registry tests passed!')
@@ -0,0 +1,220 @@
+﻿import math
+from pathlib import Path
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from model_trainer import BehavioralAuthModel
+
+def sequence_starts(n_windows, timesteps, sessions=None, step=1):
+    '''
+    Start row of every sequence, never spanning two sessions
+    
+    Args:
+        n_windows: Rows in the window feature array
+        sessions: Optional manifest 'sessions' entries ({'start', 'count'})
+    
+    Returns:
+        int64 array of start rows (the only per-sequence state kept in memory)
+    '''
+    if sessions is None:
+        sessions = [{'start': 0, 'count': n_windows}]
+    
+    starts = [
+        np.arange(entry['start'], entry['start'] + entry['count'] - timesteps + 1, step, dtype=np.int64)
+        for entry in sessions if entry['count'] >= timesteps
+    ]
+    return np.concatenate(starts) if starts else np.zeros(0, dtype=np.int64)
+
+class RunningStats:
+    '''Streaming mean/std (Chan's parallel update), fed one batch at a time'''
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+    
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        
+        batch_mean = values.mean()
+        batch_m2 = np.sum((values - batch_mean) ** 2)
+        total = self.count + len(values)
+        delta = batch_mean - self.mean
+        
+        self.mean += delta * len(values) / total
+        self.m2 += batch_m2 + delta * delta * self.count * len(values) / total
+        self.count = total
+    
+    def std(self):
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+class TrainingPipeline:
+    '''
+    Streaming trainer for BehavioralAuthModel
+    
+    Window features stay memory-mapped on disk; only an index of sequence
+    start rows lives in memory. tf.data shuffles that index, batches it,
+    gathers each batch's sequences from the memmap (normalizing on the way)
+    and prefetches the next batch while the current one trains. Training
+    stops early on validation loss, and BackupAndRestore checkpoints every
+    epoch so an interrupted job resumes where it left off. The baseline is
+    computed in one streaming pass with running statistics.
+    '''
+    
+    def __init__(self, timesteps=10, batch_size=64, validation_fraction=0.2, max_epochs=100, patience=5,
+                 checkpoint_dir='../models/checkpoints', seed=42, data_threads=None):
+        self.timesteps = timesteps
+        self.batch_size = batch_size
+        self.validation_fraction = validation_fraction
+        self.max_epochs = max_epochs
+        self.patience = patience
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.seed = seed
+        self.data_threads = data_threads
+    
+    def make_dataset(self, features, starts, scaler=None, shuffle=False, targets=True):
+        '''
+        tf.data pipeline yielding (batch, timesteps, features) sequences
+        
+        Args:
+            features: (n_windows, features) array, typically np.load(..., mmap_mode='r')
+            starts: Sequence start rows (see sequence_starts)
+            scaler: Optional {'mean', 'scale'} applied to each gathered batch
+            targets: Yield (x, x) pairs for fit() instead of x alone
+        '''
+        n_features = features.shape[1]
+        offsets = np.arange(self.timesteps)
+        mean = np.asarray(scaler['mean'], dtype=np.float32) if scaler else None
+        scale = np.asarray(scaler['scale'], dtype=np.float32) if scaler else None
+        
+        def gather(batch_starts):
+            # Fancy indexing a memmap reads only the rows this batch needs
+            batch = np.asarray(features[batch_starts[:, None] + offsets], dtype=np.float32)
+            if mean is not None:
+                batch = (batch - mean) / scale
+            return batch
+        
+        def load(batch_starts):
+            batch = tf.numpy_function(gather, [batch_starts], tf.float32)
+            batch.set_shape([None, self.timesteps, n_features])
+            return (batch, batch) if targets else batch
+        
+        dataset = tf.data.Dataset.from_tensor_slices(starts)
+        if shuffle:
+            dataset = dataset.shuffle(len(starts), seed=self.seed, reshuffle_each_iteration=True)
+        dataset = dataset.batch(self.batch_size)
+        dataset = dataset.map(load, num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.prefetch(tf.data.AUTOTUNE)
+        
+        if self.data_threads:
+            # Keep input loading inside the caller's CPU budget
+            options = tf.data.Options()
+            options.threading.private_threadpool_size = self.data_threads
+            dataset = dataset.with_options(options)
+        return dataset
+    
+    def split(self, starts):
+        '''Shuffled train/validation split of sequence starts'''
+        rng = np.random.default_rng(self.seed)
+        order = rng.permutation(len(starts))
+        n_validation = int(len(starts) * self.validation_fraction)
+        return np.sort(starts[order[n_validation:]]), np.sort(starts[order[:n_validation]])
+    
+    def streaming_baseline(self, auth_model, features, starts, scaler=None):
+        '''Baseline error statistics over all sequences without materializing them'''
+        stats = RunningStats()
+        for batch in self.make_dataset(features, starts, scaler, targets=False):
+            batch = batch.numpy()
+            reconstructed = np.asarray(auth_model.model.predict_on_batch(batch))
+            stats.update(np.mean(np.abs(batch - reconstructed), axis=(1, 2)))
+        
+        return {
+            'mean_error': float(stats.mean),
+            'std_error': float(stats.std()),
+            'threshold': float(stats.mean + 2 * stats.std())
+        }
+    
+    def train(self, features, scaler=None, sessions=None, run_name='behavioral_auth', fuse=True):
+        '''
+        Train a model on memory-mapped window features
+        
+        Args:
+            features: (n_windows, 9) raw window features (memmap or array)
+            scaler: {'mean', 'scale'} parameters; applied to batches and fused
+                into the trained model (fuse=True)
+            sessions: Manifest session entries, so sequences never span captures
+            run_name: Checkpoint subdirectory; rerunning the same name resumes
+        
+        Returns:
+            (auth_model, history)
+        '''
+        starts = sequence_starts(len(features), self.timesteps, sessions)
+        if len(starts) < 2:
+            raise ValueError(f'Need at least 2 sequences, got {len(starts)}')
+        
+        train_starts, validation_starts = self.split(starts)
+        if not len(validation_starts):
+            train_starts, validation_starts = starts, starts
+        
+        print('\n' + '='*60)
+        print('STREAMING TRAINING PIPELINE')
+        print('='*60)
+        print(f'\nWindows: {len(features)}  Sequences: {len(starts)} '
+              f'(train {len(train_starts)}, validation {len(validation_starts)})')
+        print(f'Batch size: {self.batch_size}  Max epochs: {self.max_epochs}  Patience: {self.patience}')
+        
+        auth_model = BehavioralAuthModel(timesteps=self.timesteps, features=features.shape[1])
+        auth_model.build_model()
+        
+        run_dir = self.checkpoint_dir / run_name
+        run_dir.mkdir(parents=True, exist_ok=True)
+        
+        callbacks = [
+            keras.callbacks.BackupAndRestore(str(run_dir / 'backup')),
+            keras.callbacks.EarlyStopping(monitor='val_loss', patience=self.patience, restore_best_weights=True),
+            keras.callbacks.ModelCheckpoint(str(run_dir / 'best.keras'), monitor='val_loss', save_best_only=True)
+        ]
+        
+        history = auth_model.model.fit(
+            self.make_dataset(features, train_starts, scaler, shuffle=True),
+            validation_data=self.make_dataset(features, validation_starts, scaler),
+            epochs=self.max_epochs,
+            callbacks=callbacks,
+            verbose=2
+        )
+        
+        print('\n[*] Calculating baseline error (streaming)...')
+        auth_model.baseline = self.streaming_baseline(auth_model, features, starts, scaler)
+        print(f'    Mean: {auth_model.baseline["mean_error"]:.6f}')
+        print(f'    Std:  {auth_model.baseline["std_error"]:.6f}')
+        
+        if scaler is not None and fuse:
+            auth_model.fuse_normalization(scaler)
+        
+        return auth_model, history
+    
+    def train_shard(self, shard_dir):
+        '''Train on one dataset_builder shard; checkpoints are named after the user'''
+        from dataset_builder import load_user_shard
+        
+        features, scaler, manifest = load_user_shard(shard_dir)
+        return self.train(features, scaler, manifest['sessions'], run_name=manifest['user_id'])
+
+if __name__ == '__main__':
+    import sys
+    from model_registry import USERS_DIR, user_model_prefix
+    
+    shards_dir = Path('../data/shards')
+    shard_dirs = [Path(arg) for arg in sys.argv[1:]] or sorted(p.parent for p in shards_dir.glob('*/manifest.json'))
+    
+    if not shard_dirs:
+        print('[!] No shards found, run dataset_builder.py first')
+        exit(1)
+    
+    pipeline = TrainingPipeline()
+    for shard_dir in shard_dirs:
+        auth_model, history = pipeline.train_shard(shard_dir)
+        print(f'\n[✓] {shard_dir.name}: {len(history.history["loss"])} epochs')
+        auth_model.save(str(user_model_prefix(shard_dir.name, USERS_DIR)))
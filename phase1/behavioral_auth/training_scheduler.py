@@ -0,0 +1,207 @@
+﻿import contextlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+# Same layout as model_registry; not imported so this process never loads TensorFlow
+SHARDS_DIR = '../data/shards'
+USERS_DIR = '../models/users'
+MODEL_PREFIX = 'behavioral_auth'
+
+def init_worker(intra_threads, inter_threads):
+    '''Pin a worker's TensorFlow thread pools before the runtime starts'''
+    os.environ['OMP_NUM_THREADS'] = str(intra_threads)
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(intra_threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = str(inter_threads)
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(intra_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_threads)
+
+def publish_atomic(staging_dir, target_dir):
+    '''
+    Swap a fully written model directory into place
+    
+    Readers never see a partially written model: the previous directory is
+    moved aside, the staged one renamed into place, then the old one removed.
+    Between the two renames the user briefly has no model on disk.
+    '''
+    old_dir = staging_dir.with_name(f'{staging_dir.name}.old')
+    if target_dir.exists():
+        os.replace(target_dir, old_dir)
+    os.replace(staging_dir, target_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+def train_user(shard_dir, users_dir, log_dir, pipeline_kwargs):
+    '''
+    Worker job: train one user's shard and publish <users_dir>/<user_id>/
+    
+    Returns:
+        (user_id, epochs, seconds)
+    '''
+    from training_pipeline import TrainingPipeline
+    
+    start_time = time.time()
+    shard_dir = Path(shard_dir)
+    users_dir = Path(users_dir)
+    user_id = shard_dir.name
+    
+    # Staging lives under users_dir so the final rename stays on one filesystem
+    staging_dir = users_dir / '.staging' / f'{user_id}.{os.getpid()}'
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    
+    log_path = Path(log_dir) / f'{user_id}.log'
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    with open(log_path, 'w') as log, contextlib.redirect_stdout(log):
+        pipeline = TrainingPipeline(**pipeline_kwargs)
+        auth_model, history = pipeline.train_shard(shard_dir)
+        auth_model.save(str(staging_dir / MODEL_PREFIX))
+    
+    publish_atomic(staging_dir, users_dir / user_id)
+    return user_id, len(history.history['loss']), time.time() - start_time
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f'{seconds // 3600}h{seconds % 3600 // 60:02d}m'
+    if seconds >= 60:
+        return f'{seconds // 60}m{seconds % 60:02d}s'
+    return f'{seconds}s'
+
+class TrainingScheduler:
+    '''
+    Parallel per-user training on a CPU budget
+    
+    Queues one job per dataset_builder shard and runs them on a process pool.
+    Each worker gets intra_threads TensorFlow threads (plus inter_threads),
+    and workers * intra_threads never exceeds cpu_budget, so concurrent jobs
+    don't oversubscribe the cores. Largest shards are queued first so the
+    longest jobs don't straggle at the end. Models are staged and swapped
+    into <users_dir>/<user_id>/ atomically (the ModelRegistry layout), and
+    users whose model is newer than their shard are skipped.
+    '''
+    
+    def __init__(self, shards_dir=SHARDS_DIR, users_dir=USERS_DIR, cpu_budget=None, intra_threads=2,
+                 inter_threads=1, log_dir='../logs/training', **pipeline_kwargs):
+        self.shards_dir = Path(shards_dir)
+        self.users_dir = Path(users_dir)
+        self.cpu_budget = cpu_budget or os.cpu_count()
+        self.intra_threads = max(1, min(intra_threads, self.cpu_budget))
+        self.inter_threads = inter_threads
+        self.max_workers = max(1, self.cpu_budget // self.intra_threads)
+        self.log_dir = Path(log_dir)
+        self.pipeline_kwargs = dict(pipeline_kwargs)
+        self.pipeline_kwargs.setdefault('data_threads', self.intra_threads)
+    
+    def discover_jobs(self, force=False):
+        '''
+        Shards to train, largest first
+        
+        Returns:
+            ([(shard_dir, windows), ...], skipped user IDs)
+        '''
+        jobs = []
+        skipped = []
+        for manifest_path in sorted(self.shards_dir.glob('*/manifest.json')):
+            shard_dir = manifest_path.parent
+            baseline_path = self.users_dir / shard_dir.name / f'{MODEL_PREFIX}_baseline.json'
+            
+            if not force and baseline_path.exists() and baseline_path.stat().st_mtime >= manifest_path.stat().st_mtime:
+                skipped.append(shard_dir.name)
+                continue
+            
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            jobs.append((shard_dir, manifest['windows']))
+        
+        jobs.sort(key=lambda job: job[1], reverse=True)
+        return jobs, skipped
+    
+    def run(self, force=False):
+        '''
+        Train every user with a new or changed shard
+        
+        Returns:
+            Summary dict with trained/skipped/failed users and timing
+        '''
+        start_time = time.time()
+        jobs, skipped = self.discover_jobs(force)
+        
+        print(f'[*] Users: {len(jobs) + len(skipped)} ({len(jobs)} to train, {len(skipped)} up to date)')
+        print(f'[*] CPU budget: {self.cpu_budget} cores -> {min(self.max_workers, max(len(jobs), 1))} workers '
+              f'x {self.intra_threads} intra-op / {self.inter_threads} inter-op threads')
+        
+        trained = {}
+        failed = {}
+        
+        if jobs:
+            self.users_dir.mkdir(parents=True, exist_ok=True)
+            
+            # spawn: each worker starts a fresh TensorFlow runtime with its own thread budget
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(jobs)),
+                                     mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=init_worker,
+                                     initargs=(self.intra_threads, self.inter_threads)) as pool:
+                futures = {
+                    pool.submit(train_user, str(shard_dir), str(self.users_dir), str(self.log_dir),
+                                self.pipeline_kwargs): shard_dir.name
+                    for shard_dir, _ in jobs
+                }
+                
+                for done, future in enumerate(as_completed(futures), 1):
+                    user_id = futures[future]
+                    elapsed = time.time() - start_time
+                    rate = done / elapsed
+                    eta = format_duration((len(jobs) - done) / rate)
+                    
+                    try:
+                        _, epochs, seconds = future.result()
+                        trained[user_id] = {'epochs': epochs, 'seconds': seconds}
+                        print(f'[✓] {done}/{len(jobs)} {user_id}: {epochs} epochs in {seconds:.1f}s | '
+                              f'{rate * 3600:.0f} users/h | ETA {eta}')
+                    except Exception as e:
+                        failed[user_id] = str(e)
+                        print(f'[!] {done}/{len(jobs)} {user_id}: {e} | ETA {eta}')
+            
+            shutil.rmtree(self.users_dir / '.staging', ignore_errors=True)
+        
+        seconds = time.time() - start_time
+        return {
+            'trained': trained,
+            'skipped': skipped,
+            'failed': failed,
+            'seconds': seconds,
+            'users_per_hour': len(trained) / seconds * 3600 if trained else 0.0
+        }
+
+if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Parallel per-user training scheduler')
+    parser.add_argument('--shards', default=SHARDS_DIR)
+    parser.add_argument('--users-dir', default=USERS_DIR)
+    parser.add_argument('--cpu-budget', type=int, default=None, help='Cores to use (default: all)')
+    parser.add_argument('--intra-threads', type=int, default=2, help='TensorFlow threads per worker')
+    parser.add_argument('--max-epochs', type=int, default=100)
+    parser.add_argument('--force', action='store_true', help='Retrain users whose model is up to date')
+    args = parser.parse_args()
+    
+    print('='*60)
+    print('PER-USER TRAINING SCHEDULER')
+    print('='*60 + '\n')
+    
+    scheduler = TrainingScheduler(args.shards, args.users_dir, cpu_budget=args.cpu_budget,
+                                  intra_threads=args.intra_threads, max_epochs=args.max_epochs)
+    summary = scheduler.run(force=args.force)
+    
+    print(f'\n[✓] Trained {len(summary["trained"])} users, skipped {len(summary["skipped"])} up to date, '
+          f'{len(summary["failed"])} failed in {format_duration(summary["seconds"])} '
+          f'({summary["users_per_hour"]:.0f} users/h)')
+    print(f'    Models: {scheduler.users_dir}')
+    print(f'    Logs:   {scheduler.log_dir}')
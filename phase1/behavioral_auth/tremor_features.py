@@ -0,0 +1,89 @@
+﻿import numpy as np
+
+TREMOR_BAND = (8.0, 12.0)  # Physiological hand tremor, Hz
+SAMPLE_RATE = 60.0  # Uniform resampling rate, Hz (typical mouse poll rate)
+MIN_COVERAGE = 0.5  # Fraction of a window that must be spanned by real samples
+
+def resample_windows(timestamps, x, y, window_starts, window_seconds, sample_rate=SAMPLE_RATE):
+    '''
+    Resample x/y trajectories onto a uniform time grid for many windows at once
+    
+    Returns:
+        (xs, ys, coverage): xs/ys shaped (windows, samples); coverage is the
+        fraction of each window between its first and last real sample
+    '''
+    window_starts = np.asarray(window_starts, dtype=np.float64)
+    n_samples = int(round(window_seconds * sample_rate))
+    grid = window_starts[:, None] + np.arange(n_samples)[None, :] / sample_rate
+    
+    xs = np.interp(grid.ravel(), timestamps, x).reshape(grid.shape)
+    ys = np.interp(grid.ravel(), timestamps, y).reshape(grid.shape)
+    
+    # Real-sample span inside each window, so gaps filled by interp don't count
+    first = np.searchsorted(timestamps, window_starts, side='left')
+    last = np.searchsorted(timestamps, window_starts + window_seconds, side='left') - 1
+    has_samples = last > first
+    span = np.zeros(len(window_starts))
+    span[has_samples] = timestamps[last[has_samples]] - timestamps[first[has_samples]]
+    
+    return xs, ys, span / window_seconds
+
+def tremor_features(timestamps, x, y, window_starts, window_seconds, sample_rate=SAMPLE_RATE, band=TREMOR_BAND):
+    '''
+    Tremor-band peak frequency and band power for every window in one pass
+    
+    Positions are resampled to a uniform grid, differentiated to velocity
+    (removing drift), Hann-windowed and transformed with a single batched
+    rfft over all windows.
+    
+    Args:
+        timestamps, x, y: Mouse move samples, timestamps increasing
+        window_starts: Start time of each window
+        window_seconds: Window length
+    
+    Returns:
+        (peak_hz, band_power) arrays, one value per window. band_power is the
+        share of non-DC velocity power inside the band. Windows without enough
+        movement get NaN.
+    '''
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    window_starts = np.atleast_1d(np.asarray(window_starts, dtype=np.float64))
+    peak_hz = np.full(len(window_starts), np.nan)
+    band_power = np.full(len(window_starts), np.nan)
+    
+    if len(timestamps) < 2 or len(window_starts) == 0:
+        return peak_hz, band_power
+    
+    xs, ys, coverage = resample_windows(timestamps, x, y, window_starts, window_seconds, sample_rate)
+    
+    vx = np.diff(xs, axis=1) * sample_rate
+    vy = np.diff(ys, axis=1) * sample_rate
+    vx -= vx.mean(axis=1, keepdims=True)
+    vy -= vy.mean(axis=1, keepdims=True)
+    
+    taper = np.hanning(vx.shape[1])
+    power = np.abs(np.fft.rfft(vx * taper, axis=1)) ** 2 + np.abs(np.fft.rfft(vy * taper, axis=1)) ** 2
+    freqs = np.fft.rfftfreq(vx.shape[1], d=1.0 / sample_rate)
+    
+    in_band = (freqs >= band[0]) & (freqs <= band[1])
+    if not in_band.any():
+        return peak_hz, band_power
+    
+    band_spectrum = power[:, in_band]
+    total = power[:, 1:].sum(axis=1)
+    valid = (coverage >= MIN_COVERAGE) & (total > 0)
+    
+    peak_hz[valid] = freqs[in_band][np.argmax(band_spectrum[valid], axis=1)]
+    band_power[valid] = band_spectrum[valid].sum(axis=1) / total[valid]
+    
+    return peak_hz, band_power
+
+def session_tremor_peak(timestamps, x, y, sample_rate=SAMPLE_RATE):
+    '''Tremor peak frequency over a whole capture as one window (0.0 if unmeasurable)'''
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if len(timestamps) < 2:
+        return 0.0
+    
+    duration = timestamps[-1] - timestamps[0]
+    peak_hz, _ = tremor_features(timestamps, x, y, [timestamps[0]], duration, sample_rate)
+    return 0.0 if np.isnan(peak_hz[0]) else float(peak_hz[0])
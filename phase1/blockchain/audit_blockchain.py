@@ -28,7 +28,8 @@ for block in blockchain.chain:
                 'block': block.index,
                 'type': change['type'],
                 'hash': change['hash'],
-                'time': change.get('timestamp_human', 'unknown')
+                'time': change.get('timestamp_human', 'unknown'),
+                'chunks': change.get('chunks')
             })
 
 for filepath, changes in tracked_files.items():
@@ -43,7 +44,13 @@ for filepath, changes in tracked_files.items():
     print(f'   Hash: {last_change["hash"][:32]}...')
     
     # Check if file still exists and verify integrity
-    if Path(filepath).exists() and last_change['hash'] != 'deleted':
+    if Path(filepath).exists() and last_change['chunks']:
+        is_tampered, result = blockchain.detect_chunk_tampering(filepath, last_change)
+        if is_tampered:
+            print(f'   Status: ⚠️  {result}')
+        else:
+            print(f'   Status: ✅ VERIFIED (no tampering, {len(last_change["chunks"])} chunks)')
+    elif Path(filepath).exists() and last_change['hash'] != 'deleted':
         current_hash = blockchain.calculate_file_hash(filepath)
         if current_hash == last_change['hash']:
             print(f'   Status: ✅ VERIFIED (no tampering)')
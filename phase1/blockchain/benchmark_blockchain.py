@@ -0,0 +1,257 @@
+﻿import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from integrity_blockchain import Block, IntegrityBlockchain
+
+BASE_TIMESTAMP = 1767225600.0  # Fixed so synthetic chains are reproducible
+
+@contextlib.contextmanager
+def quiet():
+    '''Silence the blockchain's progress prints while measuring'''
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def synthetic_changes(rng, block_index, changes_per_block, n_files):
+    '''File change records shaped like add_file_change output'''
+    changes = []
+    for i in range(changes_per_block):
+        timestamp = BASE_TIMESTAMP + block_index * 60 + i
+        changes.append({
+            'filepath': f'/srv/ghost/data/file_{rng.randrange(n_files)}.log',
+            'hash': f'{rng.getrandbits(256):064x}',
+            'type': rng.choice(('create', 'modify', 'modify', 'delete')),
+            'timestamp': timestamp,
+            'timestamp_human': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+        })
+    return changes
+
+def build_synthetic_chain(n_blocks, difficulty=0, changes_per_block=10, n_files=1000, seed=0):
+    '''
+    Build a valid chain of n_blocks blocks (genesis included) without the
+    per-change bookkeeping of add_file_change
+    '''
+    rng = random.Random(seed)
+    
+    with quiet():
+        blockchain = IntegrityBlockchain(difficulty=difficulty)
+    
+    for index in range(1, n_blocks):
+        changes = synthetic_changes(rng, index, changes_per_block, n_files)
+        block = Block(index, BASE_TIMESTAMP + index * 60, {
+            'changes': changes,
+            'count': len(changes),
+            'committed_at': changes[-1]['timestamp_human']
+        }, blockchain.chain[-1].hash)
+        block.mine_block(difficulty)
+        blockchain.chain.append(block)
+    
+    return blockchain
+
+def timed(func, *args, **kwargs):
+    '''Run func once and return (result, seconds)'''
+    start_time = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start_time
+
+def peak_memory(func, *args, **kwargs):
+    '''Peak traced allocation (bytes) while running func'''
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def bench_mining(difficulties, samples, seed):
+    '''mine_block time and nonce count per difficulty'''
+    rng = random.Random(seed)
+    results = {}
+    
+    for difficulty in difficulties:
+        durations = []
+        nonces = []
+        for i in range(samples):
+            block = Block(i + 1, BASE_TIMESTAMP + i, {'changes': synthetic_changes(rng, i, 10, 100)}, '0' * 64)
+            _, seconds = timed(block.mine_block, difficulty)
+            durations.append(seconds)
+            nonces.append(block.nonce)
+        
+        durations.sort()
+        results[str(difficulty)] = {
+            'samples': samples,
+            'mean_s': sum(durations) / samples,
+            'median_s': durations[samples // 2],
+            'max_s': durations[-1],
+            'mean_nonce': sum(nonces) / samples
+        }
+    
+    return results
+
+def bench_commit(n_changes, difficulty, seed):
+    '''add_file_change + auto-commit throughput with precomputed hashes'''
+    rng = random.Random(seed)
+    changes = [(f'/srv/ghost/data/file_{rng.randrange(1000)}.log', f'{rng.getrandbits(256):064x}') for _ in range(n_changes)]
+    
+    with quiet():
+        blockchain = IntegrityBlockchain(difficulty=difficulty)
+        
+        def record_all():
+            for filepath, file_hash in changes:
+                blockchain.add_file_change(filepath, 'modify', file_hash)
+            blockchain.commit_pending_changes()
+        
+        _, seconds = timed(record_all)
+    
+    return {
+        'changes': n_changes,
+        'difficulty': difficulty,
+        'blocks': len(blockchain.chain) - 1,
+        'seconds': seconds,
+        'changes_per_sec': n_changes / seconds
+    }
+
+def bench_chain(n_blocks, args, work_dir):
+    '''verify_chain, get_file_history and save/load for one chain size'''
+    blockchain, build_seconds = timed(build_synthetic_chain, n_blocks, args.chain_difficulty, args.changes_per_block, args.files, args.seed)
+    result = {'blocks': n_blocks, 'build_s': build_seconds}
+    
+    (is_valid, _), seconds = timed(blockchain.verify_chain)
+    result['verify_chain'] = {'seconds': seconds, 'blocks_per_sec': n_blocks / seconds, 'valid': is_valid}
+    
+    rng = random.Random(args.seed)
+    queries = [f'/srv/ghost/data/file_{rng.randrange(args.files)}.log' for _ in range(args.history_queries)]
+    start_time = time.perf_counter()
+    entries = sum(len(blockchain.get_file_history(filepath)) for filepath in queries)
+    seconds = time.perf_counter() - start_time
+    result['get_file_history'] = {
+        'queries': len(queries),
+        'mean_s': seconds / len(queries),
+        'mean_entries': entries / len(queries)
+    }
+    
+    for suffix in ('json', 'ghz'):
+        filepath = work_dir / f'chain_{n_blocks}.{suffix}'
+        if filepath.exists():
+            filepath.unlink()
+        
+        with quiet():
+            _, save_seconds = timed(blockchain.save_chain, filepath)
+            loaded = IntegrityBlockchain(difficulty=args.chain_difficulty)
+            _, load_seconds = timed(loaded.load_chain, filepath)
+        
+        stats = {
+            'save_s': save_seconds,
+            'load_s': load_seconds,
+            'file_bytes': filepath.stat().st_size,
+            'loaded_blocks': len(loaded.chain)
+        }
+        del loaded
+        
+        if args.memory:
+            filepath.unlink()
+            with quiet():
+                stats['save_peak_bytes'] = peak_memory(blockchain.save_chain, filepath)
+                stats['load_peak_bytes'] = peak_memory(IntegrityBlockchain(difficulty=args.chain_difficulty).load_chain, filepath)
+        
+        result[f'save_load_{suffix}'] = stats
+        filepath.unlink()
+    
+    return result
+
+def compare_results(current, baseline, path=''):
+    '''Print time metrics that moved more than 10% against a previous run'''
+    for key, value in current.items():
+        name = f'{path}.{key}' if path else key
+        previous = baseline.get(key) if isinstance(baseline, dict) else None
+        
+        if isinstance(value, dict):
+            compare_results(value, previous or {}, name)
+        elif isinstance(value, (int, float)) and isinstance(previous, (int, float)) and previous:
+            if not (key.endswith('_s') or key == 'seconds'):
+                continue
+            ratio = value / previous
+            if abs(ratio - 1) > 0.10:
+                marker = '⚠️  slower' if ratio > 1 else '✅ faster'
+                print(f'  {marker} {name}: {previous:.6f}s -> {value:.6f}s ({ratio:.2f}x)')
+
+def run_benchmarks(args):
+    results = {
+        'meta': {
+            'started_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'chain_difficulty': args.chain_difficulty,
+            'changes_per_block': args.changes_per_block
+        }
+    }
+    
+    print('[*] mine_block across difficulties...')
+    results['mine_block'] = bench_mining(args.difficulties, args.mining_samples, args.seed)
+    
+    print('[*] commit_pending_changes throughput...')
+    results['commit'] = bench_commit(args.commit_changes, args.commit_difficulty, args.seed)
+    
+    results['chains'] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_blocks in args.sizes:
+            print(f'[*] Chain of {n_blocks:,} blocks...')
+            results['chains'][str(n_blocks)] = bench_chain(n_blocks, args, Path(tmp))
+    
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the integrity blockchain')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Synthetic chain sizes in blocks (up to 1000000)')
+    parser.add_argument('--chain-difficulty', type=int, default=0,
+                        help='Difficulty used to mine the synthetic chains')
+    parser.add_argument('--changes-per-block', type=int, default=10)
+    parser.add_argument('--files', type=int, default=1000, help='Distinct file paths in synthetic changes')
+    parser.add_argument('--difficulties', type=int, nargs='+', default=[1, 2, 3, 4])
+    parser.add_argument('--mining-samples', type=int, default=20)
+    parser.add_argument('--commit-changes', type=int, default=2000)
+    parser.add_argument('--commit-difficulty', type=int, default=2)
+    parser.add_argument('--history-queries', type=int, default=20)
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help='Skip tracemalloc peak-memory runs (they are slow on large chains)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='../logs/blockchain_benchmark.json')
+    parser.add_argument('--compare', help='Previous results JSON to compare against')
+    return parser.parse_args(argv)
+
+if __name__ == '__main__':
+    print('='*60)
+    print('BLOCKCHAIN BENCHMARK')
+    print('='*60 + '\n')
+    
+    args = parse_args()
+    results = run_benchmarks(args)
+    
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    
+    print(f'\n[✓] Results saved to {args.output}')
+    
+    for n_blocks, chain in results['chains'].items():
+        print(f'\n  {int(n_blocks):,} blocks:')
+        print(f'    verify_chain:     {chain["verify_chain"]["seconds"]:.3f}s')
+        print(f'    get_file_history: {chain["get_file_history"]["mean_s"] * 1000:.2f}ms/query')
+        print(f'    save/load json:   {chain["save_load_json"]["save_s"]:.3f}s / {chain["save_load_json"]["load_s"]:.3f}s')
+        print(f'    save/load ghz:    {chain["save_load_ghz"]["save_s"]:.3f}s / {chain["save_load_ghz"]["load_s"]:.3f}s')
+    
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        print(f'\n[*] Changes against {args.compare}:')
+        compare_results(results, baseline)
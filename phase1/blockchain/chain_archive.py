@@ -0,0 +1,334 @@
+﻿import bisect
+import json
+import lzma
+import os
+import struct
+import zlib
+from pathlib import Path
+
+ARCHIVE_SUFFIX = '.ghz'
+ARCHIVE_MAGIC = b'GHSTARC1'
+
+# Footer: index offset, index length, magic
+FOOTER = struct.Struct('!QQ8s')
+SCAN_SIZE = 1 << 20  # Backward read size when looking for the last complete footer
+
+CODECS = {
+    'zlib': (lambda data, level: zlib.compress(data, 9 if level is None else level), zlib.decompress),
+    'lzma': (lambda data, level: lzma.compress(data, preset=6 if level is None else level), lzma.decompress)
+}
+
+class ChainArchive:
+    '''
+    Compressed, seekable storage for chain blocks
+    
+    Layout:
+        magic | frame 0 | frame 1 | ... | index | footer
+    
+    Each frame holds up to frame_size consecutive blocks as compact JSON,
+    compressed on its own, so reading one block only decompresses its frame.
+    The index records (first_index, count, offset, length) per frame. Only the
+    last frame may be partial.
+    
+    Appends never overwrite committed bytes: new frames (including a fresh
+    copy of a reopened partial frame) and a new index are written after the
+    current footer and fsync'd, then the new footer is written and fsync'd.
+    A crash mid-append leaves a torn tail after the last complete footer;
+    opening the archive falls back to that footer and the next append
+    truncates the tail. Superseded frames and indexes are dead bytes; once
+    they outweigh the live frames the file is rewritten to a temporary file
+    and renamed over the original.
+    '''
+    
+    def __init__(self, filepath, codec='zlib', frame_size=1000, level=None):
+        if codec not in CODECS:
+            raise ValueError(f'Unknown codec: {codec}')
+        
+        self.filepath = Path(filepath)
+        self.codec = codec
+        self.frame_size = frame_size
+        self.level = level
+        self.difficulty = None
+        self.frames = []
+        self.cached_frame = (None, None)
+        self.end = len(ARCHIVE_MAGIC)  # Offset just past the committed footer
+        self.index_length = 0
+        
+        if self.filepath.exists():
+            self.read_index()
+    
+    @property
+    def height(self):
+        '''Number of blocks stored in the archive'''
+        if not self.frames:
+            return 0
+        first_index, count, _, _ = self.frames[-1]
+        return first_index + count
+    
+    def read_index(self):
+        '''Load the frame index of the last complete footer'''
+        with open(self.filepath, 'rb') as f:
+            if f.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+                raise ValueError(f'{self.filepath} is not a chain archive')
+            
+            size = os.fstat(f.fileno()).st_size
+            end = size
+            while True:
+                if end < len(ARCHIVE_MAGIC) + FOOTER.size:
+                    raise ValueError(f'{self.filepath} has no complete footer')
+                found = self.read_footer(f, end)
+                if found is not None:
+                    break
+                # Torn append: try the footer before it
+                end = self.previous_magic_end(f, end - 1)
+        
+        index, self.index_length = found
+        self.end = end
+        
+        # The stored codec and frame size win over constructor arguments
+        self.codec = index['codec']
+        self.frame_size = index['frame_size']
+        self.difficulty = index['difficulty']
+        self.frames = [tuple(frame) for frame in index['frames']]
+        self.cached_frame = (None, None)
+    
+    @staticmethod
+    def read_footer(f, end):
+        '''(index dict, index length) of the footer ending at end, or None if there isn't a valid one'''
+        footer_offset = end - FOOTER.size
+        f.seek(footer_offset)
+        index_offset, index_length, magic = FOOTER.unpack(f.read(FOOTER.size))
+        if magic != ARCHIVE_MAGIC or index_offset < len(ARCHIVE_MAGIC) or index_offset + index_length != footer_offset:
+            return None
+        
+        f.seek(index_offset)
+        try:
+            return json.loads(zlib.decompress(f.read(index_length))), index_length
+        except (zlib.error, ValueError):
+            return None
+    
+    @staticmethod
+    def previous_magic_end(f, limit):
+        '''Largest offset <= limit that ends an occurrence of the magic (0 if none)'''
+        position = limit
+        while position > len(ARCHIVE_MAGIC):
+            start = max(0, position - SCAN_SIZE)
+            f.seek(start)
+            hit = f.read(position - start).rfind(ARCHIVE_MAGIC)
+            if hit >= 0:
+                return start + hit + len(ARCHIVE_MAGIC)
+            # Overlap reads so a magic split across them is still found
+            position = start + len(ARCHIVE_MAGIC) - 1
+        return 0
+    
+    def encode_frame(self, block_dicts):
+        payload = json.dumps(block_dicts, separators=(',', ':')).encode()
+        compress, _ = CODECS[self.codec]
+        return compress(payload, self.level)
+    
+    def decode_frame(self, data):
+        _, decompress = CODECS[self.codec]
+        return json.loads(decompress(data))
+    
+    def read_frame(self, frame_number, f=None):
+        '''Decompress one frame (the most recent frame is cached)'''
+        cached_number, cached_blocks = self.cached_frame
+        if cached_number == frame_number:
+            return cached_blocks
+        
+        _, _, offset, length = self.frames[frame_number]
+        
+        if f is None:
+            with open(self.filepath, 'rb') as handle:
+                handle.seek(offset)
+                data = handle.read(length)
+        else:
+            f.seek(offset)
+            data = f.read(length)
+        
+        blocks = self.decode_frame(data)
+        self.cached_frame = (frame_number, blocks)
+        return blocks
+    
+    def get_block(self, index):
+        '''Random access to one block dict by chain index'''
+        if index < 0 or index >= self.height:
+            raise IndexError(f'Block {index} not in archive (height {self.height})')
+        
+        firsts = [frame[0] for frame in self.frames]
+        frame_number = bisect.bisect_right(firsts, index) - 1
+        first_index = self.frames[frame_number][0]
+        
+        return self.read_frame(frame_number)[index - first_index]
+    
+    def iter_blocks(self, start=0):
+        '''Yield block dicts from start to the end of the archive'''
+        with open(self.filepath, 'rb') as f:
+            for frame_number, (first_index, count, _, _) in enumerate(self.frames):
+                if first_index + count <= start:
+                    continue
+                
+                for block_dict in self.read_frame(frame_number, f):
+                    if block_dict['index'] >= start:
+                        yield block_dict
+    
+    def append(self, block_dicts, difficulty):
+        '''
+        Append consecutive blocks, continuing from the current height
+        
+        Args:
+            block_dicts: Block dictionaries (Block.to_dict) starting at self.height
+            difficulty: Chain difficulty, stored in the index
+        '''
+        if not block_dicts:
+            return 0
+        
+        if block_dicts[0]['index'] != self.height:
+            raise ValueError(f'Archive expects block {self.height}, got {block_dicts[0]["index"]}')
+        
+        if self.difficulty is not None and difficulty != self.difficulty:
+            raise ValueError(f'Archive difficulty {self.difficulty} does not match chain difficulty {difficulty}')
+        
+        self.difficulty = difficulty
+        pending = list(block_dicts)
+        
+        if not self.filepath.exists():
+            self.filepath.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.filepath, 'wb') as f:
+                f.write(ARCHIVE_MAGIC)
+                f.flush()
+                os.fsync(f.fileno())
+        
+        frames = list(self.frames)
+        with open(self.filepath, 'r+b') as f:
+            # Reopen a partial last frame so sealed frames stay full; its new
+            # copy goes after the footer, the committed one stays in place
+            if frames and frames[-1][1] < self.frame_size:
+                pending = self.read_frame(len(frames) - 1, f) + pending
+                frames.pop()
+            
+            # Drops any torn tail left by a crashed append
+            f.seek(self.end)
+            f.truncate()
+            
+            for start in range(0, len(pending), self.frame_size):
+                frame_blocks = pending[start:start + self.frame_size]
+                data = self.encode_frame(frame_blocks)
+                frames.append((frame_blocks[0]['index'], len(frame_blocks), f.tell(), len(data)))
+                f.write(data)
+            
+            self.commit(f, frames)
+        
+        self.cached_frame = (None, None)
+        if self.dead_bytes() > sum(length for _, _, _, length in self.frames):
+            self.compact()
+        return len(block_dicts)
+    
+    def commit(self, f, frames):
+        '''
+        Write the index for frames after everything written so far, then its footer
+        
+        Frames and index are fsync'd before the footer is written, so a
+        footer that reaches the disk never points at missing data.
+        '''
+        index = zlib.compress(json.dumps({
+            'codec': self.codec,
+            'frame_size': self.frame_size,
+            'difficulty': self.difficulty,
+            'frames': frames
+        }, separators=(',', ':')).encode())
+        
+        index_offset = f.tell()
+        f.write(index)
+        f.flush()
+        os.fsync(f.fileno())
+        
+        f.write(FOOTER.pack(index_offset, len(index), ARCHIVE_MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+        
+        self.frames = frames
+        self.end = f.tell()
+        self.index_length = len(index)
+    
+    def dead_bytes(self):
+        '''Bytes of superseded frames and indexes before the committed footer'''
+        live = len(ARCHIVE_MAGIC) + sum(length for _, _, _, length in self.frames) + self.index_length + FOOTER.size
+        return self.end - live
+    
+    def compact(self):
+        '''Rewrite only the live frames to a temporary file and rename it over the archive'''
+        tmp_path = self.filepath.with_name(f'.{self.filepath.name}.{os.getpid()}.tmp')
+        frames = []
+        
+        with open(self.filepath, 'rb') as source, open(tmp_path, 'wb') as f:
+            f.write(ARCHIVE_MAGIC)
+            for first_index, count, offset, length in self.frames:
+                source.seek(offset)
+                frames.append((first_index, count, f.tell(), length))
+                f.write(source.read(length))
+            self.commit(f, frames)
+        
+        os.replace(tmp_path, self.filepath)
+        self.cached_frame = (None, None)
+    
+    def get_statistics(self):
+        '''Archive size and compression statistics'''
+        compressed = sum(length for _, _, _, length in self.frames)
+        return {
+            'blocks': self.height,
+            'frames': len(self.frames),
+            'codec': self.codec,
+            'frame_size': self.frame_size,
+            'file_bytes': self.filepath.stat().st_size if self.filepath.exists() else 0,
+            'frame_bytes': compressed,
+            'dead_bytes': self.dead_bytes()
+        }
+
+def is_archive_path(filepath):
+    '''Chain files ending in .ghz use the archive format'''
+    return Path(filepath).suffix == ARCHIVE_SUFFIX
+
+if __name__ == '__main__':
+    import contextlib
+    import io
+    import tempfile
+    import time
+    from integrity_blockchain import IntegrityBlockchain
+    
+    print('='*60)
+    print('CHAIN ARCHIVE TEST')
+    print('='*60)
+    
+    work_dir = Path(tempfile.mkdtemp())
+    archive = ChainArchive(work_dir / 'blockchain.ghz', frame_size=100)
+    
+    print('\n[TEST 1] Recording 3000 changes with automatic archiving...\n')
+    blockchain = IntegrityBlockchain(difficulty=2, archive=archive)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(3000):
+            blockchain.add_file_change(f'/srv/data/file_{i % 50}.log', 'modify', f'{i:064x}')
+    print(f'Blocks in memory: {len(blockchain.chain)}, archived: {archive.height}')
+    
+    print('\n[TEST 2] Comparing JSON and archive sizes...\n')
+    with contextlib.redirect_stdout(io.StringIO()):
+        blockchain.save_chain(work_dir / 'blockchain.json')
+        blockchain.save_chain(work_dir / 'blockchain.ghz')
+    json_bytes = (work_dir / 'blockchain.json').stat().st_size
+    archive_bytes = (work_dir / 'blockchain.ghz').stat().st_size
+    print(f'JSON (indent=2): {json_bytes:,} bytes')
+    print(f'Archive (zlib):  {archive_bytes:,} bytes ({json_bytes / archive_bytes:.1f}x smaller)')
+    
+    print('\n[TEST 3] Random access to one block...\n')
+    start_time = time.time()
+    block = ChainArchive(work_dir / 'blockchain.ghz').get_block(150)
+    print(f'Block {block["index"]} read in {(time.time() - start_time) * 1000:.2f}ms')
+    print(f'    Hash: {block["hash"]}')
+    
+    print('\n[TEST 4] Loading from the archive...\n')
+    restored = IntegrityBlockchain(difficulty=2)
+    restored.load_chain(work_dir / 'blockchain.ghz')
+    is_valid, message = restored.verify_chain()
+    print(f'Result: {message}')
+    
+    print('\n✅ Archive tests complete!')
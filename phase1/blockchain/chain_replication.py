@@ -0,0 +1,373 @@
+﻿import json
+import socket
+import socketserver
+import struct
+import threading
+import time
+from integrity_blockchain import Block, IntegrityBlockchain
+
+# Wire format: 4-byte big-endian length prefix followed by a compact JSON body
+FRAME_HEADER = struct.Struct('!I')
+MAX_BATCH = 50000
+
+def send_message(wfile, message):
+    '''Write one length-prefixed JSON message'''
+    body = json.dumps(message, separators=(',', ':')).encode()
+    wfile.write(FRAME_HEADER.pack(len(body)) + body)
+    wfile.flush()
+
+def recv_message(rfile):
+    '''Read one length-prefixed JSON message (None on clean disconnect)'''
+    prefix = rfile.read(FRAME_HEADER.size)
+    if len(prefix) < FRAME_HEADER.size:
+        return None
+    
+    (length,) = FRAME_HEADER.unpack(prefix)
+    body = rfile.read(length)
+    if len(body) < length:
+        raise ConnectionError('Connection closed mid-message')
+    
+    return json.loads(body)
+
+class ReplicationRequestHandler(socketserver.StreamRequestHandler):
+    '''Serves tip, header and block requests from one follower connection'''
+    
+    def handle(self):
+        blockchain = self.server.blockchain
+        
+        while True:
+            request = recv_message(self.rfile)
+            if request is None:
+                return
+            
+            op = request.get('op')
+            
+            if op == 'tip':
+                latest = blockchain.get_latest_block()
+                response = {
+                    'height': len(blockchain.chain),
+                    'hash': latest.hash,
+                    'difficulty': blockchain.difficulty
+                }
+            
+            elif op in ('headers', 'blocks'):
+                start = max(0, int(request.get('start', 0)))
+                count = min(MAX_BATCH, max(0, int(request.get('count', 0))))
+                blocks = blockchain.chain[start:start + count]
+                
+                if op == 'headers':
+                    response = {'headers': [block.header() for block in blocks]}
+                else:
+                    response = {'blocks': [block.to_dict() for block in blocks]}
+            
+            else:
+                response = {'error': f'Unknown op: {op}'}
+            
+            send_message(self.wfile, response)
+
+class ThreadingTCPReplicationServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class ThreadingUnixReplicationServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+class ChainReplicationServer:
+    '''
+    Leader side of chain replication
+    Exposes the committed chain of an IntegrityBlockchain to followers
+    '''
+    
+    def __init__(self, blockchain, address=('127.0.0.1', 0)):
+        '''
+        Args:
+            blockchain: IntegrityBlockchain to serve
+            address: (host, port) tuple for TCP or a filesystem path for a Unix socket
+        '''
+        if isinstance(address, tuple):
+            self.server = ThreadingTCPReplicationServer(address, ReplicationRequestHandler)
+        else:
+            self.server = ThreadingUnixReplicationServer(str(address), ReplicationRequestHandler)
+        
+        self.server.blockchain = blockchain
+        self.thread = None
+    
+    @property
+    def address(self):
+        '''Bound address (useful when listening on port 0)'''
+        return self.server.server_address
+    
+    def start(self):
+        '''Serve followers on a background thread'''
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f'[✓] Replication server listening on {self.address}')
+        return self
+    
+    def stop(self):
+        '''Stop serving and release the socket'''
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+class ChainFollower:
+    '''
+    Follower side of chain replication
+    
+    Syncs headers first (linkage + proof of work via the fast
+    verify_headers path), then pulls block payloads in batches and
+    checks each one against its verified header. Resumes from the
+    local chain height on every sync.
+    '''
+    
+    def __init__(self, blockchain, address, header_batch=20000, block_batch=5000):
+        self.blockchain = blockchain
+        self.address = address
+        self.header_batch = header_batch
+        self.block_batch = block_batch
+        self.sock = None
+        self.rfile = None
+        self.wfile = None
+    
+    def connect(self):
+        '''Open a connection to the leader'''
+        if isinstance(self.address, tuple):
+            self.sock = socket.create_connection(self.address)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(str(self.address))
+        
+        self.rfile = self.sock.makefile('rb')
+        self.wfile = self.sock.makefile('wb')
+    
+    def close(self):
+        '''Close the leader connection'''
+        for handle in (self.rfile, self.wfile, self.sock):
+            if handle is not None:
+                handle.close()
+        self.sock = self.rfile = self.wfile = None
+    
+    def send_request(self, message):
+        '''Send a request without waiting for its response'''
+        if self.sock is None:
+            self.connect()
+        
+        send_message(self.wfile, message)
+    
+    def recv_response(self):
+        '''Read the response to the oldest outstanding request'''
+        response = recv_message(self.rfile)
+        
+        if response is None:
+            raise ConnectionError('Leader closed the connection')
+        if 'error' in response:
+            raise ValueError(response['error'])
+        
+        return response
+    
+    def request(self, message):
+        '''Send a request and wait for the leader's response'''
+        self.send_request(message)
+        return self.recv_response()
+    
+    def find_resume_height(self, leader_height):
+        '''
+        Height to resume from, or None if local history diverged from the leader
+        
+        A follower that has only its own genesis block adopts the leader's chain
+        from height 0.
+        '''
+        chain = self.blockchain.chain
+        local_height = len(chain)
+        
+        if local_height == 0:
+            return 0
+        
+        if local_height > leader_height:
+            return None
+        
+        header = self.request({'op': 'headers', 'start': local_height - 1, 'count': 1})['headers'][0]
+        if header['hash'] == chain[-1].hash:
+            return local_height
+        
+        if local_height == 1:
+            return 0
+        
+        return None
+    
+    def fetch_headers(self, start, leader_height):
+        '''Fetch and verify headers for [start, leader_height); returns their hashes'''
+        previous_hash = self.blockchain.chain[start - 1].hash if start > 0 else '0'
+        hashes = []
+        
+        for batch_start in range(start, leader_height, self.header_batch):
+            count = min(self.header_batch, leader_height - batch_start)
+            headers = self.request({'op': 'headers', 'start': batch_start, 'count': count})['headers']
+            
+            if len(headers) != count:
+                return False, f'Leader returned {len(headers)} headers, expected {count}', hashes
+            
+            is_valid, message = self.blockchain.verify_headers(headers, previous_hash)
+            if not is_valid:
+                return False, message, hashes
+            
+            hashes.extend(header['hash'] for header in headers)
+            previous_hash = hashes[-1]
+        
+        return True, 'Headers verified ✓', hashes
+    
+    def fetch_blocks(self, start, hashes):
+        '''
+        Pull payloads in batches, check them against the verified headers and append
+        
+        Adopting the leader's chain from height 0 builds the replacement aside
+        and swaps it in only once every block verified, so a failed first sync
+        keeps the local genesis block.
+        '''
+        chain = [] if start == 0 else self.blockchain.chain
+        
+        offsets = list(range(0, len(hashes), self.block_batch))
+        
+        def request_batch(offset):
+            count = len(hashes[offset:offset + self.block_batch])
+            self.send_request({'op': 'blocks', 'start': start + offset, 'count': count})
+        
+        # Keep one batch request in flight so the leader encodes the next
+        # batch while this side verifies the current one
+        request_batch(offsets[0])
+        
+        for position, offset in enumerate(offsets):
+            if position + 1 < len(offsets):
+                request_batch(offsets[position + 1])
+            
+            expected = hashes[offset:offset + self.block_batch]
+            batch_start = start + offset
+            block_dicts = self.recv_response()['blocks']
+            
+            if len(block_dicts) != len(expected):
+                return False, f'Leader returned {len(block_dicts)} blocks, expected {len(expected)}'
+            
+            batch = []
+            for i, (block_dict, expected_hash) in enumerate(zip(block_dicts, expected)):
+                block = Block.from_dict(block_dict)
+                
+                if block.index != batch_start + i or block.hash != expected_hash:
+                    return False, f'Block {batch_start + i} does not match its header - TAMPERED!'
+                
+                if block.calculate_hash() != block.hash:
+                    return False, f'Block {batch_start + i} hash mismatch - TAMPERED!'
+                
+                batch.append(block)
+            
+            # Only fully verified batches reach the local chain, so an interrupted
+            # sync resumes from the last good height
+            chain.extend(batch)
+        
+        if start == 0:
+            self.blockchain.chain = chain
+        
+        return True, 'Blocks verified ✓'
+    
+    def sync(self):
+        '''
+        Catch up with the leader
+        
+        Returns:
+            (ok, message) in the style of IntegrityBlockchain.verify_chain
+        '''
+        start_time = time.time()
+        tip = self.request({'op': 'tip'})
+        leader_height = tip['height']
+        
+        if tip['difficulty'] != self.blockchain.difficulty:
+            return False, f'Difficulty mismatch: leader {tip["difficulty"]}, follower {self.blockchain.difficulty}'
+        
+        start = self.find_resume_height(leader_height)
+        if start is None:
+            return False, f'Local chain diverged from leader at height {len(self.blockchain.chain)} - leader history rewritten!'
+        
+        if start == leader_height:
+            return True, f'Already in sync at height {leader_height}'
+        
+        is_valid, message, hashes = self.fetch_headers(start, leader_height)
+        if not is_valid:
+            return False, message
+        
+        is_valid, message = self.fetch_blocks(start, hashes)
+        if not is_valid:
+            # A pipelined batch request may still be outstanding
+            self.close()
+            return False, message
+        
+        elapsed = time.time() - start_time
+        print(f'[✓] Synced blocks {start}-{leader_height - 1} in {elapsed:.2f}s')
+        return True, f'Synced {leader_height - start} blocks, height {leader_height}'
+
+if __name__ == '__main__':
+    import os
+    import tempfile
+    
+    print('='*60)
+    print('CHAIN REPLICATION TEST')
+    print('='*60 + '\n')
+    
+    leader = IntegrityBlockchain(difficulty=2)
+    for i in range(25):
+        leader.add_file_change(f'file_{i}.txt', 'create', f'hash_{i}_xyz')
+    leader.commit_pending_changes()
+    
+    server = ChainReplicationServer(leader).start()
+    
+    print('\n[TEST 1] Initial sync over TCP...\n')
+    follower_chain = IntegrityBlockchain(difficulty=2)
+    follower = ChainFollower(follower_chain, server.address)
+    print(f'Result: {follower.sync()[1]}')
+    print(f'Verify: {follower_chain.verify_chain()[1]}')
+    
+    print('\n[TEST 2] Resume after the leader grows...\n')
+    for i in range(10):
+        leader.add_file_change(f'late_{i}.txt', 'modify', f'late_{i}_xyz')
+    print(f'Result: {follower.sync()[1]}')
+    print(f'Heights: leader {len(leader.chain)}, follower {len(follower_chain.chain)}')
+    
+    print('\n[TEST 3] Leader rewrites history...\n')
+    leader.chain[1].data['changes'][0]['hash'] = 'forged'
+    previous_hash = leader.chain[0].hash
+    for block in leader.chain[1:]:
+        block.previous_hash = previous_hash
+        block.nonce = 0
+        block.hash = block.calculate_hash()
+        block.mine_block(leader.difficulty)
+        previous_hash = block.hash
+    is_valid, message = follower.sync()
+    print(f'Result: {"✅" if is_valid else "⚠️ "} {message}')
+    
+    follower.close()
+    
+    print('\n[TEST 4] Refused first sync keeps the local genesis...\n')
+    original_hash = leader.chain[2].data['changes'][0]['hash']
+    leader.chain[2].data['changes'][0]['hash'] = 'silently edited'
+    fresh_chain = IntegrityBlockchain(difficulty=2)
+    fresh = ChainFollower(fresh_chain, server.address)
+    is_valid, message = fresh.sync()
+    print(f'Result: {"✅" if is_valid else "⚠️ "} {message}')
+    print(f'Local height after refusal: {len(fresh_chain.chain)}')
+    is_valid, message = fresh.sync()
+    print(f'Retry: {"✅" if is_valid else "⚠️ "} {message}')
+    fresh.close()
+    leader.chain[2].data['changes'][0]['hash'] = original_hash
+    server.stop()
+    
+    if hasattr(socket, 'AF_UNIX'):
+        print('\n[TEST 5] Initial sync over a Unix socket...\n')
+        socket_path = os.path.join(tempfile.mkdtemp(), 'ghost_chain.sock')
+        server = ChainReplicationServer(leader, socket_path).start()
+        unix_follower = ChainFollower(IntegrityBlockchain(difficulty=2), socket_path)
+        print(f'Result: {unix_follower.sync()[1]}')
+        unix_follower.close()
+        server.stop()
+        os.remove(socket_path)
+    
+    print('\n✅ Replication tests complete!')
@@ -0,0 +1,170 @@
+﻿import hashlib
+import numpy as np
+from pathlib import Path
+
+# Content-defined chunking (gear rolling hash, FastCDC style)
+CHUNK_MIN = 256 * 1024
+CHUNK_AVG_BITS = 20  # ~1 MiB average chunk
+CHUNK_MAX = 4 * 1024 * 1024
+READ_SIZE = 8 * 1024 * 1024
+
+# Fixed gear table so chunk boundaries are stable across runs and hosts
+GEAR = np.array([
+    int.from_bytes(hashlib.sha256(f'ghost-gear-{i}'.encode()).digest()[:4], 'big')
+    for i in range(256)
+], dtype=np.uint32)
+
+def gear_hash(data):
+    '''
+    Rolling gear hash at every byte position
+    
+    h[i] = sum(GEAR[data[i-k]] << k for k in 0..31) mod 2**32, computed by
+    doubling the window (1, 2, 4, 8, 16, 32 bytes) instead of looping per byte.
+    The first 31 positions see a truncated window; they always fall inside
+    CHUNK_MIN so they never decide a boundary.
+    '''
+    h = GEAR[np.frombuffer(data, dtype=np.uint8)]
+    
+    span = 1
+    while span < 32:
+        h[span:] += h[:-span] << np.uint32(span)
+        span *= 2
+    
+    return h
+
+def find_cut_points(data, min_size=CHUNK_MIN, avg_bits=CHUNK_AVG_BITS, max_size=CHUNK_MAX):
+    '''Chunk end offsets within data, which must start on a chunk boundary'''
+    if len(data) == 0:
+        return []
+    
+    # Use the high bits: they depend on all 32 bytes of the window
+    candidates = np.flatnonzero((gear_hash(data) >> np.uint32(32 - avg_bits)) == 0) + 1
+    
+    cuts = []
+    last_cut = 0
+    while True:
+        position = np.searchsorted(candidates, last_cut + min_size)
+        cut = int(candidates[position]) if position < len(candidates) else len(data)
+        cut = min(cut, last_cut + max_size)
+        
+        # A cut at or past the end waits for more data (or EOF)
+        if cut >= len(data):
+            return cuts
+        
+        cuts.append(cut)
+        last_cut = cut
+
+def chunk_file(filepath, start_offset=0):
+    '''
+    Split a file into content-defined chunks
+    
+    Args:
+        filepath: File to chunk
+        start_offset: Chunk boundary to start from (0 for the whole file)
+    
+    Returns:
+        List of [offset, length, sha256_hex] entries
+    '''
+    chunks = []
+    pending = b''
+    offset = start_offset
+    
+    with open(filepath, 'rb') as f:
+        f.seek(start_offset)
+        
+        while True:
+            block = f.read(READ_SIZE)
+            data = pending + block
+            at_eof = not block
+            
+            if at_eof:
+                if data:
+                    chunks.append([offset, len(data), hashlib.sha256(data).hexdigest()])
+                return chunks
+            
+            view = memoryview(data)
+            last_cut = 0
+            for cut in find_cut_points(data):
+                chunks.append([offset, cut - last_cut, hashlib.sha256(view[last_cut:cut]).hexdigest()])
+                offset += cut - last_cut
+                last_cut = cut
+            
+            pending = bytes(view[last_cut:])
+
+def chunk_file_appended(filepath, previous_chunks):
+    '''
+    Re-chunk a file, reusing the prefix of previous_chunks that is unchanged
+    
+    A file that grew is taken to be appended to: only the old last chunk is
+    re-read to check it (the tail must continue it), then it and the new
+    tail are re-chunked, so the cost is one chunk plus the tail. Boundaries
+    match a full chunk_file() run because chunking restarts on an existing
+    boundary. An in-place edit before the old last chunk combined with
+    growth is not seen here; the recorded root then no longer matches the
+    file, and detect_tampering's full pass reports it.
+    
+    A file that kept its size or shrank (or whose old last chunk changed)
+    gets each previous chunk re-read and its digest checked (SHA-256 only,
+    no rolling hash), and is re-chunked from the first changed chunk.
+    '''
+    if not previous_chunks:
+        return chunk_file(filepath)
+    
+    size = Path(filepath).stat().st_size
+    last_offset, last_length, last_digest = previous_chunks[-1]
+    
+    with open(filepath, 'rb') as f:
+        if size > last_offset + last_length:
+            f.seek(last_offset)
+            if hashlib.sha256(f.read(last_length)).hexdigest() == last_digest:
+                return [list(chunk) for chunk in previous_chunks[:-1]] + chunk_file(filepath, last_offset)
+        
+        reused = []
+        for offset, length, digest in previous_chunks[:-1]:
+            if offset + length > size:
+                break
+            f.seek(offset)
+            if hashlib.sha256(f.read(length)).hexdigest() != digest:
+                break
+            reused.append([offset, length, digest])
+    
+    restart = reused[-1][0] + reused[-1][1] if reused else 0
+    return reused + chunk_file(filepath, restart)
+
+def chunk_root(chunks):
+    '''Root digest over the ordered chunk digests'''
+    sha256 = hashlib.sha256()
+    for _, _, digest in chunks:
+        sha256.update(bytes.fromhex(digest))
+    return sha256.hexdigest()
+
+def changed_ranges(old_chunks, new_chunks):
+    '''
+    Byte ranges of the current file whose chunks are not in the old chunk list
+    
+    Content-defined boundaries resynchronise after an edit, so unchanged
+    regions keep their digests even when shifted by an insert or delete.
+    
+    Returns:
+        List of (start, end) half-open ranges, adjacent ranges merged
+    '''
+    known = {digest for _, _, digest in old_chunks}
+    ranges = []
+    
+    for offset, length, digest in new_chunks:
+        if digest in known:
+            continue
+        
+        if ranges and ranges[-1][1] == offset:
+            ranges[-1] = (ranges[-1][0], offset + length)
+        else:
+            ranges.append((offset, offset + length))
+    
+    return ranges
+
+def format_ranges(ranges, limit=5):
+    '''Human readable byte ranges for tamper reports'''
+    shown = ', '.join(f'{start}-{end - 1}' for start, end in ranges[:limit])
+    if len(ranges) > limit:
+        shown += f' (+{len(ranges) - limit} more)'
+    return shown
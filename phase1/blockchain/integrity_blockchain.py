@@ -3,6 +3,11 @@ import json
 import time
 from datetime import datetime
 from pathlib import Path
+from chain_archive import ChainArchive, is_archive_path
+from chunk_hasher import chunk_file, chunk_file_appended, chunk_root, changed_ranges, format_ranges
+
+# Reused for every block hash; json.dumps would build a new encoder per call
+BLOCK_ENCODER = json.JSONEncoder(sort_keys=True)
 
 class Block:
     '''Single block in the blockchain containing file change records'''
@@ -17,13 +22,13 @@ class Block:
     
     def calculate_hash(self):
         '''Calculate SHA-256 hash of block contents'''
-        block_string = json.dumps({
+        block_string = BLOCK_ENCODER.encode({
             'index': self.index,
             'timestamp': self.timestamp,
             'data': self.data,
             'previous_hash': self.previous_hash,
             'nonce': self.nonce
-        }, sort_keys=True)
+        })
         
         return hashlib.sha256(block_string.encode()).hexdigest()
     
@@ -47,15 +52,53 @@ class Block:
             'nonce': self.nonce,
             'hash': self.hash
         }
+    
+    def header(self):
+        '''Block header (everything except the data payload) for header-first sync'''
+        return {
+            'index': self.index,
+            'timestamp': self.timestamp,
+            'previous_hash': self.previous_hash,
+            'nonce': self.nonce,
+            'hash': self.hash
+        }
+    
+    @classmethod
+    def from_dict(cls, block_dict):
+        '''Rebuild a block from its dictionary form without re-mining or re-hashing'''
+        block = cls.__new__(cls)
+        block.index = block_dict['index']
+        block.timestamp = block_dict['timestamp']
+        block.data = block_dict['data']
+        block.previous_hash = block_dict['previous_hash']
+        block.nonce = block_dict['nonce']
+        block.hash = block_dict['hash']
+        return block
 
 class IntegrityBlockchain:
     '''Blockchain for immutable file integrity monitoring'''
     
-    def __init__(self, difficulty=2):
+    def __init__(self, difficulty=2, archive=None, chunk_threshold=None):
+        '''
+        Args:
+            difficulty: Proof-of-work difficulty
+            archive: Optional empty ChainArchive; full frames of older blocks
+                are appended to it automatically as the chain grows. To keep
+                archiving into an existing archive, load_chain() it instead.
+            chunk_threshold: Optional size in bytes; files at least this large
+                are recorded with content-defined chunk digests
+        '''
         self.chain = []
         self.pending_changes = []
         self.difficulty = difficulty
+        self.archive = archive
+        self.chunk_threshold = chunk_threshold
+        self.chunk_cache = {}
         self.create_genesis_block()
+        
+        # A new genesis never continues an archive of some other chain
+        if archive is not None and archive.height:
+            raise ValueError(f'{archive.filepath} already holds {archive.height} blocks; load it with load_chain()')
     
     def create_genesis_block(self):
         '''Create the first block in the chain'''
@@ -86,6 +129,37 @@ class IntegrityBlockchain:
         except Exception as e:
             return f'error:{str(e)}'
     
+    def use_chunked_mode(self, filepath):
+        '''Large files are hashed per content-defined chunk'''
+        if self.chunk_threshold is None:
+            return False
+        try:
+            return Path(filepath).stat().st_size >= self.chunk_threshold
+        except OSError:
+            return False
+    
+    def calculate_file_chunks(self, filepath, change_type='modify'):
+        '''
+        Content-defined chunk digests for a file
+        
+        For a modify the previous chunk list is reused (chunk_file_appended):
+        a file that grew is treated as an append and only its old last chunk
+        and the tail are hashed; otherwise the old chunks are re-hashed up to
+        the first changed one. Anything else is a full pass, and
+        detect_tampering always re-reads the whole file.
+        '''
+        previous = self.chunk_cache.get(str(filepath))
+        
+        if previous is None and change_type == 'modify':
+            history = self.get_file_history(filepath)
+            if history and 'chunks' in history[-1]:
+                previous = history[-1]['chunks']
+        
+        if previous and change_type == 'modify':
+            return chunk_file_appended(filepath, previous)
+        
+        return chunk_file(filepath)
+    
     def add_file_change(self, filepath, change_type, file_hash=None):
         '''
         Record a file change
@@ -95,8 +169,13 @@ class IntegrityBlockchain:
             change_type: 'create', 'modify', 'delete'
             file_hash: Optional pre-calculated hash
         '''
+        chunks = None
         if file_hash is None and change_type != 'delete':
-            file_hash = self.calculate_file_hash(filepath)
+            if self.use_chunked_mode(filepath):
+                chunks = self.calculate_file_chunks(filepath, change_type)
+                file_hash = chunk_root(chunks)
+            else:
+                file_hash = self.calculate_file_hash(filepath)
         
         change = {
             'filepath': str(filepath),
@@ -106,6 +185,15 @@ class IntegrityBlockchain:
             'timestamp_human': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
         
+        if chunks is not None:
+            change['hash_mode'] = 'chunked'
+            change['size'] = sum(length for _, length, _ in chunks)
+            change['chunks'] = chunks
+        
+        self.chunk_cache.pop(str(filepath), None)
+        if chunks is not None:
+            self.chunk_cache[str(filepath)] = chunks
+        
         self.pending_changes.append(change)
         print(f'[+] Recorded: {change_type} - {Path(filepath).name}')
         
@@ -141,8 +229,32 @@ class IntegrityBlockchain:
         print(f'    Nonce: {new_block.nonce}')
         
         self.pending_changes = []
+        self.archive_sealed_blocks()
         return new_block
     
+    def archive_sealed_blocks(self):
+        '''Append older blocks to the attached archive once a full frame is ready'''
+        if self.archive is None:
+            return 0
+        
+        start = self.archive.height
+        if len(self.chain) - start < self.archive.frame_size:
+            return 0
+        
+        # The chain may have been replaced (load_chain) since the archive was attached
+        if not self.archive_matches(self.archive):
+            raise ValueError(f'{self.archive.filepath} holds blocks of a different chain')
+        
+        blocks = [block.to_dict() for block in self.chain[start:]]
+        return self.archive.append(blocks, self.difficulty)
+    
+    def archive_matches(self, archive):
+        '''True if the archive's last block is this chain's block at the same index'''
+        height = archive.height
+        if height == 0:
+            return True
+        return height <= len(self.chain) and archive.get_block(height - 1)['hash'] == self.chain[height - 1].hash
+    
     def verify_chain(self):
         '''Verify blockchain integrity - detects tampering'''
         for i in range(1, len(self.chain)):
@@ -163,6 +275,30 @@ class IntegrityBlockchain:
         
         return True, 'Blockchain integrity verified ✓'
     
+    def verify_headers(self, headers, previous_hash):
+        '''
+        Fast verification of a run of block headers
+        
+        Checks linkage and proof of work only; payload hashes are
+        checked once the block data arrives.
+        
+        Args:
+            headers: Consecutive header dicts (see Block.header)
+            previous_hash: Hash of the block preceding the first header
+        '''
+        target = '0' * self.difficulty
+        
+        for header in headers:
+            if header['previous_hash'] != previous_hash:
+                return False, f'Block {header["index"]} chain broken - TAMPERED!'
+            
+            if not header['hash'].startswith(target):
+                return False, f'Block {header["index"]} invalid proof of work'
+            
+            previous_hash = header['hash']
+        
+        return True, 'Headers verified ✓'
+    
     def detect_tampering(self, filepath):
         '''Check if a file has been tampered with since last record'''
         history = self.get_file_history(filepath)
@@ -170,14 +306,33 @@ class IntegrityBlockchain:
         if not history:
             return None, 'File not in blockchain'
         
-        current_hash = self.calculate_file_hash(filepath)
         last_record = history[-1]
         
+        if 'chunks' in last_record:
+            return self.detect_chunk_tampering(filepath, last_record)
+        
+        current_hash = self.calculate_file_hash(filepath)
+        
         if current_hash != last_record['hash']:
             return True, f'TAMPERED! Last known hash: {last_record["hash"][:16]}..., Current: {current_hash[:16]}...'
         
         return False, 'File integrity verified ✓'
     
+    def detect_chunk_tampering(self, filepath, last_record):
+        '''Full chunk comparison that reports which byte ranges changed'''
+        current_chunks = chunk_file(filepath)
+        
+        if chunk_root(current_chunks) == last_record['hash']:
+            return False, 'File integrity verified ✓'
+        
+        ranges = changed_ranges(last_record['chunks'], current_chunks)
+        size = sum(length for _, length, _ in current_chunks)
+        
+        if not ranges:
+            return True, f'TAMPERED! Content removed (size {last_record.get("size", "unknown")} -> {size} bytes)'
+        
+        return True, f'TAMPERED! Changed byte ranges: {format_ranges(ranges)}'
+    
     def get_file_history(self, filepath):
         '''Get complete history of a file from blockchain'''
         history = []
@@ -187,17 +342,26 @@ class IntegrityBlockchain:
             if 'changes' in block.data:
                 for change in block.data['changes']:
                     if change['filepath'] == filepath_str:
-                        history.append({
+                        entry = {
                             'block': block.index,
                             'timestamp': change.get('timestamp_human', 'unknown'),
                             'type': change['type'],
                             'hash': change['hash']
-                        })
+                        }
+                        if 'chunks' in change:
+                            entry['size'] = change['size']
+                            entry['chunks'] = change['chunks']
+                        history.append(entry)
         
         return history
     
     def save_chain(self, filepath='blockchain.json'):
-        '''Save blockchain to file'''
+        '''Save blockchain to file (.ghz paths use the compressed archive format)'''
+        if is_archive_path(filepath):
+            self.save_archive(filepath)
+            print(f'\n[✓] Blockchain archived to {filepath}')
+            return
+        
         chain_data = {
             'difficulty': self.difficulty,
             'blocks': [block.to_dict() for block in self.chain],
@@ -214,6 +378,9 @@ class IntegrityBlockchain:
         if not Path(filepath).exists():
             return False
         
+        if is_archive_path(filepath):
+            return self.load_archive(filepath)
+        
         with open(filepath, 'r') as f:
             chain_data = json.load(f)
         
@@ -221,19 +388,38 @@ class IntegrityBlockchain:
         self.difficulty = chain_data.get('difficulty', 2)
         
         for block_dict in chain_data['blocks']:
-            block = Block(
-                block_dict['index'],
-                block_dict['timestamp'],
-                block_dict['data'],
-                block_dict['previous_hash']
-            )
-            block.nonce = block_dict['nonce']
-            block.hash = block_dict['hash']
-            self.chain.append(block)
+            self.chain.append(Block.from_dict(block_dict))
         
         print(f'[✓] Blockchain loaded: {len(self.chain)} blocks')
         return True
     
+    def save_archive(self, filepath):
+        '''Append blocks not yet in the archive at filepath'''
+        archive = self.archive
+        if archive is None or archive.filepath != Path(filepath):
+            archive = ChainArchive(filepath)
+        
+        # An archive of some other chain is replaced, like a JSON save would be
+        if not self.archive_matches(archive):
+            Path(filepath).unlink()
+            archive = ChainArchive(filepath, archive.codec, archive.frame_size, archive.level)
+            if self.archive is not None and self.archive.filepath == Path(filepath):
+                self.archive = archive
+        
+        blocks = [block.to_dict() for block in self.chain[archive.height:]]
+        archive.append(blocks, self.difficulty)
+    
+    def load_archive(self, filepath):
+        '''Load blockchain from a compressed archive and keep archiving into it'''
+        archive = ChainArchive(filepath)
+        
+        self.chain = [Block.from_dict(block_dict) for block_dict in archive.iter_blocks()]
+        self.difficulty = archive.difficulty
+        self.archive = archive
+        
+        print(f'[✓] Blockchain loaded from archive: {len(self.chain)} blocks')
+        return True
+    
     def print_summary(self):
         '''Print blockchain summary'''
         print('\n' + '='*60)
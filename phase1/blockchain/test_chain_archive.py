@@ -0,0 +1,103 @@
+﻿import contextlib
+import io
+import os
+import tempfile
+from pathlib import Path
+from chain_archive import ChainArchive
+from integrity_blockchain import IntegrityBlockchain
+
+def blocks(start, count):
+    return [{'index': i, 'hash': f'{i:064x}', 'data': {'payload': os.urandom(64).hex()}} for i in range(start, start + count)]
+
+def test_torn_append_falls_back_to_last_footer():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'chain.ghz'
+        archive = ChainArchive(path, frame_size=10)
+        archive.append(blocks(0, 25), difficulty=2)
+        committed = path.stat().st_size
+        before = list(archive.iter_blocks())
+        
+        # Reopens the partial last frame: a fresh copy and a new index go after the footer
+        archive.append(blocks(25, 12), difficulty=2)
+        appended = path.read_bytes()
+        assert len(appended) > committed
+        
+        # A crash can leave any prefix of the append on disk
+        for cut in range(committed, len(appended), max(1, (len(appended) - committed) // 40)):
+            path.write_bytes(appended[:cut])
+            torn = ChainArchive(path)
+            assert torn.height == 25
+            assert list(torn.iter_blocks()) == before
+        
+        # The next append drops the torn tail and carries on
+        torn.append(blocks(25, 12), difficulty=2)
+        reopened = ChainArchive(path)
+        assert reopened.height == 37
+        assert [block['index'] for block in reopened.iter_blocks()] == list(range(37))
+        assert reopened.get_block(24) == before[24]
+
+def test_dead_bytes_are_compacted():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'chain.ghz'
+        archive = ChainArchive(path, frame_size=100)
+        for start in range(0, 300):
+            archive.append(blocks(start, 1), difficulty=2)
+        
+        stats = archive.get_statistics()
+        assert stats['dead_bytes'] <= stats['frame_bytes']
+        assert [block['index'] for block in ChainArchive(path).iter_blocks()] == list(range(300))
+
+def commit_changes(blockchain, prefix, count):
+    for i in range(count):
+        blockchain.add_file_change(f'{prefix}_{i}', 'modify', f'{i:064x}')
+        blockchain.commit_pending_changes()
+
+def test_blockchain_refuses_foreign_archive():
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        path = Path(tmp) / 'chain.ghz'
+        commit_changes(IntegrityBlockchain(difficulty=1, archive=ChainArchive(path, frame_size=2)), 'file', 5)
+        archived = ChainArchive(path).height
+        assert archived > 0
+        
+        # A fresh genesis can't continue it
+        try:
+            IntegrityBlockchain(difficulty=1, archive=ChainArchive(path))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('non-empty archive accepted by a new chain')
+        
+        # Nor can a different chain loaded over the one the archive came from
+        other = IntegrityBlockchain(difficulty=1)
+        commit_changes(other, 'other', 5)
+        other.save_chain(Path(tmp) / 'other.json')
+        
+        blockchain = IntegrityBlockchain(difficulty=1)
+        blockchain.load_chain(path)
+        blockchain.load_chain(Path(tmp) / 'other.json')
+        try:
+            commit_changes(blockchain, 'late', 2)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('blocks of another chain appended to the archive')
+        assert ChainArchive(path).height == archived
+
+if __name__ == '__main__':
+    print('='*60)
+    print('CHAIN ARCHIVE CRASH-SAFETY TEST')
+    print('='*60)
+    
+    print('\n[TEST 1] Torn append falls back to the last complete footer...')
+    test_torn_append_falls_back_to_last_footer()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 2] Superseded frames and indexes are compacted...')
+    test_dead_bytes_are_compacted()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 3] Archive of another chain is refused...')
+    test_blockchain_refuses_foreign_archive()
+    print('  ✅ PASS')
+    
+    print('\n✅ All chain archive tests passed!')
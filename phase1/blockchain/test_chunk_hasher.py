@@ -0,0 +1,116 @@
+﻿import contextlib
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+import chunk_hasher
+from chunk_hasher import chunk_file, chunk_file_appended, chunk_root
+from integrity_blockchain import IntegrityBlockchain
+
+SIZE = 6 * 1024 * 1024
+
+def write_random(path, size):
+    with open(path, 'wb') as f:
+        f.write(os.urandom(size))
+
+def record(blockchain, path, change_type):
+    with contextlib.redirect_stdout(io.StringIO()):
+        blockchain.add_file_change(path, change_type)
+        blockchain.commit_pending_changes()
+
+def test_append_matches_full_pass():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'data.bin'
+        write_random(path, SIZE)
+        previous = chunk_file(path)
+        
+        with open(path, 'ab') as f:
+            f.write(os.urandom(SIZE // 2))
+        
+        assert chunk_file_appended(path, previous) == chunk_file(path)
+
+class CountingHashlib:
+    '''Stand-in for chunk_hasher's hashlib that counts the bytes passed to sha256()'''
+    
+    def __init__(self):
+        self.hashed = 0
+    
+    def sha256(self, data=b''):
+        self.hashed += len(data)
+        return hashlib.sha256(data)
+
+def test_append_hashes_only_tail():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'data.bin'
+        # Large enough that re-reading the prefix would dwarf the tail
+        write_random(path, 4 * SIZE)
+        previous = chunk_file(path)
+        
+        with open(path, 'ab') as f:
+            f.write(os.urandom(SIZE // 8))
+        
+        counting = CountingHashlib()
+        chunk_hasher.hashlib = counting
+        try:
+            current = chunk_file_appended(path, previous)
+        finally:
+            chunk_hasher.hashlib = hashlib
+        
+        assert current == chunk_file(path)
+        # The old last chunk is read to check it and again to re-chunk it, plus the tail
+        assert counting.hashed <= 2 * previous[-1][1] + SIZE // 8
+
+def test_same_size_edit_rechunks():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'data.bin'
+        write_random(path, SIZE)
+        previous = chunk_file(path)
+        
+        # Overwrite bytes in the first chunk without changing the size
+        with open(path, 'r+b') as f:
+            f.write(b'edited in place')
+        
+        current = chunk_file_appended(path, previous)
+        assert current == chunk_file(path)
+        assert chunk_root(current) != chunk_root(previous)
+
+def test_same_size_edit_not_flagged():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'data.bin'
+        write_random(path, SIZE)
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            blockchain = IntegrityBlockchain(difficulty=0, chunk_threshold=1024 * 1024)
+        record(blockchain, path, 'create')
+        
+        with open(path, 'r+b') as f:
+            f.seek(SIZE // 3)
+            f.write(b'legitimate edit')
+        record(blockchain, path, 'modify')
+        
+        is_tampered, message = blockchain.detect_tampering(path)
+        assert not is_tampered, message
+
+if __name__ == '__main__':
+    print('='*60)
+    print('CHUNK HASHER TEST')
+    print('='*60)
+    
+    print('\n[TEST 1] Appended file re-chunks like a full pass...')
+    test_append_matches_full_pass()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 2] Append hashes only the old last chunk and the tail...')
+    test_append_hashes_only_tail()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 3] Same-size in-place edit re-chunks from the edit...')
+    test_same_size_edit_rechunks()
+    print('  ✅ PASS')
+    
+    print('\n[TEST 4] Recorded same-size edit is not reported as tampering...')
+    test_same_size_edit_not_flagged()
+    print('  ✅ PASS')
+    
+    print('\n✅ All chunk hasher tests passed!')